@@ -0,0 +1,195 @@
+#
+# ------------------------------------------------------------
+# Copyright (c) All rights reserved
+# SiLab, Institute of Physics, University of Bonn
+# ------------------------------------------------------------
+#
+
+'''
+    Recompress finished raw data files with stronger compression for archiving
+'''
+
+import glob
+import logging
+import os
+import tempfile
+from time import sleep, time
+
+import numpy as np
+import tables as tb
+
+from pymosa.m26_raw_data import get_filters, get_raw_data, set_blosc_nthreads
+from pymosa.repack_raw_data import repack_raw_data_file
+from pymosa.run_catalog import RunCatalog
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+default_archive_compression = dict(complib='blosc:zstd', complevel=9, shuffle='bit')
+
+
+def lower_priority():
+    '''Lowers the CPU priority of the process, the recompression should not compete with data taking.
+    '''
+    try:
+        os.nice(19)
+    except (AttributeError, OSError):  # not available on Windows
+        logger.warning('Cannot lower process priority')
+
+
+def verify_raw_data_file(filename, reference_filename, block_size=2**22):
+    '''Compares the raw data and the meta data of two raw data files word by word.
+
+    Returns
+    -------
+    equal : bool
+        True if the raw data and the meta data are equal.
+    '''
+    with tb.open_file(filename, mode='r') as in_file_h5:
+        with tb.open_file(reference_filename, mode='r') as reference_file_h5:
+            raw_data, reference_raw_data = get_raw_data(in_file_h5), get_raw_data(reference_file_h5)
+            if raw_data.nrows != reference_raw_data.nrows:
+                return False
+            for start in range(0, raw_data.nrows, block_size):
+                if not np.array_equal(raw_data.read(start=start, stop=start + block_size), reference_raw_data.read(start=start, stop=start + block_size)):
+                    return False
+            return np.array_equal(in_file_h5.root.meta_data[:], reference_file_h5.root.meta_data[:])
+
+
+def recompress_raw_data_file(filename, compression=None, block_size=2**22):
+    '''Recompresses the raw data of a raw data file.
+
+    The file is rewritten to a temporary file (see repack_raw_data_file()), the raw data is verified word by word
+    and the file is replaced atomically. Files which already use the given compression are skipped.
+
+    Parameters
+    ----------
+    filename : str
+        Filename of the raw data file.
+    compression : dict
+        Compression settings of the raw data, see get_filters(). If None, default_archive_compression is used.
+    block_size : int
+        Number of raw data words compared at once.
+
+    Returns
+    -------
+    result : dict
+        File size before and after the recompression in bytes (equal if the file was skipped).
+    '''
+    if compression is None:
+        compression = default_archive_compression
+    filters = get_filters(**compression)
+    size_before = os.path.getsize(filename)
+    with tb.open_file(filename, mode='r') as in_file_h5:
+        if get_raw_data(in_file_h5).filters == filters:
+            logger.info('Skipping %s, already recompressed', filename)
+            return dict(size_before=size_before, size_after=size_before)
+    fd, tmp_filename = tempfile.mkstemp(suffix='.h5', prefix=os.path.splitext(os.path.basename(filename))[0] + '_', dir=os.path.dirname(os.path.abspath(filename)))
+    os.close(fd)
+    try:
+        repack_raw_data_file(filename, output_filename=tmp_filename, compression=compression)
+        if not verify_raw_data_file(tmp_filename, filename, block_size=block_size):
+            raise RuntimeError('Verification of recompressed raw data file %s failed' % filename)
+        os.replace(tmp_filename, filename)
+    except Exception:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+    size_after = os.path.getsize(filename)
+    logger.info('Recompressed %s: %0.1f MB -> %0.1f MB, saved %0.1f MB', filename, size_before / 1024.0 ** 2, size_after / 1024.0 ** 2, (size_before - size_after) / 1024.0 ** 2)
+    return dict(size_before=size_before, size_after=size_after)
+
+
+def find_finished_raw_data_files(folder, min_age=600.0):
+    '''Returns the raw data files of finished runs in the output folder.
+
+    If the output folder has a run catalog (see RunCatalog), the files of the closed runs and the files imported
+    into the catalog (existing before the catalog was created) are returned.
+    Otherwise, all HDF5 files with raw data are returned. Only files, which were not modified for the given time, are returned.
+
+    Parameters
+    ----------
+    folder : str
+        Output folder.
+    min_age : float
+        Minimum time in seconds since the last modification of the file.
+    '''
+    filenames = []
+    if os.path.isfile(os.path.join(folder, 'run_catalog.sqlite')):
+        with RunCatalog(folder) as run_catalog:
+            for run in run_catalog.get_runs(status='closed'):
+                filenames.extend(os.path.join(folder, f) for f in run['filenames'] or [] if os.path.splitext(f)[1] == '.h5')
+            for run in run_catalog.get_runs(status='imported'):  # one entry per file without extension
+                filenames.append(os.path.join(folder, run['filename'] + '.h5'))
+    else:
+        filenames = sorted(glob.glob(os.path.join(folder, '*.h5')))
+    finished_filenames = []
+    for filename in filenames:
+        if not os.path.isfile(filename) or time() - os.path.getmtime(filename) < min_age:
+            continue
+        try:
+            with tb.open_file(filename, mode='r') as in_file_h5:
+                if ('raw_data' not in in_file_h5.root and 'raw_data_streams' not in in_file_h5.root) or 'meta_data' not in in_file_h5.root:
+                    continue
+        except Exception:  # e.g. file is opened for writing
+            continue
+        finished_filenames.append(filename)
+    return finished_filenames
+
+
+def archive_folder(folder, compression=None, min_age=600.0):
+    '''Recompresses the raw data files of all finished runs in the output folder.
+
+    Returns
+    -------
+    bytes_saved : int
+        Number of bytes saved.
+    '''
+    bytes_saved = 0
+    for filename in find_finished_raw_data_files(folder, min_age=min_age):
+        try:
+            result = recompress_raw_data_file(filename, compression=compression)
+        except Exception as e:
+            logger.error('Recompression of %s failed: %s', filename, e)
+            continue
+        bytes_saved += result['size_before'] - result['size_after']
+    return bytes_saved
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Recompress raw data files of finished pymosa runs for archiving\nExample: pymosa_archive telescope_data --watch 600',
+                                     formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('paths', type=str, nargs='+', metavar='<output folder or raw data file>', help='output folders (finished runs are recompressed) or raw data files')
+    parser.add_argument('--complib', type=str, metavar='<compression library>', default=default_archive_compression['complib'], action='store',
+                        help='compression library, default: %s' % default_archive_compression['complib'])
+    parser.add_argument('--complevel', type=int, metavar='<compression level>', default=default_archive_compression['complevel'], action='store',
+                        help='compression level, default: %d' % default_archive_compression['complevel'])
+    parser.add_argument('--shuffle', type=str, metavar='<shuffle mode>', default=default_archive_compression['shuffle'], action='store',
+                        help='shuffle mode (byte, bit, none), default: %s' % default_archive_compression['shuffle'])
+    parser.add_argument('--nthreads', type=int, metavar='<number of threads>', default=1, action='store', help='number of Blosc threads, default: 1')
+    parser.add_argument('--min_age', type=float, metavar='<seconds>', default=600.0, action='store', help='minimum time since last modification of files in output folders without run catalog, default: 600')
+    parser.add_argument('--watch', type=float, metavar='<seconds>', default=0, action='store', help='check output folders periodically, default: 0 (run once)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)-7s %(message)s')
+    lower_priority()
+    set_blosc_nthreads(args.nthreads)
+    compression = dict(complib=args.complib, complevel=args.complevel, shuffle=args.shuffle)
+    while True:
+        bytes_saved = 0
+        for path in args.paths:
+            if os.path.isdir(path):
+                bytes_saved += archive_folder(path, compression=compression, min_age=args.min_age)
+            else:
+                result = recompress_raw_data_file(path, compression=compression)
+                bytes_saved += result['size_before'] - result['size_after']
+        if bytes_saved:
+            logger.info('Saved %0.1f MB in total', bytes_saved / 1024.0 ** 2)
+        if not args.watch:
+            break
+        sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
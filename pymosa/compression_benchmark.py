@@ -0,0 +1,140 @@
+#
+# ------------------------------------------------------------
+# Copyright (c) All rights reserved
+# SiLab, Institute of Physics, University of Bonn
+# ------------------------------------------------------------
+#
+
+'''
+    Benchmark of compression settings for recorded raw data
+'''
+
+import itertools
+import logging
+import os
+import tempfile
+from time import time
+
+import numpy as np
+import tables as tb
+
+from pymosa.m26_raw_data import get_filters, get_raw_data, read_meta_data, read_raw_data, set_blosc_nthreads
+from pymosa.raw_data_transform import get_transform
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def load_raw_data(filename, size=100):
+    '''Loads the first readouts of a raw data file.
+
+    Parameters
+    ----------
+    filename : str
+        Filename of the raw data file.
+    size : float
+        Maximum amount of raw data in MB.
+
+    Returns
+    -------
+    raw_data : list
+        List of raw data arrays, one array per readout.
+    '''
+    max_words = int(size * 1024 ** 2 / 4)
+    with tb.open_file(filename, mode='r') as in_file_h5:
+        meta_data = read_meta_data(in_file_h5)
+        n_readouts = np.searchsorted(meta_data['index_stop'], max_words, side='right')
+        if n_readouts == 0:
+            raise ValueError('No raw data in %s' % filename)
+        raw_data = read_raw_data(get_raw_data(in_file_h5), start=0, stop=meta_data['index_stop'][n_readouts - 1])
+    return [raw_data[index_start:index_stop] for index_start, index_stop in zip(meta_data['index_start'][:n_readouts], meta_data['index_stop'][:n_readouts])]
+
+
+def benchmark_compression(raw_data, compression, output_folder=None, transform=None):
+    '''Writes and reads raw data with the given compression settings.
+
+    The raw data is appended readout by readout, like it is done during data taking.
+
+    Parameters
+    ----------
+    raw_data : list
+        List of raw data arrays, one array per readout.
+    compression : dict
+        Compression settings, see get_filters().
+    output_folder : str
+        Folder for the temporary benchmark file.
+    transform : str
+        Raw data transform (e.g. 'm26_delta', see pymosa.raw_data_transform). If None, the raw data is not transformed.
+
+    Returns
+    -------
+    result : dict
+        Write and read throughput in MB/s (of uncompressed data) and compression ratio.
+    '''
+    n_bytes = sum(readout.nbytes for readout in raw_data)
+    fd, filename = tempfile.mkstemp(suffix='.h5', dir=output_folder)
+    os.close(fd)
+    try:
+        time_start = time()
+        with tb.open_file(filename, mode='w') as out_file_h5:
+            raw_data_earray = out_file_h5.create_earray(out_file_h5.root, name='raw_data', atom=tb.UIntAtom(), shape=(0,), title='raw_data', filters=get_filters(**compression))
+            if transform:
+                raw_data_transform = get_transform(transform)
+                for readout in raw_data:
+                    raw_data_earray.append(raw_data_transform.encode(readout, word_offset=raw_data_earray.nrows))
+            else:
+                for readout in raw_data:
+                    raw_data_earray.append(readout)
+            raw_data_earray.flush()
+            size_on_disk = raw_data_earray.size_on_disk
+        write_time = time() - time_start
+        time_start = time()
+        with tb.open_file(filename, mode='r') as in_file_h5:
+            if transform:
+                get_transform(transform).decode(in_file_h5.root.raw_data.read(), word_offset=0)
+            else:
+                in_file_h5.root.raw_data.read()
+        read_time = time() - time_start
+    finally:
+        os.remove(filename)
+    return dict(
+        write_throughput=n_bytes / write_time / 1024 ** 2,
+        read_throughput=n_bytes / read_time / 1024 ** 2,
+        compression_ratio=float(n_bytes) / size_on_disk if size_on_disk else 0.0
+    )
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark of compression settings for recorded pymosa raw data\n'
+                                                 'Example: pymosa_compression_benchmark run_1_M26_TELESCOPE.h5 --complib blosc blosc:lz4 blosc:zstd',
+                                     formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('filename', type=str, metavar='<raw data file>', help='filename of the recorded raw data file')
+    parser.add_argument('--complib', type=str, nargs='+', default=['none', 'blosc', 'blosc:lz4', 'blosc:zstd', 'zlib'], help='compression libraries, default: none blosc blosc:lz4 blosc:zstd zlib')
+    parser.add_argument('--complevel', type=int, nargs='+', default=[1, 5, 9], help='compression levels, default: 1 5 9')
+    parser.add_argument('--shuffle', type=str, nargs='+', default=['byte', 'bit'], help='shuffle modes, default: byte bit')
+    parser.add_argument('--transform', type=str, nargs='+', default=['none', 'm26_delta'], help='raw data transforms, default: none m26_delta')
+    parser.add_argument('--nthreads', type=int, metavar='<number of threads>', action='store', help='number of Blosc threads')
+    parser.add_argument('--size', type=float, metavar='<size>', default=100, action='store', help='amount of raw data used for the benchmark in MB, default: 100')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)-7s %(message)s')
+    set_blosc_nthreads(args.nthreads)
+    raw_data = load_raw_data(args.filename, size=args.size)
+    logger.info('Benchmarking compression of %0.1f MB raw data (%d readouts) from %s', sum(readout.nbytes for readout in raw_data) / 1024.0 ** 2, len(raw_data), args.filename)
+    logger.info('%-12s | %5s | %7s | %-9s | %12s | %12s | %5s', 'complib', 'level', 'shuffle', 'transform', 'write [MB/s]', 'read [MB/s]', 'ratio')
+    for transform, complib, complevel, shuffle in itertools.product(args.transform, args.complib, args.complevel, args.shuffle):
+        if complib.lower() == 'none':  # no compression, only once
+            if (complevel, shuffle) != (args.complevel[0], args.shuffle[0]):
+                continue
+            complevel, shuffle = 0, 'none'
+        elif shuffle.lower() == 'bit' and not complib.startswith('blosc'):  # bit shuffle is only available with Blosc
+            continue
+        result = benchmark_compression(raw_data, compression=dict(complib=complib, complevel=complevel, shuffle=shuffle),
+                                       output_folder=os.path.dirname(os.path.abspath(args.filename)),
+                                       transform=transform if transform.lower() != 'none' else None)
+        logger.info('%-12s | %5d | %7s | %-9s | %12.1f | %12.1f | %5.2f', complib, complevel, shuffle, transform, result['write_throughput'], result['read_throughput'], result['compression_ratio'])
+
+
+if __name__ == "__main__":
+    main()
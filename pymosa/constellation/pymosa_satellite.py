@@ -8,8 +8,7 @@ import yaml
 import pymosa
 from pymosa.m26 import m26
 import logging
-from pymosa.m26_raw_data import save_configuration_dict
-from time import sleep, strftime, time
+from time import sleep, time
 from tqdm import tqdm
 from typing import Any
 
@@ -36,7 +35,7 @@ class Pymosa(Satellite):
     def do_run(self, payload=None) -> str:
         self._pre_run()
         with self.telescope.access_file():
-            save_configuration_dict(self.telescope.raw_data_file.h5_file, 'configuration', self.telescope.telescope_conf)
+            self.telescope.raw_data_file.save_configuration('configuration', self.telescope.telescope_conf)
             with self.telescope.readout(enabled_m26_channels=self.telescope.enabled_m26_channels):
                 got_data = False
                 start = time()
@@ -80,24 +79,7 @@ class Pymosa(Satellite):
         logging.info('Press Ctrl-C to stop run')
 
         # check for filename that is not in use
-        while True:
-            if not self.telescope.output_filename and self.telescope.run_number:
-                filename = 'run_' + str(self.telescope.run_number) + '_' + self.telescope.run_id
-
-            else:
-                if self.telescope.output_filename:
-                    filename = self.telescope.output_filename
-                else:
-                    filename = strftime("%Y%m%d-%H%M%S") + '_' + self.telescope.run_id
-            if filename in [os.path.splitext(f)[0] for f in os.listdir(self.telescope.working_dir) if os.path.isfile(os.path.join(self.telescope.working_dir, f))]:
-                if not self.telescope.output_filename and self.telescope.run_number:
-                    self.telescope.run_number += 1  # increase run number and try again
-                    continue
-                else:
-                    raise IOError("Filename %s already exists." % filename)
-            else:
-                self.telescope.run_filename = os.path.join(self.telescope.working_dir, filename)
-                break
+        self.telescope.allocate_run_filename()
 
         # set up logger
         self.fh = logging.FileHandler(self.telescope.run_filename + '.log')
@@ -0,0 +1,153 @@
+#
+# ------------------------------------------------------------
+# Copyright (c) All rights reserved
+# SiLab, Institute of Physics, University of Bonn
+# ------------------------------------------------------------
+#
+
+'''
+    Convert binary raw data files (see M26BinaryRawDataFile) to the HDF5 raw data file format
+'''
+
+import json
+import logging
+import os
+
+import numpy as np
+
+from pymosa.m26_raw_data import open_raw_data_file, BINARY_META_DATA_DTYPE, BINARY_FORMAT_VERSION
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def read_binary_raw_data_file(filename):
+    '''Opens binary raw data files.
+
+    Parameters
+    ----------
+    filename : str
+        Filename of the binary raw data files with or without extension.
+
+    Returns
+    -------
+    header : dict
+        Title, scan parameter names and configuration.
+    raw_data : numpy.memmap
+        Memory-mapped raw data array.
+    meta_data : numpy.array
+        Meta data array.
+    scan_parameters : numpy.array
+        Scan parameter array, None if there are no scan parameters.
+    '''
+    if os.path.splitext(filename)[1].strip().lower() in ('.raw', '.meta', '.scan', '.json'):
+        filename = os.path.splitext(filename)[0]
+    with open(filename + '.json', 'r') as header_file:
+        header = json.load(header_file)
+    if header['format_version'] > BINARY_FORMAT_VERSION:
+        raise ValueError('Unsupported binary raw data format version %d' % header['format_version'])
+    if os.path.getsize(filename + '.raw'):
+        raw_data = np.memmap(filename + '.raw', dtype='<u4', mode='r')
+    else:
+        raw_data = np.zeros(shape=(0,), dtype='<u4')
+    meta_data = np.fromfile(filename + '.meta', dtype=BINARY_META_DATA_DTYPE)
+    if header['scan_parameters']:
+        scan_parameters = np.fromfile(filename + '.scan', dtype=[(key, '<i4') for key in header['scan_parameters']])
+        n_readouts = min(meta_data.shape[0], scan_parameters.shape[0])
+        scan_parameters = scan_parameters[:n_readouts]
+    else:
+        scan_parameters = None
+        n_readouts = meta_data.shape[0]
+    # incomplete readouts at the end, e.g. after a crash
+    meta_data = meta_data[:n_readouts]
+    n_readouts = int(np.searchsorted(meta_data['index_stop'], raw_data.shape[0], side='right'))
+    if n_readouts < meta_data.shape[0]:
+        logger.warning('Binary raw data file %s is incomplete, ignoring last %d readout(s)', filename, meta_data.shape[0] - n_readouts)
+        meta_data = meta_data[:n_readouts]
+        if scan_parameters is not None:
+            scan_parameters = scan_parameters[:n_readouts]
+    return header, raw_data, meta_data, scan_parameters
+
+
+def convert_raw_data_file(input_filename, output_filename=None, block_size=2**22, raw_data_compression=None, **kwargs):
+    '''Converts binary raw data files to the HDF5 raw data file format.
+
+    The readout statistics, the trigger index, the frame index and the summary are created during conversion.
+
+    Parameters
+    ----------
+    input_filename : str
+        Filename of the binary raw data files.
+    output_filename : str
+        Filename of the HDF5 raw data file. If None, the filename of the binary raw data files is used.
+    block_size : int
+        Maximum number of raw data words written at once.
+    raw_data_compression : dict
+        Compression settings of the raw data, see get_filters(). If nthreads is not given, all CPU cores are used for compression.
+    kwargs : dict
+        Additional keyword arguments passed to open_raw_data_file() (e.g. meta_data_compression, frame_index_interval, run_summary).
+
+    Returns
+    -------
+    output_filename : str
+        Filename of the HDF5 raw data file.
+    '''
+    header, raw_data, meta_data, scan_parameters = read_binary_raw_data_file(input_filename)
+    if output_filename is None:
+        output_filename = os.path.splitext(input_filename)[0] if os.path.splitext(input_filename)[1].strip().lower() in ('.raw', '.meta', '.scan', '.json') else input_filename
+    if os.path.splitext(output_filename)[1].strip().lower() != '.h5':
+        output_filename = output_filename + '.h5'
+    raw_data_compression = dict(raw_data_compression or {})
+    raw_data_compression.setdefault('nthreads', os.cpu_count())  # parallel compression
+    kwargs.setdefault('run_summary', True)
+    logger.info('Converting binary raw data file %s (%d readouts, %0.1f MB) to %s', input_filename, meta_data.shape[0], raw_data.shape[0] * 4 / 1024.0 ** 2, output_filename)
+    # readout ranges with constant scan parameter values
+    if scan_parameters is not None and scan_parameters.shape[0]:
+        changes = np.where(scan_parameters[1:] != scan_parameters[:-1])[0] + 1
+    else:
+        changes = np.zeros(shape=(0,), dtype=np.int64)
+    ranges = np.concatenate(([0], changes, [meta_data.shape[0]]))
+    with open_raw_data_file(filename=output_filename, mode='w', title=header['title'], scan_parameters=header['scan_parameters'],
+                            raw_data_compression=raw_data_compression, expected_words=max(1, raw_data.shape[0]), **kwargs) as raw_data_file:
+        for configuration_name, configuration in header['configuration'].items():
+            raw_data_file.save_configuration(configuration_name, configuration)
+        for range_start, range_stop in zip(ranges[:-1], ranges[1:]):
+            start = int(range_start)
+            while start < range_stop:
+                # readouts up to the block size, at least one readout
+                stop = start + int(np.searchsorted(meta_data['index_stop'][start:range_stop], meta_data['index_start'][start] + block_size, side='right'))
+                stop = max(stop, start + 1)
+                data_tuples = [(np.asarray(raw_data[readout['index_start']:readout['index_stop']]), readout['timestamp_start'], readout['timestamp_stop'], readout['error'])
+                               for readout in meta_data[start:stop]]
+                raw_data_file.append(data_tuples, scan_parameters=dict(zip(header['scan_parameters'], scan_parameters[start].tolist())) if scan_parameters is not None else None, flush=False)
+                start = stop
+    logger.info('Converted binary raw data file: %s', output_filename)
+    return output_filename
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Convert pymosa binary raw data files to the HDF5 raw data file format\nExample: pymosa_convert run_1_M26_TELESCOPE.raw',
+                                     formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('filenames', type=str, nargs='+', metavar='<binary raw data file>', help='binary raw data files')
+    parser.add_argument('--complib', type=str, metavar='<compression library>', default='blosc', action='store', help='compression library (e.g. blosc:zstd), default: blosc')
+    parser.add_argument('--complevel', type=int, metavar='<compression level>', default=5, action='store', help='compression level, default: 5')
+    parser.add_argument('--nthreads', type=int, metavar='<number of threads>', action='store', help='number of Blosc threads, default: number of CPU cores')
+    parser.add_argument('--remove', action='store_true', help='remove binary raw data files after conversion')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)-7s %(message)s')
+    raw_data_compression = dict(complib=args.complib, complevel=args.complevel)
+    if args.nthreads:
+        raw_data_compression['nthreads'] = args.nthreads
+    for filename in args.filenames:
+        convert_raw_data_file(filename, raw_data_compression=raw_data_compression)
+        if args.remove:
+            filename = os.path.splitext(filename)[0]
+            for extension in ('.raw', '.meta', '.scan', '.json'):
+                if os.path.isfile(filename + extension):
+                    os.remove(filename + extension)
+
+
+if __name__ == "__main__":
+    main()
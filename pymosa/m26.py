@@ -5,6 +5,8 @@
 # ------------------------------------------------------------
 #
 
+import hashlib
+import json
 import logging
 import os
 import signal
@@ -12,20 +14,28 @@ from contextlib import contextmanager
 from threading import Timer
 from time import sleep, strftime, time
 
+import numpy as np
 import yaml
 from basil.dut import Dut
-from basil.utils.BitLogic import BitLogic
 from tqdm import tqdm
 
 import pymosa
-from pymosa.m26_raw_data import open_raw_data_file, save_configuration_dict, send_meta_data
+from pymosa.m26_jtag import M26Jtag
+from pymosa.m26_raw_data import open_raw_data_file, estimate_expected_words, RawDataPublisher, RunSummary
 from pymosa.m26_readout import M26Readout
+from pymosa.run_catalog import RunCatalog
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 FORMAT = '%(asctime)s [%(name)-17s] - %(levelname)-7s %(message)s'
 
 
+def get_jtag_register_hash(value):
+    '''Returns the SHA-1 hash of the content of a JTAG register (BitLogic).
+    '''
+    return hashlib.sha1(('%d:' % len(value)).encode('utf-8') + value.tobytes()).hexdigest()
+
+
 class m26(object):
     ''' Mimosa26 telescope readout with MMC3 hardware.
 
@@ -33,22 +43,31 @@ class m26(object):
     - Remove not used Mimosa26 planes by commenting out the drivers in the DUT file (i.e. m26.yaml).
     - Set up trigger in DUT configuration file (i.e. m26_configuration.yaml).
     '''
+    jtag_state_filename = 'm26_jtag_state.json'  # JTAG configuration state in the output folder
+    jtag_verify_registers = ("BIAS_DAC_ALL", "RO_MODE1_ALL", "HEADER_REG_ALL", "CONTROL_SUZE_REG_ALL")  # short registers, which are read back to verify the cached JTAG configuration state
+    start_phases = ("allocate_run_filename", "compile_numba", "open_file", "start_readout", "wait_for_data")  # startup phases of each run, see start()
+
     def __init__(self, conf=None):
         if conf is None:
             conf = os.path.join(os.path.dirname(os.path.abspath(__file__)), "m26.yaml")
         logger.info("Loading DUT configuration from file %s" % conf)
 
         # initialize class
-        self.dut = Dut(conf=conf)
+        self.startup_timing = {}  # durations of the startup phases in seconds, see startup_phase()
+        with self.startup_phase('load_dut'):
+            self.dut = Dut(conf=conf)
+        self.m26_jtag = M26Jtag(self.dut['GPIO_JTAG'])  # batched JTAG register scans
 
     def init(self, init_conf=None, configure_m26=True):
         # initialize hardware
         logging.info("Initializing Telescope...")
-        self.dut.init(init_conf=init_conf)
+        with self.startup_phase('init_dut'):
+            self.dut.init(init_conf=init_conf)
         self.telescope_conf = init_conf
 
         # check firmware version
-        fw_version = self.dut['ETH'].read(0x0000, 1)[0]
+        with self.startup_phase('read_fw_version'):
+            fw_version = self.dut['ETH'].read(0x0000, 1)[0]
         logging.info("Pymosa MMC3 firmware version: %s" % (fw_version))
         if int(self.dut.version) != fw_version:
             raise Exception("Pymosa MMC3 firmware version does not match DUT configuration file (read: %s, require: %s)" % (fw_version, int(self.dut.version)))
@@ -65,30 +84,115 @@ class m26(object):
         if self.output_filename:
             self.output_filename = os.path.basename(self.output_filename)
         self.run_number = self.telescope_conf.get('run_number', None)
+        self.use_run_catalog = self.telescope_conf.get('run_catalog', True)  # default True: allocate filenames and record runs in run catalog of output folder
         self.m26_configuration_file = self.telescope_conf.get('m26_configuration_file', None)
         if not self.m26_configuration_file:
             self.m26_configuration_file = 'm26_config/m26_threshold_8.yaml'
         self.m26_jtag_configuration = self.telescope_conf.get('m26_jtag_configuration', True)  # default True
+        self.m26_jtag_cache = self.telescope_conf.get('m26_jtag_cache', True)  # default True: program only changed JTAG registers, if the cached configuration state is verified
         self.no_data_timeout = self.telescope_conf.get('no_data_timeout', 0)  # default None: no data timeout
         self.scan_timeout = self.telescope_conf.get('scan_timeout', 0)  # default 0: no scan timeout
         self.max_triggers = self.telescope_conf.get('max_triggers', 0)  # default 0: infinity triggers
         self.send_data = self.telescope_conf.get('send_data', None)  # default None: do not send data to online monitor
+        self.send_data_queue_size = self.telescope_conf.get('send_data_queue_size', 100)  # default 100: max. number of buffered messages for the online monitor
+        self.send_data_hwm = self.telescope_conf.get('send_data_hwm', 100)  # default 100: ZeroMQ send high-water mark in messages
+        self.send_data_prescale = self.telescope_conf.get('send_data_prescale', 1)  # default 1: send every readout to online monitor
+        self.send_data_max_rate = self.telescope_conf.get('send_data_max_rate', 0)  # default 0: no limit of the data rate sent to online monitor in MB/s
+        self.send_data_trigger_only = self.telescope_conf.get('send_data_trigger_only', False)  # default False: send also readouts without trigger words
+        self.send_data_compression = self.telescope_conf.get('send_data_compression', None)  # default None: send uncompressed data to online monitor
+        self.send_data_topics = self.telescope_conf.get('send_data_topics', None)  # default None: send all raw data words without topics
         self.enabled_m26_channels = self.telescope_conf.get('enabled_m26_channels', None)  # default None: all channels enabled
+        self.raw_data_format = self.telescope_conf.get('raw_data_format', 'hdf5')  # default 'hdf5': write HDF5 raw data file
+        self.async_writer = self.telescope_conf.get('async_writer', True)  # default True: write raw data file in separate thread
+        self.writer_queue_size = self.telescope_conf.get('writer_queue_size', 1000)  # default 1000: max. number of buffered writes
+        self.flush_interval = self.telescope_conf.get('flush_interval', 1.0)  # default 1.0: flush raw data file every second
+        self.flush_size = self.telescope_conf.get('flush_size', 0)  # default 0: no size based flushing
+        self.max_file_size = self.telescope_conf.get('max_file_size', 0)  # default 0: no size based file rotation
+        self.max_file_time = self.telescope_conf.get('max_file_time', 0)  # default 0: no time based file rotation
+        self.trigger_index = self.telescope_conf.get('trigger_index', True)  # default True: store word index of trigger words
+        self.frame_index_interval = self.telescope_conf.get('frame_index_interval', 1000)  # default 1000: store word index of every 1000th frame of each plane
+        self.run_summary = self.telescope_conf.get('run_summary', False)  # default False: no summary in raw data file, create it offline with create_run_summary()
+        self.raw_data_compression = self.telescope_conf.get('raw_data_compression', None)  # default None: Blosc (BloscLZ), level 5
+        self.meta_data_compression = self.telescope_conf.get('meta_data_compression', None)  # default None: zlib, level 5
+        self.raw_data_transform = self.telescope_conf.get('raw_data_transform', None)  # default None: store raw data words unchanged
+        self.demultiplex_raw_data = self.telescope_conf.get('demultiplex_raw_data', False)  # default False: store raw data words in a single array
+        self.expected_data_rate = self.telescope_conf.get('expected_data_rate', 10.0)  # default 10.0 MB/s: expected raw data rate, will be updated with the measured data rate after each run
+        self.trigger_rate = None  # measured trigger rate, will be updated after each run
 
         if not os.path.exists(self.working_dir):
             os.makedirs(self.working_dir)
         logger.info("Storing telescope data in %s" % self.working_dir)
 
+        # run catalog of output folder
+        self.close_run_catalog()
+        if self.use_run_catalog:
+            with self.startup_phase('open_run_catalog'):
+                self.run_catalog = RunCatalog(self.working_dir)
+
         # configure Mimosa26 sensors
         if configure_m26:
-            self.configure_m26()
+            with self.startup_phase('configure_m26'):
+                self.configure_m26()
 
         # FIFO readout
-        self.m26_readout = M26Readout(dut=self.dut)
+        with self.startup_phase('init_readout'):
+            self.m26_readout = M26Readout(dut=self.dut)
+
+        # online monitor publisher, socket is kept open for all runs
+        self.close_publisher()
+        if self.send_data:
+            with self.startup_phase('open_publisher'):
+                self.publisher = RawDataPublisher(socket_address=self.send_data,
+                                                  queue_size=self.send_data_queue_size,
+                                                  hwm=self.send_data_hwm,
+                                                  prescale=self.send_data_prescale,
+                                                  max_bytes_per_second=self.send_data_max_rate * 1024 ** 2,
+                                                  trigger_only=self.send_data_trigger_only,
+                                                  compression=self.send_data_compression,
+                                                  topics=self.send_data_topics)
 
     def close(self):
+        self.close_publisher()
+        self.close_run_catalog()
         self.dut.close()
 
+    def close_publisher(self):
+        if getattr(self, 'publisher', None) is not None:
+            self.publisher.close()
+        self.publisher = None
+
+    def close_run_catalog(self):
+        if getattr(self, 'run_catalog', None) is not None:
+            self.run_catalog.close()
+        self.run_catalog = None
+
+    def allocate_run_filename(self):
+        '''Sets the filename of the next run, the run number is increased if the filename is in use.
+        '''
+        if self.run_catalog is not None:
+            filename, self.run_number = self.run_catalog.allocate_run(self.run_id, run_number=self.run_number, filename=self.output_filename, configuration=self.telescope_conf)
+            self.run_filename = os.path.join(self.working_dir, filename)
+            return
+        # check for filename that is not in use
+        while True:
+            if not self.output_filename and self.run_number:
+                filename = 'run_' + str(self.run_number) + '_' + self.run_id
+
+            else:
+                if self.output_filename:
+                    filename = self.output_filename
+                else:
+                    filename = strftime("%Y%m%d-%H%M%S") + '_' + self.run_id
+            if filename in [os.path.splitext(f)[0] for f in os.listdir(self.working_dir) if os.path.isfile(os.path.join(self.working_dir, f))]:
+                if not self.output_filename and self.run_number:
+                    self.run_number += 1  # increase run number and try again
+                    continue
+                else:
+                    raise IOError("Filename %s already exists." % filename)
+            else:
+                self.run_filename = os.path.join(self.working_dir, filename)
+                break
+
     def configure_m26(self, m26_configuration_file=None, m26_jtag_configuration=None):
         '''Configure Mimosa26 sensors via JTAG.
         '''
@@ -104,17 +208,20 @@ class m26(object):
             for ir in irs:
                 logger.info('Programming M26 JTAG configuration reg %s', ir)
                 logger.debug(self.dut[ir][:])
-                self.dut['JTAG'].scan_ir([BitLogic(IR[ir])] * 6)
-                self.dut['JTAG'].scan_dr([self.dut[ir][:]])[0]
+                self.m26_jtag.scan_register(IR[ir], [self.dut[ir][:]])
 
-        def check_jtag(irs, IR):
-            # read first registers
+        def read_jtag(irs, IR):
             ret = {}
             for ir in irs:
                 logger.info('Reading M26 JTAG configuration reg %s', ir)
-                self.dut['JTAG'].scan_ir([BitLogic(IR[ir])] * 6)
-                ret[ir] = self.dut['JTAG'].scan_dr([self.dut[ir][:]])[0]
+                ret[ir] = self.m26_jtag.scan_register(IR[ir], [self.dut[ir][:]], readback=True)[0]
+            return ret
+
+        def check_jtag(irs, IR):
+            # read first registers
+            ret = read_jtag(irs, IR)
             # check registers
+            ok = True
             for k, v in ret.items():
                 if k == "CTRL_8b10b_REG1_ALL":
                     pass
@@ -123,14 +230,17 @@ class m26(object):
                 elif self.dut[k][:] != v:
                     logger.error(
                         "JTAG data does not match %s get=%s set=%s" % (k, v, self.dut[k][:]))
+                    ok = False
                 else:
                     logger.info("Checking M26 JTAG %s ok" % k)
+            return ok
 
         # set the clock distributer inputs in correct states.
         self.set_clock_distributer()
 
         # set M26 configuration file
-        self.dut.set_configuration(m26_configuration_file)
+        with self.startup_phase('load_m26_configuration'):
+            self.dut.set_configuration(m26_configuration_file)
 
         if m26_jtag_configuration is not None:
             self.m26_jtag_configuration = m26_jtag_configuration
@@ -151,11 +261,36 @@ class m26(object):
                    "HEADER_REG_ALL", "CONTROL_SUZE_REG_ALL", "SEQUENCER_SUZE_REG_ALL", "CTRL_8b10b_REG0_ALL",
                    "CTRL_8b10b_REG1_ALL"]
 
+            # hashes of the register contents, registers which are not changed since the last configuration are not programmed
+            register_hashes = {ir: get_jtag_register_hash(self.dut[ir][:]) for ir in irs}
+            write_irs = irs
+            if self.m26_jtag_cache:
+                session = self.get_jtag_session(read_jtag(["DEV_ID_ALL"], IR)["DEV_ID_ALL"])
+                jtag_state = self.load_jtag_state()
+                if jtag_state is None or jtag_state.get('session') != session:
+                    logger.info('No cached M26 JTAG configuration state for this hardware')
+                elif any(get_jtag_register_hash(value) != jtag_state['registers'].get(ir) for ir, value in read_jtag(self.jtag_verify_registers, IR).items()):
+                    logger.warning('Cached M26 JTAG configuration state does not match the hardware (e.g. after power cycle)')
+                else:
+                    irs = [ir for ir in irs if register_hashes[ir] != jtag_state['registers'].get(ir)]
+                    # the readback of the verified registers has already shifted in their new values
+                    write_irs = [ir for ir in irs if ir not in self.jtag_verify_registers]
+                    logger.info('Cached M26 JTAG configuration state verified, %d changed register(s)', len(irs))
+                self.remove_jtag_state()  # invalid while programming
+
             # write JTAG configuration
-            write_jtag(irs, IR)
+            with self.startup_phase('write_m26_jtag'):
+                write_jtag(write_irs, IR)
 
             # check if registers are properly programmed by reading them and comparing to settings.
-            check_jtag(irs, IR)
+            with self.startup_phase('check_m26_jtag'):
+                jtag_ok = check_jtag(irs, IR)
+
+            if self.m26_jtag_cache:
+                if jtag_ok:
+                    self.save_jtag_state(dict(session=session, registers=register_hashes))
+                else:
+                    logger.warning('M26 JTAG configuration failed, cached M26 JTAG configuration state not stored')
 
             # START procedure
             logger.info('Starting M26')
@@ -164,27 +299,50 @@ class m26(object):
             for reg in self.dut["RO_MODE0_ALL"]["RO_MODE0"]:
                 reg['En_ExtStart'] = 0
                 reg['JTAG_Start'] = 0
-            self.dut['JTAG'].scan_ir([BitLogic(IR['RO_MODE0_ALL'])] * 6)
-            self.dut['JTAG'].scan_dr([self.dut['RO_MODE0_ALL'][:]])
+            self.m26_jtag.scan_register(IR['RO_MODE0_ALL'], [self.dut['RO_MODE0_ALL'][:]])
             # JTAG start
             for reg in self.dut["RO_MODE0_ALL"]["RO_MODE0"]:
                 reg['JTAG_Start'] = 1
-            self.dut['JTAG'].scan_ir([BitLogic(IR['RO_MODE0_ALL'])] * 6)
-            self.dut['JTAG'].scan_dr([self.dut['RO_MODE0_ALL'][:]])
+            self.m26_jtag.scan_register(IR['RO_MODE0_ALL'], [self.dut['RO_MODE0_ALL'][:]])
             for reg in self.dut["RO_MODE0_ALL"]["RO_MODE0"]:
                 reg['JTAG_Start'] = 0
-            self.dut['JTAG'].scan_ir([BitLogic(IR['RO_MODE0_ALL'])] * 6)
-            self.dut['JTAG'].scan_dr([self.dut['RO_MODE0_ALL'][:]])
+            self.m26_jtag.scan_register(IR['RO_MODE0_ALL'], [self.dut['RO_MODE0_ALL'][:]])
             # write original configuration
             self.dut['RO_MODE0_ALL'][:] = temp
-            self.dut['JTAG'].scan_ir([BitLogic(IR['RO_MODE0_ALL'])] * 6)
-            self.dut['JTAG'].scan_dr([self.dut['RO_MODE0_ALL'][:]])
+            self.m26_jtag.scan_register(IR['RO_MODE0_ALL'], [self.dut['RO_MODE0_ALL'][:]])
             # readback?
-            self.dut['JTAG'].scan_ir([BitLogic(IR['RO_MODE0_ALL'])] * 6)
-            self.dut['JTAG'].scan_dr([self.dut['RO_MODE0_ALL'][:]] * 6)
+            self.m26_jtag.scan_register(IR['RO_MODE0_ALL'], [self.dut['RO_MODE0_ALL'][:]] * 6)
         else:
             logger.info("Skipping M26 JTAG configuration")
 
+    def get_jtag_session(self, dev_id):
+        '''Returns the identifier of the hardware (firmware version, interface and device IDs of the Mimosa26 sensors).
+        '''
+        return hashlib.sha1(json.dumps([self.telescope_conf.get('fw_version'), getattr(self.dut['ETH'], '_init', {}).get('ip'), dev_id.tobytes().hex()]).encode('utf-8')).hexdigest()
+
+    def load_jtag_state(self):
+        '''Returns the cached JTAG configuration state (hardware session and register hashes), None if not available.
+        '''
+        filename = os.path.join(self.working_dir, self.jtag_state_filename)
+        try:
+            with open(filename, 'r') as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return None
+
+    def save_jtag_state(self, jtag_state):
+        filename = os.path.join(self.working_dir, self.jtag_state_filename)
+        with open(filename + '.tmp', 'w') as f:
+            json.dump(jtag_state, f, indent=2, sort_keys=True)
+        os.replace(filename + '.tmp', filename)
+
+    def remove_jtag_state(self):
+        if getattr(self, 'working_dir', None) is None:  # not initialized
+            return
+        filename = os.path.join(self.working_dir, self.jtag_state_filename)
+        if os.path.exists(filename):
+            os.remove(filename)
+
     def set_clock_distributer(self, clk=0, start=1, reset=0, speak=1):
         # Default values -same as in GUI- (self, clk=0, start=1, reset=0, speak=1)
         self.dut["START_RESET"]["CLK"] = clk
@@ -194,12 +352,53 @@ class m26(object):
         self.dut["START_RESET"].write()
 
     def reset(self, reset_time=2):
+        self.remove_jtag_state()  # reset of the Mimosa26 sensors
         self.dut["START_RESET"]["RESET"] = 1
         self.dut["START_RESET"].write()
         sleep(reset_time)
         self.dut["START_RESET"]["RESET"] = 0
         self.dut["START_RESET"].write()
 
+    @contextmanager
+    def startup_phase(self, name):
+        '''Measures the duration of a startup phase (e.g. loading the DUT configuration, JTAG programming).
+
+        The durations are printed when the telescope is taking data and are stored in the configuration group of the raw data file, see save_startup_timing().
+        '''
+        time_start = time()
+        try:
+            yield
+        finally:
+            self.startup_timing[name] = time() - time_start
+            logger.debug('Startup phase %s: %0.3f s', name, self.startup_timing[name])
+
+    def get_startup_timing(self):
+        '''Returns the durations of the startup phases in seconds (configure_m26 includes the phases load_m26_configuration, write_m26_jtag and check_m26_jtag).
+        '''
+        return {name: round(duration, 6) for name, duration in self.startup_timing.items()}
+
+    def save_startup_timing(self):
+        '''Stores the durations of the startup phases in the configuration group of the raw data file (startup_timing).
+
+        The timing is stored before the scan and updated when the first data is received, before the raw data file is rotated
+        (the configuration group is copied to the next files of the run).
+        '''
+        self.raw_data_file.save_configuration('startup_timing', self.get_startup_timing())
+
+    def print_startup_timing(self):
+        logger.info('Startup timing:')
+        for name, duration in self.get_startup_timing().items():
+            logger.info('  %-22s %8.3f s', name, duration)
+
+    def compile_numba(self):
+        '''Compiles the numba functions used while writing the raw data file (run summary, raw data transform) before the file is opened.
+        '''
+        if self.run_summary:
+            RunSummary(occupancy=True)
+        if self.raw_data_transform:
+            from pymosa.raw_data_transform import get_transform  # numba
+            get_transform(self.raw_data_transform).encode(np.zeros(shape=(0,), dtype=np.uint32), word_offset=0)
+
     def scan(self):
         '''Scan Mimosa26 telescope loop.
         '''
@@ -211,6 +410,9 @@ class m26(object):
                 if not got_data:
                     if self.m26_readout.data_words_per_second()[0] > 0:
                         got_data = True
+                        self.startup_timing['wait_for_data'] = time() - start
+                        self.print_startup_timing()
+                        self.save_startup_timing()
                         logging.info('Taking data...')
                         if self.max_triggers:
                             self.pbar = tqdm(total=self.max_triggers, ncols=80)
@@ -230,7 +432,10 @@ class m26(object):
                         self.pbar.close()
                         logging.info('Trigger limit was reached: %i' % self.max_triggers)
 
-        logging.info('Total amount of triggers collected: %d', self.dut['TLU']['TRIGGER_COUNTER'])
+        triggers = self.dut['TLU']['TRIGGER_COUNTER']
+        logging.info('Total amount of triggers collected: %d', triggers)
+        if triggers and time() > start:
+            self.trigger_rate = triggers / (time() - start)
 
     def analyze(self):
         pass
@@ -242,25 +447,10 @@ class m26(object):
         signal.signal(signal.SIGINT, self._signal_handler)
         logging.info('Press Ctrl-C to stop run')
 
-        # check for filename that is not in use
-        while True:
-            if not self.output_filename and self.run_number:
-                filename = 'run_' + str(self.run_number) + '_' + self.run_id
-
-            else:
-                if self.output_filename:
-                    filename = self.output_filename
-                else:
-                    filename = strftime("%Y%m%d-%H%M%S") + '_' + self.run_id
-            if filename in [os.path.splitext(f)[0] for f in os.listdir(self.working_dir) if os.path.isfile(os.path.join(self.working_dir, f))]:
-                if not self.output_filename and self.run_number:
-                    self.run_number += 1  # increase run number and try again
-                    continue
-                else:
-                    raise IOError("Filename %s already exists." % filename)
-            else:
-                self.run_filename = os.path.join(self.working_dir, filename)
-                break
+        for phase in self.start_phases:  # the phases of __init__() and init() are kept for all runs
+            self.startup_timing.pop(phase, None)
+        with self.startup_phase('allocate_run_filename'):
+            self.allocate_run_filename()
 
         # set up logger
         self.fh = logging.FileHandler(self.run_filename + '.log')
@@ -269,9 +459,14 @@ class m26(object):
         self.logger = logging.getLogger()
         self.logger.addHandler(self.fh)
 
+        with self.startup_phase('compile_numba'):
+            self.compile_numba()
         with self.access_file():
-            save_configuration_dict(self.raw_data_file.h5_file, 'configuration', self.telescope_conf)
+            self.raw_data_file.save_configuration('configuration', self.telescope_conf)
+            self.save_startup_timing()
             self.scan()
+            if 'wait_for_data' not in self.startup_timing:  # not printed while scanning
+                self.print_startup_timing()
 
         self.logger.removeHandler(self.fh)
 
@@ -281,7 +476,8 @@ class m26(object):
     @contextmanager
     def readout(self, *args, **kwargs):
         try:
-            self.start_readout(*args, **kwargs)
+            with self.startup_phase('start_readout'):
+                self.start_readout(*args, **kwargs)
             yield
         finally:
             try:
@@ -327,7 +523,8 @@ class m26(object):
     @contextmanager
     def access_file(self):
         try:
-            self.open_file()
+            with self.startup_phase('open_file'):
+                self.open_file()
             yield
         finally:
             try:
@@ -336,22 +533,57 @@ class m26(object):
                 # in case something fails, call this on last resort
                 self.raw_data_file = None
 
+    def get_expected_words(self):
+        '''Returns the expected number of raw data words of the run from scan timeout, maximum number of triggers and the measured data and trigger rate.
+        '''
+        return estimate_expected_words(data_rate=self.expected_data_rate * 1024 ** 2 / 4,
+                                       scan_timeout=self.scan_timeout,
+                                       max_triggers=self.max_triggers,
+                                       trigger_rate=self.trigger_rate)
+
     def open_file(self):
         self.raw_data_file = open_raw_data_file(filename=self.run_filename,
                                                 mode='w',
                                                 title=os.path.basename(self.run_filename),
-                                                socket_address=self.send_data)
-        if self.raw_data_file.socket:
+                                                publisher=self.publisher,
+                                                backend=self.raw_data_format,
+                                                asynchronous=self.async_writer,
+                                                queue_size=self.writer_queue_size,
+                                                flush_interval=self.flush_interval,
+                                                flush_size=self.flush_size,
+                                                raw_data_compression=self.raw_data_compression,
+                                                meta_data_compression=self.meta_data_compression,
+                                                raw_data_transform=self.raw_data_transform,
+                                                demultiplex=self.demultiplex_raw_data,
+                                                expected_words=self.get_expected_words(),
+                                                max_file_size=self.max_file_size,
+                                                max_file_time=self.max_file_time,
+                                                trigger_index=self.trigger_index,
+                                                frame_index_interval=self.frame_index_interval,
+                                                run_summary=self.run_summary)
+        if self.publisher:
             # send reset to indicate a new scan for the online monitor
-            send_meta_data(self.raw_data_file.socket, None, name='Reset')
+            self.publisher.send_meta_data(None, name='Reset')
 
     def close_file(self):
         # close file object
         self.raw_data_file.close()
+        # update expected data rate with measured data rate
+        statistics = self.raw_data_file.get_statistics()
+        if statistics['n_words']:
+            self.expected_data_rate = statistics['data_rate']
+        if self.run_catalog is not None:
+            self.run_catalog.close_run(os.path.basename(self.run_filename),
+                                       filenames=self.raw_data_file.output_filenames,
+                                       n_triggers=self.dut['TLU']['TRIGGER_COUNTER'],
+                                       n_readouts=statistics['n_readouts'],
+                                       n_bytes=statistics['n_bytes'])
+        if self.publisher:
+            self.publisher.print_statistics()
         # delete file object
         self.raw_data_file = None
 
-    def handle_data(self, data, new_file=False, flush=True):
+    def handle_data(self, data, new_file=False, flush=None):
         '''Handling of raw data and meta data during readout.
         '''
         for data_tuple in data:
@@ -0,0 +1,171 @@
+#
+# ------------------------------------------------------------
+# Copyright (c) All rights reserved
+# SiLab, Institute of Physics, University of Bonn
+# ------------------------------------------------------------
+#
+
+'''
+    Batched JTAG programming of the Mimosa26 sensors via the GPIO based JTAG interface
+'''
+
+import logging
+from array import array
+
+import numpy as np
+from basil.utils.BitLogic import BitLogic
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# bits of the JTAG GPIO, see basil.HL.JtagGpio
+RESETB = 0x01
+TCK = 0x02
+TMS = 0x04
+TDI = 0x08
+TDO = 0x10
+
+
+def get_bits(data):
+    '''Returns the bits of a list of BitLogic objects in shift order (bit 0 of the first item first).
+    '''
+    if not data:
+        return np.zeros(shape=(0,), dtype=np.bool_)
+    return np.concatenate([np.frombuffer(item.unpack(), dtype=np.uint8) for item in data]).astype(np.bool_)
+
+
+def get_scan_sequence(tms_prefix, bits):
+    '''Returns the JTAG GPIO values of a scan starting and ending in Run-Test/Idle state.
+
+    The TAP state sequence is the same as of basil.HL.JtagGpio, every TCK cycle takes two GPIO values
+    (TCK low with new TMS and TDI values, TCK high), the last value sets TCK low.
+
+    Parameters
+    ----------
+    tms_prefix : list
+        TMS values before entering the Capture state (e.g. [1, 1] to select the instruction register).
+    bits : numpy.array
+        Bits shifted in.
+
+    Returns
+    -------
+    values : numpy.array
+        GPIO values.
+    read_indices : numpy.array
+        Number of GPIO values, after which TDO has to be read (one for each shifted bit).
+    '''
+    n_prefix = len(tms_prefix)
+    tms = np.zeros(shape=(n_prefix + 2 + bits.shape[0] + 2,), dtype=np.uint8)
+    tdi = np.zeros_like(tms)
+    tms[:n_prefix] = tms_prefix
+    # Capture and Shift state (TMS 0), shift bits, last bit with TMS 1 (Exit1 state)
+    tdi[n_prefix + 2:n_prefix + 2 + bits.shape[0]] = bits
+    tms[n_prefix + 2 + bits.shape[0] - 1] = 1
+    tms[-2] = 1  # Update state, Run-Test/Idle state (TMS 0)
+    values = np.empty(shape=(2 * tms.shape[0] + 1,), dtype=np.uint8)
+    values[0:-1:2] = RESETB | (tms * TMS) | (tdi * TDI)
+    values[1::2] = values[0:-1:2] | TCK
+    values[-1] = RESETB
+    # TDO of the first bit is available after entering the Shift state, the next bits after each falling edge of TCK
+    read_indices = 2 * (n_prefix + 1 + np.arange(bits.shape[0])) + 3
+    return values, read_indices
+
+
+class M26Jtag(object):
+    '''Batched JTAG access of the chained Mimosa26 sensors (replacing basil.HL.JtagGpio for register scans).
+
+    basil.HL.JtagGpio writes the GPIO four times and reads TDO for every bit, each access is a separate transfer.
+    Here, the GPIO values of a whole register update (instruction and data register scan) are precomputed and,
+    if the SiTCP TCP-to-bus connection is used, sent as a single bulk transfer of bus writes.
+    Without readback, the sensors are programmed in milliseconds. The readback requires one read of TDO per bit
+    (the firmware does not buffer TDO), the GPIO values between the reads are sent in one transfer.
+
+    Parameters
+    ----------
+    gpio : basil.HL.gpio
+        GPIO module of the JTAG interface (GPIO_JTAG).
+    n_devices : int
+        Number of chained Mimosa26 sensors.
+    '''
+
+    def __init__(self, gpio, n_devices=6):
+        self.gpio = gpio
+        self.n_devices = n_devices
+
+    @property
+    def intf(self):
+        return self.gpio._intf
+
+    @property
+    def output_addr(self):
+        return self.gpio._base_addr + self.gpio._registers['OUTPUT']['descr']['addr']
+
+    @property
+    def input_addr(self):
+        return self.gpio._base_addr + self.gpio._registers['INPUT']['descr']['addr']
+
+    def _is_tcp_to_bus(self):
+        intf = self.intf
+        return getattr(intf, '_sock_tcp', None) is not None and getattr(intf, '_init', {}).get('tcp_to_bus', False) and hasattr(intf, '_send_tcp_data')
+
+    def _write(self, values):
+        if values.shape[0] == 0:
+            return
+        if self._is_tcp_to_bus():  # single bulk transfer of TCP-to-bus write requests (size, address, data)
+            requests = np.empty(shape=values.shape, dtype=[('size', '<u2'), ('addr', '<u4'), ('data', 'u1')])
+            requests['size'] = 1
+            requests['addr'] = self.output_addr
+            requests['data'] = values
+            with self.intf._udp_lock:
+                self.intf._send_tcp_data(array('B', requests.tobytes()))
+        else:
+            for value in values.tolist():
+                self.intf.write(self.output_addr, [value])
+
+    def _read_tdo(self):
+        return (self.intf.read(self.input_addr, 1)[0] & TDO) != 0
+
+    def _scan(self, values, read_indices=None):
+        if read_indices is None:
+            self._write(values)
+            return None
+        tdo = np.zeros(shape=(read_indices.shape[0],), dtype=np.bool_)
+        start = 0
+        for index, stop in enumerate(read_indices.tolist()):
+            self._write(values[start:stop])
+            tdo[index] = self._read_tdo()
+            start = stop
+        self._write(values[start:])
+        return tdo
+
+    def scan_register(self, ir, data, readback=False):
+        '''Scans the instruction register of all sensors and the data register.
+
+        Parameters
+        ----------
+        ir : str
+            Instruction of a sensor (e.g. '01111' for BIAS_DAC_ALL), the instruction is sent to all chained sensors.
+        data : list
+            List of BitLogic objects shifted into the data registers (e.g. [dut['BIAS_DAC_ALL'][:]]).
+        readback : bool
+            If True, the previous content of the data registers is read back.
+
+        Returns
+        -------
+        ret : list
+            List of BitLogic objects with the data shifted out (same sizes as data), None if readback is False.
+        '''
+        ir_values, _ = get_scan_sequence([1, 1], get_bits([BitLogic(ir)] * self.n_devices))
+        dr_values, dr_read_indices = get_scan_sequence([1], get_bits(data))
+        if not readback:
+            self._scan(np.concatenate((ir_values, dr_values)))
+            return None
+        self._write(ir_values)
+        tdo = self._scan(dr_values, dr_read_indices)
+        ret = []
+        offset = 0
+        for item in data:
+            bits = tdo[offset:offset + len(item)]
+            ret.append(BitLogic(''.join('1' if bit else '0' for bit in bits[::-1].tolist())))
+            offset += len(item)
+        return ret
@@ -1,6 +1,12 @@
 import logging
 import glob
-from threading import RLock
+import json
+import re
+import sys
+from functools import reduce
+from threading import Lock, RLock, Thread, Condition, Event
+from queue import Queue, Empty, Full
+from time import time
 import os.path
 from os import remove
 
@@ -9,43 +15,429 @@ import tables as tb
 import zmq
 
 
-def send_meta_data(socket, conf, name):
+def send_meta_data(socket, conf, name, topic=None):
     '''Sends the config via ZeroMQ to a specified socket. Is called at the beginning of a run and when the config changes. Conf can be any config dictionary.
     '''
-    meta_data = dict(
+    meta_data = dict(topic=topic) if topic is not None else {}  # topic has to be the first key
+    meta_data.update(
         name=name,
         conf=conf
     )
     try:
-        socket.send_json(meta_data, flags=zmq.NOBLOCK)
+        socket.send(json.dumps(meta_data).encode('utf-8'), flags=zmq.NOBLOCK)
     except zmq.Again:
-        pass
+        return False
+    return True
 
 
-def send_data(socket, data, scan_parameters={}, name='ReadoutData'):
+def compress_data(data, compression):
+    '''Compresses a raw data array for sending via ZeroMQ.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Raw data array.
+    compression : str
+        Compression: 'blosc2' (LZ4 with byte shuffle, requires blosc2) or 'lz4' (LZ4 frame, requires lz4).
+
+    Returns
+    -------
+    buffer : bytes
+        Compressed data.
+    '''
+    data = np.ascontiguousarray(data)
+    if compression == 'blosc2':
+        import blosc2
+        return blosc2.compress(data, typesize=data.dtype.itemsize, clevel=1, filter=blosc2.Filter.SHUFFLE, codec=blosc2.Codec.LZ4)
+    elif compression == 'lz4':
+        import lz4.frame
+        return lz4.frame.compress(data, compression_level=0, store_size=True)
+    raise ValueError('Unknown compression: %s' % compression)
+
+
+def decompress_data(buffer, compression, dtype, shape):
+    '''Decompresses data compressed by compress_data().
+
+    If compression is None, the data is not compressed.
+    '''
+    if compression == 'blosc2':
+        import blosc2
+        buffer = blosc2.decompress(buffer)
+    elif compression == 'lz4':
+        import lz4.frame
+        buffer = lz4.frame.decompress(buffer)
+    elif compression:
+        raise ValueError('Unknown compression: %s' % compression)
+    return np.frombuffer(buffer, dtype=dtype).reshape(shape)
+
+
+def get_topic_subscription(topic):
+    '''Returns the ZeroMQ subscription (prefix of the meta data message) of a topic sent by send_data().
+
+    Usage
+    -----
+    socket.setsockopt(zmq.SUBSCRIBE, get_topic_subscription('planes_1_2'))
+    '''
+    return ('{"topic": %s' % json.dumps(topic)).encode('utf-8')
+
+
+def send_data(socket, data, scan_parameters={}, name='ReadoutData', prescale=1, compression=None, topic=None):
     '''Sends the data of every read out (raw data and meta data) via ZeroMQ to a specified socket
+
+    The prescale factor is the number of read outs represented by the sent read out (e.g. to rescale rates).
+    If compression is given, the raw data is compressed (see compress_data()) and the compression is added to the meta data.
+    If topic is given, the meta data starts with the topic, which can be selected by the subscribers (see get_topic_subscription()).
     '''
     if not scan_parameters:
         scan_parameters = {}
-    data_meta_data = dict(
+    data_meta_data = dict(topic=topic) if topic is not None else {}  # topic has to be the first key
+    data_meta_data.update(
         name=name,
         dtype=str(data[0].dtype),
         shape=data[0].shape,
         timestamp_start=data[1],  # float
         timestamp_stop=data[2],  # float
         readout_error=data[3],  # int
-        scan_parameters=scan_parameters  # dict
+        scan_parameters=scan_parameters,  # dict
+        prescale=prescale  # int
     )
+    if compression:
+        data_meta_data['compression'] = compression  # str
+        payload = compress_data(data[0], compression)
+    else:
+        payload = data[0]  # PyZMQ supports sending numpy arrays without copying any data
     try:
-        socket.send_json(data_meta_data, flags=zmq.SNDMORE | zmq.NOBLOCK)
-        socket.send(data[0], flags=zmq.NOBLOCK)  # PyZMQ supports sending numpy arrays without copying any data
+        socket.send(json.dumps(data_meta_data).encode('utf-8'), flags=zmq.SNDMORE | zmq.NOBLOCK)
+        socket.send(payload, flags=zmq.NOBLOCK)
     except zmq.Again:
-        pass
+        return False
+    return True
+
+
+class RawDataPublisher(object):
+    '''Publishing raw data and meta data via ZeroMQ from a separate thread.
+
+    Messages are put into a bounded queue and sent by the publisher thread, slow online monitor
+    clients never block the caller (e.g. the raw data file writer). Messages are dropped if the queue is full
+    or if the ZeroMQ send buffer (high-water mark) is full. The socket is bound once and can be used for several raw data files.
+
+    To reduce the load of the online monitor, only a subset of the read outs can be sent (prescale, max_bytes_per_second, trigger_only).
+    Every sent read out carries the number of read outs it represents (prescale factor), so that rates can be rescaled.
+
+    If topics are given, every read out is sent once per topic containing only the raw data words of the selected
+    Mimosa26 planes and/or the trigger words (in the original order). Subscribers select topics by the ZeroMQ subscription
+    (see get_topic_subscription()), the messages are filtered by ZeroMQ before they are sent. Topics without subscribers are skipped.
+    The subscriptions are received by the publisher thread only. A legacy subscriber subscribing to all messages (b'') receives
+    every read out once per subscribed topic, i.e. it receives duplicate messages.
+
+    Parameters
+    ----------
+    socket_address : str
+        Address the publisher socket is bound to, e.g. 'tcp://127.0.0.1:8500'.
+    queue_size : int
+        Maximum number of messages in the queue of the publisher thread.
+    hwm : int
+        ZeroMQ send high-water mark (SNDHWM) of the publisher socket in messages.
+    prescale : int
+        Send only every Nth read out. If 1, every read out is sent.
+    max_bytes_per_second : float
+        Maximum amount of raw data sent per second in bytes. If 0, the amount of data is not limited.
+    trigger_only : bool
+        If True, send only read outs which contain trigger words.
+    compression : str
+        Compression of the raw data ('blosc2' or 'lz4'), see compress_data(). The data is compressed in the publisher thread.
+        If None, the data is not compressed.
+    topics : dict
+        Topic names and the raw data streams of the topics, a list of plane numbers and stream names ('trigger', 'other'),
+        e.g. {'planes_1_2': [1, 2, 'trigger'], 'trigger': ['trigger'], 'all': None}. A topic without streams (None) contains all raw data words.
+        If None, the read outs are sent without topic.
+    '''
+
+    def __init__(self, socket_address, queue_size=100, hwm=100, prescale=1, max_bytes_per_second=0, trigger_only=False, compression=None, topics=None):
+        self.socket_address = socket_address
+        self.compression = compression
+        if topics:
+            self.topics = {topic: (np.array([get_raw_data_stream_id(stream) for stream in streams], dtype=np.uint8) if streams is not None else None) for topic, streams in topics.items()}
+        else:
+            self.topics = None
+        self._subscriptions = set()  # subscriptions of the subscribers, if topics are used, updated by the publisher thread
+        self._subscriptions_lock = Lock()
+        if compression:
+            compress_data(np.zeros(1, dtype=np.uint32), compression)  # check availability of compression library
+        self.prescale = max(1, int(prescale))
+        self.max_bytes_per_second = max_bytes_per_second
+        self.trigger_only = trigger_only
+        self._n_readouts_since_sent = 0
+        self._rate_limit_time = 0.0
+        self._rate_limit_bytes = 0
+        context = zmq.Context.instance()
+        logging.info('Creating socket connection to server %s', socket_address)
+        self.socket = context.socket(zmq.XPUB if self.topics else zmq.PUB)  # publisher socket, XPUB receives the subscriptions
+        self.socket.setsockopt(zmq.SNDHWM, hwm)
+        self.socket.setsockopt(zmq.LINGER, 0)  # do not block on close
+        self.socket.bind(socket_address)
+        # publisher statistics
+        self._n_sent = 0
+        self._n_sent_bytes = 0
+        self._n_dropped_queue = 0
+        self._n_dropped_queue_bytes = 0
+        self._n_dropped_hwm = 0
+        self._n_dropped_hwm_bytes = 0
+        self._n_skipped = 0
+        self._n_skipped_bytes = 0
+        self._queue = Queue(maxsize=queue_size)
+        self._publisher_thread = Thread(target=self._publisher, name='RawDataPublisherThread')
+        self._publisher_thread.daemon = True
+        self._publisher_thread.start()
+
+    def send_data(self, data, scan_parameters=None, name='ReadoutData'):
+        '''Sends the data of a read out (raw data and meta data), the data is dropped if the queue is full.
+        '''
+        self._n_readouts_since_sent += 1
+        if not self._select_data(data):
+            self._n_skipped += 1
+            self._n_skipped_bytes += data[0].nbytes
+            return
+        try:
+            self._queue.put_nowait((send_data if self.topics is None else self._send_topics,
+                                    (data, dict(scan_parameters) if scan_parameters else {}, name, self._n_readouts_since_sent, self.compression),
+                                    data[0].nbytes))
+        except Full:
+            self._n_dropped_queue += 1
+            self._n_dropped_queue_bytes += data[0].nbytes
+        else:
+            self._n_readouts_since_sent = 0
+
+    def _select_data(self, data):
+        '''Returns True if the read out is sent according to the prescale, rate limit and trigger settings.
+        '''
+        if self.trigger_only and not np.any(np.bitwise_and(data[0], 0x80000000)):
+            return False
+        if self._n_readouts_since_sent < self.prescale:
+            return False
+        if self.max_bytes_per_second:
+            now = time()
+            if now - self._rate_limit_time >= 1.0:  # new time window
+                self._rate_limit_time = now
+                self._rate_limit_bytes = 0
+            if self._rate_limit_bytes and self._rate_limit_bytes + data[0].nbytes > self.max_bytes_per_second:
+                return False
+            self._rate_limit_bytes += data[0].nbytes
+        return True
+
+    def _update_subscriptions(self):
+        # receives the subscription messages of the XPUB socket, called by the publisher thread only (sockets are not thread safe)
+        while True:
+            try:
+                message = self.socket.recv(flags=zmq.NOBLOCK)
+            except zmq.Again:
+                return
+            with self._subscriptions_lock:
+                if message[:1] == b'\x01':  # first subscriber
+                    self._subscriptions.add(message[1:])
+                elif message[:1] == b'\x00':  # last subscriber unsubscribed
+                    self._subscriptions.discard(message[1:])
+
+    def get_subscriptions(self):
+        '''Returns a copy of the current subscriptions (ZeroMQ subscription prefixes) of the subscribers.
+        '''
+        with self._subscriptions_lock:
+            return set(self._subscriptions)
+
+    def get_subscribed_topics(self):
+        '''Returns the topics with at least one subscriber.
+
+        The subscriptions are updated by the publisher thread, new subscriptions are visible after the polling interval of the publisher thread.
+        '''
+        subscriptions = self.get_subscriptions()
+        return [topic for topic in self.topics if any(get_topic_subscription(topic).startswith(subscription) for subscription in subscriptions)]
+
+    def _send_topics(self, socket, data, scan_parameters, name, prescale, compression):
+        # sends the raw data words of the subscribed topics, called by the publisher thread
+        sent = True
+        stream_ids = None
+        self._update_subscriptions()
+        for topic in self.get_subscribed_topics():
+            streams = self.topics[topic]
+            if streams is None:
+                topic_data = data
+            else:
+                if stream_ids is None:
+                    stream_ids = get_raw_data_stream_ids(data[0])
+                topic_raw_data = data[0][np.isin(stream_ids, streams)]
+                if topic_raw_data.shape[0] == 0:  # nothing to send
+                    continue
+                topic_data = (topic_raw_data,) + tuple(data[1:])
+            sent &= send_data(socket, topic_data, scan_parameters=scan_parameters, name=name, prescale=prescale, compression=compression, topic=topic)
+        return sent
+
+    def send_meta_data(self, conf, name):
+        '''Sends the config, e.g. to indicate a new scan. Blocks if the queue is full.
+        '''
+        if self.topics is None:
+            self._queue.put((send_meta_data, (conf, name), 0))
+        else:
+            for topic in self.topics:
+                self._queue.put((send_meta_data, (conf, name, topic), 0))
+
+    def close(self):
+        if self._publisher_thread is not None:
+            self._queue.put(None)
+            self._publisher_thread.join()
+            self._publisher_thread = None
+            logging.info('Closing socket connection')
+            self.socket.close()  # close here, do not wait for garbage collector
+            self.print_statistics()
 
+    def _publisher(self):
+        '''Publisher thread sending queued messages.
+        '''
+        logging.debug('Starting %s', self._publisher_thread.name)
+        while True:
+            try:
+                item = self._queue.get(timeout=0.1 if self.topics else None)
+            except Empty:  # no data, receive new subscriptions
+                self._update_subscriptions()
+                continue
+            if item is None:  # if None then exit
+                break
+            send, args, n_bytes = item
+            try:
+                sent = send(self.socket, *args)
+            except Exception as e:
+                sent = False
+                logging.error('Sending data failed: %s', e)
+            if sent:
+                self._n_sent += 1
+                self._n_sent_bytes += n_bytes
+            else:
+                self._n_dropped_hwm += 1
+                self._n_dropped_hwm_bytes += n_bytes
+        logging.debug('Stopping %s', self._publisher_thread.name)
+
+    def get_statistics(self):
+        '''Returns publisher statistics.
+
+        Returns
+        -------
+        statistics : dict
+            Number of messages and bytes sent and dropped (queue full or high-water mark reached), number of read outs and bytes
+            not sent due to prescaling (prescale, rate limit, trigger selection) and the current queue size.
+        '''
+        return dict(
+            n_sent=self._n_sent,
+            n_sent_bytes=self._n_sent_bytes,
+            n_dropped=self._n_dropped_queue + self._n_dropped_hwm,
+            n_dropped_bytes=self._n_dropped_queue_bytes + self._n_dropped_hwm_bytes,
+            n_dropped_queue=self._n_dropped_queue,
+            n_dropped_hwm=self._n_dropped_hwm,
+            n_skipped=self._n_skipped,
+            n_skipped_bytes=self._n_skipped_bytes,
+            queue_size=self._queue.qsize()
+        )
+
+    def print_statistics(self):
+        statistics = self.get_statistics()
+        logging.info('Data sent to %s: %d messages, %0.1f MB', self.socket_address, statistics['n_sent'], statistics['n_sent_bytes'] / 1024.0 ** 2)
+        if statistics['n_skipped']:
+            logging.info('Data skipped by prescaling: %d read outs, %0.1f MB', statistics['n_skipped'], statistics['n_skipped_bytes'] / 1024.0 ** 2)
+        if statistics['n_dropped']:
+            logging.warning('Data not sent to %s: %d messages, %0.1f MB (queue full: %d, high-water mark reached: %d)',
+                            self.socket_address, statistics['n_dropped'], statistics['n_dropped_bytes'] / 1024.0 ** 2, statistics['n_dropped_queue'], statistics['n_dropped_hwm'])
+
+
+def get_filters(complib='blosc', complevel=5, shuffle='byte', fletcher32=False, **kwargs):
+    '''Returns PyTables filters from compression settings.
+
+    Parameters
+    ----------
+    complib : str
+        Compression library, e.g. 'blosc' (BloscLZ), 'blosc:lz4', 'blosc:zstd', 'zlib'. If 'none' or None, no compression is applied.
+    complevel : int
+        Compression level between 0 (no compression) and 9.
+    shuffle : str, bool
+        Shuffle filter applied before compression: 'byte' (True), 'bit' or 'none' (False, None).
+    kwargs
+        Other settings (e.g. nthreads) are ignored, which allows to pass complete compression settings.
+
+    Returns
+    -------
+    filters : tables.Filters
+        Filters object.
+    '''
+    if complib is None or str(complib).lower() == 'none':
+        return tb.Filters(complevel=0, shuffle=False, fletcher32=fletcher32)
+    if complib not in tb.filters.all_complibs:
+        raise ValueError('Unknown compression library %s, use one of %s' % (complib, ', '.join(tb.filters.all_complibs)))
+    if shuffle is True or str(shuffle).lower() == 'byte':
+        shuffle, bitshuffle = True, False
+    elif str(shuffle).lower() == 'bit':
+        shuffle, bitshuffle = False, True
+    elif shuffle is None or shuffle is False or str(shuffle).lower() == 'none':
+        shuffle, bitshuffle = False, False
+    else:
+        raise ValueError('Unknown shuffle mode %s, use byte, bit or none' % shuffle)
+    return tb.Filters(complib=complib, complevel=complevel, shuffle=shuffle, bitshuffle=bitshuffle, fletcher32=fletcher32)
 
-def open_raw_data_file(filename, mode="w", title="", scan_parameters=None, socket_address=None):
+
+def set_blosc_nthreads(nthreads):
+    '''Sets the maximum number of threads used by Blosc. The setting applies to all files of the process.
+    '''
+    if nthreads:
+        logging.info('Setting number of Blosc threads to %d', nthreads)
+        tb.set_blosc_max_threads(nthreads)
+
+
+def estimate_expected_words(data_rate, scan_timeout=0, max_triggers=0, trigger_rate=None, run_duration=3600.0):
+    '''Estimates the number of raw data words of a run.
+
+    The run duration is given by the scan timeout and/or the maximum number of triggers and the trigger rate.
+    If neither is given, the default run duration is used.
+
+    Parameters
+    ----------
+    data_rate : float
+        Raw data rate in words per second.
+    scan_timeout : float
+        Scan timeout in seconds. If 0, no scan timeout.
+    max_triggers : int
+        Maximum number of triggers. If 0, no trigger limit.
+    trigger_rate : float
+        Trigger rate in triggers per second.
+    run_duration : float
+        Default run duration in seconds.
+
+    Returns
+    -------
+    expected_words : int
+        Expected number of raw data words.
+    '''
+    durations = []
+    if scan_timeout:
+        durations.append(scan_timeout)
+    if max_triggers and trigger_rate:
+        durations.append(max_triggers / float(trigger_rate))
+    duration = min(durations) if durations else run_duration
+    return int(duration * data_rate)
+
+
+def get_raw_data_chunkshape(expected_words, min_chunk_size=2**14, max_chunk_size=2**18):
+    '''Returns the chunkshape of the raw data array for the expected number of raw data words.
+
+    The chunk size is a power of 2 and approximately 1/4096 of the expected number of words,
+    limited by min_chunk_size (64 KiB) and max_chunk_size (1 MiB).
+    '''
+    chunk_size = 2 ** int(np.log2(max(expected_words, 1) / 4096.0)) if expected_words >= 4096 else 1
+    return (int(min(max(chunk_size, min_chunk_size), max_chunk_size)),)
+
+
+def open_raw_data_file(filename, mode="w", title="", scan_parameters=None, socket_address=None, backend='hdf5', **kwargs):
     '''Mimics pytables.open_file() and stores the configuration and run configuration
 
+    Additional keyword arguments (e.g. asynchronous, flush_interval, flush_size, raw_data_compression) are passed to M26RawDataFile.
+    If backend is 'binary', the data is written to append-only binary files (M26BinaryRawDataFile), which can be converted to HDF5 afterwards.
+    If backend is 'swmr', the HDF5 file can be read by other processes while it is written (M26SWMRRawDataFile, requires h5py).
+
     Returns:
     RawDataFile Object
 
@@ -54,20 +446,309 @@ def open_raw_data_file(filename, mode="w", title="", scan_parameters=None, socke
         # do something here
         raw_data_file.append(self.readout.data, scan_parameters={scan_parameter:scan_parameter_value})
     '''
-    return M26RawDataFile(filename=filename, mode=mode, title=title, scan_parameters=scan_parameters, socket_address=socket_address)
+    if backend == 'hdf5':
+        raw_data_file_class = M26RawDataFile
+    elif backend == 'binary':
+        raw_data_file_class = M26BinaryRawDataFile
+    elif backend == 'swmr':
+        raw_data_file_class = M26SWMRRawDataFile
+    else:
+        raise ValueError('Unknown raw data file backend: %s' % backend)
+    return raw_data_file_class(filename=filename, mode=mode, title=title, scan_parameters=scan_parameters, socket_address=socket_address, **kwargs)
+
+
+default_raw_data_compression = dict(complib='blosc', complevel=5, shuffle='byte')
+default_meta_data_compression = dict(complib='zlib', complevel=5, shuffle='byte')
+
+# streams of demultiplexed raw data, the Mimosa26 words are stored by plane number (0-15)
+RAW_DATA_STREAM_TRIGGER = 16
+RAW_DATA_STREAM_OTHER = 17
+
+
+def get_raw_data_stream_ids(raw_data):
+    '''Returns the stream of each raw data word: the plane number (0-15) for Mimosa26 words,
+    RAW_DATA_STREAM_TRIGGER for trigger words and RAW_DATA_STREAM_OTHER for other words.
+    '''
+    stream_ids = np.full(shape=raw_data.shape, fill_value=RAW_DATA_STREAM_OTHER, dtype=np.uint8)
+    m26_words = (raw_data & 0xFF000000) == 0x20000000
+    stream_ids[m26_words] = (raw_data[m26_words] >> 20) & 0xF
+    stream_ids[(raw_data & 0x80000000) != 0] = RAW_DATA_STREAM_TRIGGER
+    return stream_ids
+
+
+def get_raw_data_stream_id(stream):
+    '''Returns the stream ID of a stream given by plane number or name ('trigger', 'other', 'plane_1', ...).
+    '''
+    if stream == 'trigger':
+        return RAW_DATA_STREAM_TRIGGER
+    if stream == 'other':
+        return RAW_DATA_STREAM_OTHER
+    if isinstance(stream, str) and stream.startswith('plane_'):
+        stream = stream[6:]
+    stream = int(stream)
+    if stream < 0 or stream > RAW_DATA_STREAM_OTHER:
+        raise ValueError('Unknown raw data stream: %s' % stream)
+    return stream
+
+
+def get_raw_data_stream_name(stream_id):
+    if stream_id == RAW_DATA_STREAM_TRIGGER:
+        return 'trigger'
+    if stream_id == RAW_DATA_STREAM_OTHER:
+        return 'other'
+    return 'plane_%d' % stream_id
+
+
+class StreamOrderTable(tb.IsDescription):
+    stream = tb.UInt8Col(pos=0)
+    index_stop = tb.UInt64Col(pos=1)  # word index after the run in the raw data
+    stream_index_stop = tb.UInt64Col(pos=2)  # word index after the run in the stream
+
+
+class DemultiplexedRawData(object):
+    '''Raw data, which is stored demultiplexed into one array per Mimosa26 plane, one array for the trigger words and one array for other words.
+
+    The arrays are stored in the raw_data_streams group. The order of the words is stored in the order table
+    as runs of consecutive words of the same stream, from which the raw data can be reconstructed.
+    Reading a single stream (see read_stream()) requires only the I/O of that stream.
+    Only the index_stop values of the last run of every chunk of the order table are kept in memory,
+    the runs of the requested range of raw data words are read from the order table.
+    The object provides the methods of the raw data array, which are used by M26RawDataFile and M26RawDataReader.
+
+    Parameters
+    ----------
+    h5_file : tables.File
+        Raw data file. The raw_data_streams group is created if it does not exist.
+    filters : tables.Filters
+        Filters of new arrays.
+    chunkshape : tuple
+        Chunkshape of new arrays. If None, the PyTables defaults are used.
+    expectedrows : int
+        Expected number of raw data words of new arrays.
+    '''
+
+    def __init__(self, h5_file, filters=None, chunkshape=None, expectedrows=None):
+        self.h5_file = h5_file
+        self.chunkshape = chunkshape
+        self.expectedrows = expectedrows
+        if 'raw_data_streams' in h5_file.root:
+            self.group = h5_file.root.raw_data_streams
+            self.order_table = self.group.order
+        else:
+            self.group = h5_file.create_group(h5_file.root, name='raw_data_streams', title='raw_data_streams', filters=filters)
+            self.order_table = h5_file.create_table(self.group, name='order', description=StreamOrderTable, title='order', filters=filters)
+        self.filters = self.group._v_filters
+        self.attrs = self.group._v_attrs
+        self.streams = {get_raw_data_stream_id(node.name): node for node in self.group._f_iter_nodes(classname='EArray')}
+        self._last_run = self.order_table.read(start=self.order_table.nrows - 1) if self.order_table.nrows else None
+        self._order_step = int(self.order_table.chunkshape[0])
+        self._order_index = np.zeros(shape=(0,), dtype=np.uint64)  # index_stop of every chunk of the order table, read on demand
+
+    @property
+    def nrows(self):
+        return int(self._last_run['index_stop'][0]) if self._last_run is not None else 0
+
+    @property
+    def dtype(self):
+        return np.dtype(np.uint32)
+
+    def _get_stream(self, stream_id):
+        if stream_id not in self.streams:
+            name = get_raw_data_stream_name(stream_id)
+            self.streams[stream_id] = self.h5_file.create_earray(self.group, name=name, atom=tb.UIntAtom(), shape=(0,), title=name, expectedrows=self.expectedrows, chunkshape=self.chunkshape)
+        return self.streams[stream_id]
+
+    def append(self, raw_data):
+        '''Demultiplexes and appends raw data words.
+        '''
+        if raw_data.shape[0] == 0:
+            return
+        stream_ids = get_raw_data_stream_ids(raw_data)
+        # runs of consecutive words of the same stream
+        run_stop = np.append(np.flatnonzero(stream_ids[1:] != stream_ids[:-1]) + 1, raw_data.shape[0])
+        runs = np.zeros(shape=run_stop.shape, dtype=self.order_table.dtype)
+        runs['stream'] = stream_ids[run_stop - 1]
+        runs['index_stop'] = self.nrows + run_stop
+        for stream_id in np.unique(runs['stream']):
+            stream = self._get_stream(stream_id)
+            selection = stream_ids == stream_id
+            runs['stream_index_stop'][runs['stream'] == stream_id] = stream.nrows + np.cumsum(selection, dtype=np.uint64)[run_stop[runs['stream'] == stream_id] - 1]
+            stream.append(raw_data[selection])
+        if self._last_run is not None and self._last_run['stream'][0] == runs['stream'][0]:  # continue last run
+            self._last_run['index_stop'] = runs['index_stop'][0]
+            self._last_run['stream_index_stop'] = runs['stream_index_stop'][0]
+            self.order_table.modify_rows(start=self.order_table.nrows - 1, rows=self._last_run)
+            runs = runs[1:]
+        if runs.shape[0]:
+            self.order_table.append(runs)
+            self._last_run = runs[-1:].copy()
+
+    def flush(self):
+        self.order_table.flush()
+        for stream in self.streams.values():
+            stream.flush()
+
+    def _get_order_index(self):
+        # index_stop of the last run of every chunk of the order table, the last run of the table is excluded (is modified by append())
+        n_chunks = (self.order_table.nrows - 1) // self._order_step if self.order_table.nrows else 0
+        if self._order_index.shape[0] < n_chunks:
+            start = (self._order_index.shape[0] + 1) * self._order_step - 1
+            self._order_index = np.append(self._order_index, self.order_table.read(start=start, stop=n_chunks * self._order_step, step=self._order_step)['index_stop'])
+        return self._order_index
+
+    def _find_run(self, index):
+        # returns the run (row of the order table) containing the given word index, the number of runs if the index is beyond the last run
+        chunk_start = int(np.searchsorted(self._get_order_index(), index, side='right')) * self._order_step
+        index_stop = self.order_table.read(start=chunk_start, stop=chunk_start + self._order_step)['index_stop']  # reading whole rows is faster than reading a field
+        return chunk_start + int(np.searchsorted(index_stop, index, side='right'))
+
+    def _get_run_start(self, run):
+        # first word index of the run
+        return int(self.order_table.read(start=run - 1, stop=run)['index_stop'][0]) if run else 0
+
+    def _get_stream_index(self, stream_id, index):
+        # number of words of the stream before the given word index
+        run = self._find_run(index)
+        stream_index = 0
+        for chunk_stop in range(run, 0, -self._order_step):  # last run of the stream before the run
+            runs = self.order_table.read(start=max(0, chunk_stop - self._order_step), stop=chunk_stop)
+            previous_runs = np.flatnonzero(runs['stream'] == stream_id)
+            if previous_runs.shape[0]:
+                stream_index = int(runs['stream_index_stop'][previous_runs[-1]])
+                break
+        if run < self.order_table.nrows and self.order_table.read(start=run, stop=run + 1)['stream'][0] == stream_id:
+            stream_index += index - self._get_run_start(run)
+        return stream_index
+
+    def read(self, start=None, stop=None):
+        '''Reads raw data words in the original order.
+        '''
+        start, stop, _ = slice(start, stop).indices(self.nrows)
+        if stop <= start:
+            return np.zeros(shape=(0,), dtype=np.uint32)
+        first_run = self._find_run(start)
+        runs = self.order_table.read(start=first_run, stop=self._find_run(stop - 1) + 1)
+        run_start = np.maximum(np.append(np.uint64(self._get_run_start(first_run)), runs['index_stop'][:-1]), start)
+        run_stop = np.minimum(runs['index_stop'], stop)
+        stream_ids = np.repeat(runs['stream'], (run_stop - run_start).astype(np.int64))
+        raw_data = np.empty(shape=(stop - start,), dtype=np.uint32)
+        for stream_id in np.unique(runs['stream']):  # words of a stream are consecutive
+            selection = stream_ids == stream_id
+            stream_start = int(runs['stream_index_stop'][runs['stream'] == stream_id][0] - (runs['index_stop'][runs['stream'] == stream_id][0] - run_start[runs['stream'] == stream_id][0]))
+            raw_data[selection] = self.streams[stream_id].read(start=stream_start, stop=stream_start + int(np.count_nonzero(selection)))
+        return raw_data
+
+    def read_stream(self, stream, start=None, stop=None):
+        '''Reads the words of a single stream.
+
+        Parameters
+        ----------
+        stream : int, str
+            Plane number or stream name ('trigger', 'other').
+        start, stop : int
+            Range of raw data words (of the original raw data, e.g. from the meta data).
+        '''
+        stream_id = get_raw_data_stream_id(stream)
+        if stream_id not in self.streams:
+            return np.zeros(shape=(0,), dtype=np.uint32)
+        start, stop, _ = slice(start, stop).indices(self.nrows)
+        if stop <= start:
+            return np.zeros(shape=(0,), dtype=np.uint32)
+        return self.streams[stream_id].read(start=self._get_stream_index(stream_id, start), stop=self._get_stream_index(stream_id, stop))
+
+
+def get_raw_data(h5_file):
+    '''Returns the raw data array of a raw data file, a DemultiplexedRawData object if the raw data is demultiplexed.
+    '''
+    if 'raw_data_streams' in h5_file.root:
+        return DemultiplexedRawData(h5_file)
+    return h5_file.root.raw_data
 
 
 # from pyBAR
 class M26RawDataFile(object):
 
     max_table_size = 2**63 - 1000000  # limit file size, just in case
+    file_extensions = ('.h5',)
 
     '''Raw data file object. Saving data queue to HDF5 file.
+
+    Parameters
+    ----------
+    asynchronous : bool
+        If True, data passed to append() is put into a bounded queue and written to the file by a separate writer thread.
+        The calling thread (e.g. the writer thread of M26Readout) is blocked only if the queue is full.
+    queue_size : int
+        Maximum number of append() calls that are buffered in the queue in asynchronous mode.
+    flush_interval : float
+        Flush the file if the last flush is older than the given time in seconds. If 0, disabled.
+    flush_size : float
+        Flush the file if the amount of raw data written since the last flush exceeds the given size in MB. If 0, disabled.
+        If flush_interval and flush_size are both 0, the file is flushed after every append() call.
+        The file is always flushed when it is closed.
+    raw_data_compression : dict
+        Compression settings of the raw data (complib, complevel, shuffle, nthreads), see get_filters().
+        The number of Blosc threads (nthreads) applies to the whole process.
+    meta_data_compression : dict
+        Compression settings of the meta data and scan parameter tables, see get_filters().
+    expected_words : int
+        Expected number of raw data words of the run (see estimate_expected_words()), used to optimize the chunkshape of the raw data array.
+        If None, the PyTables defaults are used.
+    publisher : RawDataPublisher
+        Publisher for sending the data to the online monitor. The publisher is not closed when the file is closed.
+        If socket_address is given, a new publisher is created and closed together with the file.
+    max_file_size : float
+        Start a new file (e.g. run_1_M26_TELESCOPE_1.h5) if the amount of raw data in the current file exceeds the given size in MB (uncompressed). If 0, disabled.
+    max_file_time : float
+        Start a new file if the current file is older than the given time in seconds. If 0, disabled.
+        If max_file_size or max_file_time is set, the next file is created in advance by a separate thread and the previous file is closed by this thread.
+    trigger_index : bool
+        If True, the word indices and trigger numbers of all trigger words are stored in the trigger_index table.
+    frame_index_interval : int
+        Store the word index of every Nth Mimosa26 frame header of each plane in the frame_index table. If 0, disabled.
+    run_summary : bool
+        If True, a summary of each file (occupancy maps, time series of the rates, data loss counts and totals, see RunSummary)
+        is accumulated while writing and stored in the summary group when the file is closed.
+    summary_time_bin : float
+        Width of the time bins of the summary time series in seconds.
+    scan_parameter_table : bool
+        The scan parameter values are stored as ranges of readouts with constant values in the scan_parameter_ranges table.
+        If True, the scan parameter values of every readout are stored in the scan_parameters table in addition.
+    raw_data_transform : str
+        Reversible transform of the raw data words before compression (e.g. 'm26_delta', see pymosa.raw_data_transform), applied to new files.
+        The raw data is decoded by read_raw_data() and M26RawDataReader. Files can be converted with pymosa_repack. If None, disabled.
+    demultiplex : bool
+        If True, the raw data of new files is stored demultiplexed into one array per Mimosa26 plane and one array for the trigger words
+        (see DemultiplexedRawData), the raw data of a single plane can be read without reading the other planes.
     '''
 
-    def __init__(self, filename, mode="w", title='', scan_parameters=None, socket_address=None):  # mode="r+" to append data, raw_data_file_h5 must exist, "w" to overwrite raw_data_file_h5, "a" to append data, if raw_data_file_h5 does not exist it is created):
+    def __init__(self, filename, mode="w", title='', scan_parameters=None, socket_address=None, publisher=None,
+                 asynchronous=False, queue_size=1000, flush_interval=0.0, flush_size=0.0,
+                 raw_data_compression=None, meta_data_compression=None, expected_words=None, max_file_size=0.0, max_file_time=0.0,
+                 trigger_index=True, frame_index_interval=1000, run_summary=False, summary_time_bin=1.0, scan_parameter_table=False,
+                 raw_data_transform=None, demultiplex=False):
+        # mode="r+" to append data, raw_data_file_h5 must exist, "w" to overwrite raw_data_file_h5, "a" to append data, if raw_data_file_h5 does not exist it is created
         self.lock = RLock()
-        if os.path.splitext(filename)[1].strip().lower() != '.h5':
+        self.flush_interval = flush_interval
+        self.max_file_size = max_file_size
+        self.max_file_time = max_file_time
+        self.trigger_index = trigger_index
+        self.frame_index_interval = frame_index_interval
+        self.run_summary = run_summary
+        self.summary_time_bin = summary_time_bin
+        self.scan_parameter_table = scan_parameter_table
+        self.raw_data_transform = raw_data_transform
+        self.demultiplex = demultiplex
+        self.flush_size = flush_size
+        self.raw_data_compression = dict(default_raw_data_compression)
+        self.raw_data_compression.update(raw_data_compression or {})
+        self.meta_data_compression = dict(default_meta_data_compression)
+        self.meta_data_compression.update(meta_data_compression or {})
+        self.filter_raw_data = get_filters(**self.raw_data_compression)
+        self.filter_tables = get_filters(**self.meta_data_compression)
+        set_blosc_nthreads(self.raw_data_compression.get('nthreads', None))
+        self.expected_words = expected_words
+        if os.path.splitext(filename)[1].strip().lower() not in self.file_extensions:
             self.base_filename = filename
         else:
             self.base_filename = os.path.splitext(filename)[0]
@@ -80,20 +761,26 @@ class M26RawDataFile(object):
         self.raw_data_earray = None
         self.meta_data_table = None
         self.scan_param_table = None
+        self.scan_parameter_ranges_table = None
+        self.trigger_index_table = None
+        self.frame_index_table = None
         self.h5_file = None
+        self._summary = None
+        self.output_filenames = []  # files written
+        # file rotation
+        self._next_file = None  # prepared file (filename, file nodes, new file)
+        self._rotation_thread = None
+        self._rotation_done = Condition(self.lock)
 
-        if socket_address:
-            context = zmq.Context.instance()
-
-        if socket_address and context:
-            logging.info('Creating socket connection to server %s', socket_address)
-            self.socket = context.socket(zmq.PUB)  # publisher socket
-            self.socket.bind(socket_address)
+        if publisher is None and socket_address:
+            self.publisher = RawDataPublisher(socket_address)
+            self._close_publisher = True
         else:
-            self.socket = None
+            self.publisher = publisher
+            self._close_publisher = False
 
         if mode and mode[0] == 'w':
-            h5_files = glob.glob(os.path.splitext(filename)[0] + '*.h5')
+            h5_files = [h5_file for extension in self.file_extensions for h5_file in glob.glob(self.base_filename + '*' + extension)]
             if h5_files:
                 logging.info('Removing following file(s): %s', ', '.join(h5_files))
             for h5_file in h5_files:
@@ -102,6 +789,27 @@ class M26RawDataFile(object):
         self.curr_filename = self.base_filename
         self.filenames = {self.curr_filename: 0}
         self.open(self.curr_filename, mode, title)
+        # write statistics
+        self._time_open = time()
+        self._time_close = None
+        self._time_last_flush = time()
+        self._bytes_since_flush = 0
+        self._n_readouts = 0
+        self._n_words = 0
+        self._n_flushes = 0
+        self._write_time = 0.0
+        self._flush_time = 0.0
+        self._max_queue_size = 0
+        self._n_queue_full = 0
+        self._n_files = 1
+        self._switch_time = 0.0
+        # asynchronous writer
+        self._asynchronous = asynchronous
+        self._writer_thread = None
+        self._writer_exc_info = None
+        if asynchronous:
+            self._write_queue = Queue(maxsize=queue_size)
+            self._start_writer()
 
     def __enter__(self):
         return self
@@ -111,133 +819,804 @@ class M26RawDataFile(object):
         return False  # do not hide exceptions
 
     def open(self, filename, mode='w', title=''):
+        with self.lock:
+            self._set_file(*self._open_file(filename, mode, title))
+
+    def _open_file(self, filename, mode='w', title=''):
+        '''Opens the HDF5 file and creates the raw data array, the meta data table and the scan parameter table.
+        '''
         if os.path.splitext(filename)[1].strip().lower() != '.h5':
             filename = os.path.splitext(filename)[0] + '.h5'
         if os.path.isfile(filename) and mode in ('r+', 'a'):
             logging.info('Opening existing raw data file: %s', filename)
         else:
             logging.info('Opening new raw data file: %s', filename)
-        if self.socket:
-            send_meta_data(self.socket, None, name='Reset')  # send reset to indicate a new scan
-            send_meta_data(self.socket, os.path.basename(filename), name='Filename')
 
-        filter_raw_data = tb.Filters(complib='blosc', complevel=5, fletcher32=False)
-        filter_tables = tb.Filters(complib='zlib', complevel=5, fletcher32=False)
-        self.h5_file = tb.open_file(filename, mode=mode, title=title if title else filename)
+        filter_raw_data = self.filter_raw_data
+        filter_tables = self.filter_tables
+        h5_file = tb.open_file(filename, mode=mode, title=title if title else filename)
         try:
-            self.raw_data_earray = self.h5_file.create_earray(self.h5_file.root, name='raw_data', atom=tb.UIntAtom(), shape=(0,), title='raw_data', filters=filter_raw_data)  # expectedrows = ???
+            if self.expected_words:
+                expectedrows = min(self.expected_words, self._get_max_words())
+                chunkshape = get_raw_data_chunkshape(expectedrows)
+                logging.info('Expected number of raw data words: %d, chunk size: %d', expectedrows, chunkshape[0])
+            else:
+                expectedrows, chunkshape = None, None
+            if 'raw_data_streams' in h5_file.root or (self.demultiplex and 'raw_data' not in h5_file.root):
+                if self.raw_data_transform:
+                    raise ValueError('Raw data transform is not supported for demultiplexed raw data')
+                raw_data_earray = DemultiplexedRawData(h5_file, filters=filter_raw_data, chunkshape=chunkshape, expectedrows=expectedrows)
+            else:
+                raw_data_earray = h5_file.create_earray(h5_file.root, name='raw_data', atom=tb.UIntAtom(), shape=(0,), title='raw_data', filters=filter_raw_data,
+                                                        expectedrows=expectedrows, chunkshape=chunkshape)
+            if self.raw_data_transform:
+                set_raw_data_transform(raw_data_earray, self.raw_data_transform)
         except tb.exceptions.NodeError:
-            self.raw_data_earray = self.h5_file.get_node(self.h5_file.root, name='raw_data')
+            raw_data_earray = h5_file.get_node(h5_file.root, name='raw_data')
         try:
-            self.meta_data_table = self.h5_file.create_table(self.h5_file.root, name='meta_data', description=MetaTable, title='meta_data', filters=filter_tables)
+            meta_data_table = h5_file.create_table(h5_file.root, name='meta_data', description=MetaTable, title='meta_data', filters=filter_tables)
+            meta_data_table.attrs.layout_version = META_DATA_LAYOUT_VERSION
         except tb.exceptions.NodeError:
-            self.meta_data_table = self.h5_file.get_node(self.h5_file.root, name='meta_data')
+            meta_data_table = h5_file.get_node(h5_file.root, name='meta_data')
+        scan_param_table = None
+        scan_parameter_ranges_table = None
         if self.scan_parameters:
-            try:
+            # the tables are not added to existing files with readouts, they would not cover the existing readouts
+            if 'scan_parameters' in h5_file.root:
+                scan_param_table = h5_file.get_node(h5_file.root, name='scan_parameters')
+            elif self.scan_parameter_table and meta_data_table.nrows == 0:
                 scan_param_descr = generate_scan_parameter_description(self.scan_parameters)
-                self.scan_param_table = self.h5_file.create_table(self.h5_file.root, name='scan_parameters', description=scan_param_descr, title='scan_parameters', filters=filter_tables)
+                scan_param_table = h5_file.create_table(h5_file.root, name='scan_parameters', description=scan_param_descr, title='scan_parameters', filters=filter_tables)
+            if 'scan_parameter_ranges' in h5_file.root:
+                scan_parameter_ranges_table = h5_file.get_node(h5_file.root, name='scan_parameter_ranges')
+            elif meta_data_table.nrows == 0:
+                scan_parameter_ranges_descr = generate_scan_parameter_ranges_description(self.scan_parameters)
+                scan_parameter_ranges_table = h5_file.create_table(h5_file.root, name='scan_parameter_ranges', description=scan_parameter_ranges_descr, title='scan_parameter_ranges', filters=filter_tables)
+        trigger_index_table = None
+        if self.trigger_index:
+            try:
+                trigger_index_table = h5_file.create_table(h5_file.root, name='trigger_index', description=TriggerIndexTable, title='trigger_index', filters=filter_tables)
+            except tb.exceptions.NodeError:
+                trigger_index_table = h5_file.get_node(h5_file.root, name='trigger_index')
+        frame_index_table = None
+        if self.frame_index_interval:
+            try:
+                frame_index_table = h5_file.create_table(h5_file.root, name='frame_index', description=FrameIndexTable, title='frame_index', filters=filter_tables)
+                frame_index_table.attrs.frame_index_interval = self.frame_index_interval
             except tb.exceptions.NodeError:
-                self.scan_param_table = self.h5_file.get_node(self.h5_file.root, name='scan_parameters')
+                frame_index_table = h5_file.get_node(h5_file.root, name='frame_index')
+        return h5_file, raw_data_earray, meta_data_table, scan_param_table, trigger_index_table, frame_index_table, scan_parameter_ranges_table
+
+    def _set_file(self, h5_file, raw_data_earray, meta_data_table, scan_param_table, trigger_index_table, frame_index_table, scan_parameter_ranges_table):
+        '''Sets the file which is used for writing.
+        '''
+        if self.publisher:
+            self.publisher.send_meta_data(None, name='Reset')  # send reset to indicate a new scan
+            self.publisher.send_meta_data(os.path.basename(h5_file.filename), name='Filename')
+        self.h5_file = h5_file
+        if h5_file.filename not in self.output_filenames:
+            self.output_filenames.append(h5_file.filename)
+        self.raw_data_earray = raw_data_earray
+        self._transform = get_raw_data_transform(raw_data_earray)
+        if self._transform is not None and raw_data_earray.nrows % self._transform.block_size:  # continue encoding of the last block
+            block_start = raw_data_earray.nrows - raw_data_earray.nrows % self._transform.block_size
+            self._transform.decode(raw_data_earray.read(start=block_start, stop=raw_data_earray.nrows), word_offset=block_start)
+        self.meta_data_table = meta_data_table
+        self.scan_param_table = scan_param_table
+        self.scan_parameter_ranges_table = scan_parameter_ranges_table
+        # last scan parameter range, extended while the scan parameter values are not changing
+        if scan_parameter_ranges_table is not None and scan_parameter_ranges_table.nrows:
+            self._scan_parameter_range = scan_parameter_ranges_table.read(start=scan_parameter_ranges_table.nrows - 1)
+        else:
+            self._scan_parameter_range = None
+        self.trigger_index_table = trigger_index_table
+        self.frame_index_table = frame_index_table
+        self._frame_counts = np.zeros(16, dtype=np.uint64)  # number of frames per plane in the file
+        if frame_index_table is not None and 'frame_counts' in frame_index_table.attrs:
+            self._frame_counts[:] = frame_index_table.attrs.frame_counts
+        if self.run_summary:
+            if 'summary' in h5_file.root:  # continue summary of existing file
+                self._summary = RunSummary.load(h5_file)
+            else:
+                self._summary = RunSummary(time_bin=self.summary_time_bin)
+        self._time_file_open = time()
+        # existing files with 32-bit word indices (layout version 1) are limited to 2**32 words
+        if get_meta_data_layout_version(self.meta_data_table) < 2:
+            logging.warning('Raw data file %s uses meta data layout version 1 with 32-bit word indices', h5_file.filename)
+            self.max_table_size = 2**32 - 1
+        else:
+            self.max_table_size = M26RawDataFile.max_table_size
+
+    def _get_max_words(self):
+        if self.max_file_size:
+            return min(self.max_table_size, max(1, int(self.max_file_size * 1024 ** 2 / 4)))
+        return self.max_table_size
 
     def close(self, close_socket=True):
+        self._stop_writer()  # write all queued data before closing the file
         with self.lock:
-            self.flush()
-            logging.info('Closing raw data file: %s', self.h5_file.filename)
-            self.h5_file.close()
-            self.h5_file = None
-        if self.socket and close_socket:
-            logging.info('Closing socket connection')
-            self.socket.close()  # close here, do not wait for garbage collector
-            self.socket = None
+            self._close_file()
+        if close_socket:
+            self._time_close = time()
+            self.print_statistics()
+        if self.publisher and close_socket:
+            if self._close_publisher:
+                self.publisher.close()
+            self.publisher = None
+        self._raise_writer_exception()
 
-    def append_item(self, data_tuple, scan_parameters=None, new_file=False, flush=True):
+    def _close_file(self):
+        self._wait_for_rotation()
+        self._discard_next_file()
+        self.flush()
+        self._save_summary()
+        logging.info('Closing raw data file: %s', self.h5_file.filename)
+        self.h5_file.close()
+        self.h5_file = None
+
+    def save_configuration(self, configuation_name, configuration):
+        '''Stores a configuration dictionary to the raw data file, see save_configuration_dict().
+        '''
         with self.lock:
-            if scan_parameters:
-                # check for not existing keys
-                diff = set(scan_parameters).difference(set(self.scan_parameters))
-                if diff:
-                    raise ValueError('Unknown scan parameter(s): %s' % ', '.join(diff))
-                # parameters that have changed
-                diff = [name for name in scan_parameters.keys() if scan_parameters[name] != self.scan_parameters[name]]
-                self.scan_parameters.update(scan_parameters)
-                if (new_file is True and diff) or (isinstance(new_file, (list, tuple)) and len([name for name in diff if name in new_file]) != 0):
-                    self.curr_filename = os.path.splitext(self.base_filename)[0].strip() + '_' + '_'.join([str(item) for item in reduce(lambda x, y: x + y, [(key, value) for key, value in scan_parameters.items() if (new_file is True or (isinstance(new_file, (list, tuple)) and key in new_file))])])
-                    index = self.filenames.get(self.curr_filename, 0)
-                    if index == 0:
-                        filename = self.curr_filename + '.h5'
-                        self.filenames[self.curr_filename] = 0  # add to dict
-                    else:
-                        filename = self.curr_filename + '_' + str(index) + '.h5'
-                    # copy nodes to new file
-                    nodes = self.h5_file.list_nodes('/', classname='Group')
-                    with tb.open_file(filename, mode='a', title=filename) as h5_file:  # append, since file can already exists when scan parameters are jumping back and forth
-                        for node in nodes:
-                            self.h5_file.copy_node(node, h5_file.root, overwrite=True, recursive=True)
-                    self.close(close_socket=False)
-                    self.open(filename, 'a', filename)
-            total_words = self.raw_data_earray.nrows
-            raw_data = data_tuple[0]
-            len_raw_data = raw_data.shape[0]
-            if total_words + len_raw_data > self.max_table_size:
-                index = self.filenames.get(self.curr_filename, 0) + 1  # reached file size limit, increase index by one
-                self.filenames[self.curr_filename] = index  # update dict
+            save_configuration_dict(self.h5_file, configuation_name, configuration)
+
+    def get_n_words(self):
+        '''Returns the number of raw data words in the current file.
+        '''
+        return self.raw_data_earray.nrows
+
+    def append_item(self, data_tuple, scan_parameters=None, new_file=False, flush=True):
+        self._append(data_iterable=(data_tuple,), scan_parameters=scan_parameters, new_file=new_file, flush=flush)
+
+    def _update_scan_parameters(self, scan_parameters, new_file=False):
+        # check for not existing keys
+        diff = set(scan_parameters).difference(set(self.scan_parameters))
+        if diff:
+            raise ValueError('Unknown scan parameter(s): %s' % ', '.join(diff))
+        # parameters that have changed
+        diff = [name for name in scan_parameters.keys() if scan_parameters[name] != self.scan_parameters[name]]
+        self.scan_parameters.update(scan_parameters)
+        if (new_file is True and diff) or (isinstance(new_file, (list, tuple)) and len([name for name in diff if name in new_file]) != 0):
+            new_file_parameters = [(key, value) for key, value in scan_parameters.items() if (new_file is True or (isinstance(new_file, (list, tuple)) and key in new_file))]
+            self.curr_filename = os.path.splitext(self.base_filename)[0].strip() + '_' + '_'.join([str(item) for item in reduce(lambda x, y: x + y, new_file_parameters)])
+            index = self.filenames.get(self.curr_filename, 0)
+            if index == 0:
+                filename = self.curr_filename + '.h5'
+                self.filenames[self.curr_filename] = 0  # add to dict
+            else:
                 filename = self.curr_filename + '_' + str(index) + '.h5'
-                # copy nodes to new file
-                nodes = self.h5_file.list_nodes('/', classname='Group')
-                with tb.open_file(filename, mode='a', title=filename) as h5_file:  # append, since file can already exists when scan parameters are jumping back and forth
-                    for node in nodes:
-                        self.h5_file.copy_node(node, h5_file.root, overwrite=True, recursive=True)
-                self.close(close_socket=False)
-                self.open(filename, 'a', filename)
-                total_words = self.raw_data_earray.nrows  # in case of re-opening existing file
-            self.raw_data_earray.append(raw_data)
-            self.meta_data_table.row['timestamp_start'] = data_tuple[1]
-            self.meta_data_table.row['timestamp_stop'] = data_tuple[2]
-            self.meta_data_table.row['error'] = data_tuple[3]
-            self.meta_data_table.row['data_length'] = len_raw_data
-            self.meta_data_table.row['index_start'] = total_words
-            total_words += len_raw_data
-            self.meta_data_table.row['index_stop'] = total_words
-            self.meta_data_table.row.append()
-            if self.scan_parameters:
-                for key in self.scan_parameters:
-                    self.scan_param_table.row[key] = self.scan_parameters[key]
-                self.scan_param_table.row.append()
-            if flush:
-                self.flush()
-            if self.socket:
-                send_data(self.socket, data_tuple, self.scan_parameters)
+            self._switch_file(filename)
+
+    def _next_filename(self):
+        return self.curr_filename + '_' + str(self.filenames.get(self.curr_filename, 0) + 1) + '.h5'
+
+    def _rotate(self):
+        '''Continues writing to the next file (e.g. run_1_M26_TELESCOPE_1.h5) if the file size or time limit is reached.
+        '''
+        filename = self._next_filename()
+        self.filenames[self.curr_filename] = self.filenames.get(self.curr_filename, 0) + 1  # update dict
+        self._switch_file(filename)
 
-    def append(self, data_iterable, scan_parameters=None, new_file=False, flush=True):
+    def _switch_file(self, filename):
+        time_start = time()
+        self._wait_for_rotation()
+        next_file, self._next_file = self._next_file, None
+        if next_file is not None and os.path.abspath(next_file[0]) != os.path.abspath(filename):
+            self._discard_file(next_file)
+            next_file = None
+        if next_file is None:  # no file prepared (e.g. new file after change of scan parameters)
+            next_file = self._prepare_file(filename)
+        else:
+            self._copy_nodes(next_file[1][0], overwrite=False)  # nodes created after the file was prepared
+        old_h5_file = self.h5_file  # will be flushed when closed
+        self._save_frame_counts()
+        self._save_summary()
+        self._set_file(*next_file[1])
+        self._n_files += 1
+        self._switch_time += time() - time_start
+        # close the previous file and prepare next file in separate thread
+        self._start_rotation_thread(old_h5_file=old_h5_file)
+
+    def _prepare_file(self, filename):
+        new_file = not os.path.isfile(filename)
+        nodes = self._open_file(filename, 'a', filename)  # append, since file can already exists when scan parameters are jumping back and forth
+        self._copy_nodes(nodes[0], overwrite=True)
+        return filename, nodes, new_file
+
+    def _copy_nodes(self, h5_file, overwrite=True):
+        # copy nodes (e.g. configuration) to new file
+        for node in self.h5_file.list_nodes('/', classname='Group'):
+            if node._v_name in ('summary', 'raw_data_streams'):  # summary and raw data of each file
+                continue
+            if overwrite or node._v_name not in h5_file.root:
+                self.h5_file.copy_node(node, h5_file.root, overwrite=True, recursive=True)
+
+    def _discard_file(self, next_file):
+        logging.debug('Discarding prepared raw data file: %s', next_file[0])
+        next_file[1][0].close()
+        if next_file[2]:  # remove file if created by _prepare_file()
+            remove(next_file[0])
+
+    def _discard_next_file(self):
+        if self._next_file is not None:
+            self._discard_file(self._next_file)
+            self._next_file = None
+
+    def _start_rotation_thread(self, old_h5_file=None):
+        if self.max_file_size or self.max_file_time:
+            next_filename = self._next_filename()
+        elif old_h5_file is None:
+            return
+        else:
+            next_filename = None
+        self._rotation_thread = Thread(target=self._rotation_worker, name='RawDataFileRotationThread', kwargs=dict(old_h5_file=old_h5_file, next_filename=next_filename))
+        self._rotation_thread.daemon = True
+        self._rotation_thread.start()
+
+    def _wait_for_rotation(self):
+        # wait for rotation thread, releases the lock while waiting
+        while self._rotation_thread is not None:
+            self._rotation_done.wait()
+
+    def _rotation_worker(self, old_h5_file=None, next_filename=None):
+        '''Closes the previous file and prepares the next file. HDF5 is not thread-safe,
+        therefore all steps acquire the lock, allowing the data to be written in between.
+        '''
+        try:
+            if old_h5_file is not None:
+                with self.lock:
+                    logging.info('Closing raw data file: %s', old_h5_file.filename)
+                    old_h5_file.close()
+            if next_filename is not None:
+                with self.lock:
+                    next_file = self._prepare_file(next_filename)
+                    self._next_file = next_file
+        except Exception:
+            self._writer_exc_info = sys.exc_info()
+            logging.error('Rotation of raw data file failed: %s', self._writer_exc_info[1])
+        finally:
+            with self.lock:
+                self._rotation_thread = None
+                self._rotation_done.notify_all()
+
+    def _append(self, data_iterable, scan_parameters=None, new_file=False, flush=None):
         with self.lock:
-            for data_tuple in data_iterable:
-                self.append_item(data_tuple=data_tuple, scan_parameters=scan_parameters, new_file=new_file, flush=False)
+            time_start = time()
+            if scan_parameters:
+                self._update_scan_parameters(scan_parameters, new_file=new_file)
+            data_tuples = list(data_iterable)
+            index = 0
+            if (self.max_file_size or self.max_file_time) and self._next_file is None and self._rotation_thread is None:
+                self._start_rotation_thread()  # prepare next file
+            while index < len(data_tuples):
+                if self.max_file_time and self.get_n_words() and time() - self._time_file_open >= self.max_file_time:
+                    self._rotate()  # reached file time limit
+                total_words = self.get_n_words()
+                # number of readouts until file size limit is reached
+                n_words = np.cumsum([data_tuple[0].shape[0] for data_tuple in data_tuples[index:]], dtype=np.uint64)
+                n_readouts = int(np.searchsorted(n_words, max(0, self._get_max_words() - total_words), side='right'))
+                if n_readouts == 0:
+                    self._rotate()  # reached file size limit
+                    total_words = self.get_n_words()  # in case of re-opening existing file
+                    n_readouts = max(1, int(np.searchsorted(n_words, max(0, self._get_max_words() - total_words), side='right')))
+                self._write(data_tuples[index:index + n_readouts], total_words)
+                index += n_readouts
+            self._write_time += time() - time_start
             if flush:
                 self.flush()
+            elif flush is None:
+                self._flush_if_required()
+            if self.publisher:
+                for data_tuple in data_tuples:
+                    self.publisher.send_data(data_tuple, self.scan_parameters)
+
+    def _write(self, data_tuples, total_words):
+        '''Writes raw data and meta data of multiple readouts with a single append per table.
+        '''
+        n_readouts = len(data_tuples)
+        data_length = np.array([data_tuple[0].shape[0] for data_tuple in data_tuples], dtype=np.uint64)
+        if n_readouts == 1:
+            raw_data = data_tuples[0][0]
+        else:
+            raw_data = np.concatenate([data_tuple[0] for data_tuple in data_tuples])
+        self.raw_data_earray.append(raw_data if self._transform is None else self._transform.encode(raw_data, word_offset=total_words))
+        meta_data = np.zeros(shape=(n_readouts,), dtype=self.meta_data_table.dtype)
+        index_stop = total_words + np.cumsum(data_length, dtype=np.uint64)
+        meta_data['index_start'] = index_stop - data_length
+        meta_data['index_stop'] = index_stop
+        meta_data['data_length'] = data_length
+        meta_data['timestamp_start'] = [data_tuple[1] for data_tuple in data_tuples]
+        meta_data['timestamp_stop'] = [data_tuple[2] for data_tuple in data_tuples]
+        meta_data['error'] = [data_tuple[3] for data_tuple in data_tuples]
+        if 'n_trigger_words' in self.meta_data_table.colnames:  # not available in files with layout version < 3
+            readout_statistics = get_readout_statistics(raw_data, data_length)
+            for name in readout_statistics.dtype.names:
+                meta_data[name] = readout_statistics[name]
+        self.meta_data_table.append(meta_data)
+        if self.scan_param_table is not None:
+            scan_param_data = np.zeros(shape=(n_readouts,), dtype=self.scan_param_table.dtype)
+            for key in self.scan_parameters:
+                scan_param_data[key] = self.scan_parameters[key]
+            self.scan_param_table.append(scan_param_data)
+        if self.scan_parameter_ranges_table is not None:
+            self._write_scan_parameter_range(n_readouts, total_words, raw_data.shape[0])
+        if self.trigger_index_table is not None:
+            self.trigger_index_table.append(get_trigger_index(raw_data, word_offset=total_words))
+        if self.frame_index_table is not None:
+            self.frame_index_table.append(get_frame_index(raw_data, frame_counts=self._frame_counts, interval=self.frame_index_interval, word_offset=total_words))
+        if self._summary is not None:
+            self._summary.add(raw_data, meta_data)
+        self._n_readouts += n_readouts
+        self._n_words += raw_data.shape[0]
+        self._bytes_since_flush += raw_data.nbytes
+
+    def _write_scan_parameter_range(self, n_readouts, total_words, n_words):
+        '''Extends the last scan parameter range or appends a new range if the scan parameter values have changed.
+        '''
+        readout_start = self.meta_data_table.nrows - n_readouts
+        scan_parameter_range = self._scan_parameter_range
+        if scan_parameter_range is not None and scan_parameter_range['readout_stop'][0] == readout_start and all(scan_parameter_range[key][0] == self.scan_parameters[key] for key in self.scan_parameters):
+            scan_parameter_range['readout_stop'] = readout_start + n_readouts
+            scan_parameter_range['index_stop'] = total_words + n_words
+            self.scan_parameter_ranges_table.modify_rows(start=self.scan_parameter_ranges_table.nrows - 1, rows=scan_parameter_range)
+        else:
+            scan_parameter_range = np.zeros(shape=(1,), dtype=self.scan_parameter_ranges_table.dtype)
+            for key in self.scan_parameters:
+                scan_parameter_range[key] = self.scan_parameters[key]
+            scan_parameter_range['readout_start'] = readout_start
+            scan_parameter_range['readout_stop'] = readout_start + n_readouts
+            scan_parameter_range['index_start'] = total_words
+            scan_parameter_range['index_stop'] = total_words + n_words
+            self.scan_parameter_ranges_table.append(scan_parameter_range)
+            self._scan_parameter_range = scan_parameter_range
+
+    def append(self, data_iterable, scan_parameters=None, new_file=False, flush=None):
+        '''Append data to the raw data file.
+
+        If flush is None, the file is flushed according to the flush policy (flush_interval, flush_size).
+        In asynchronous mode the data is queued and written by the writer thread.
+        '''
+        if self._asynchronous:
+            if self._writer_thread is None:  # file was closed and opened again
+                self._start_writer()
+            self._raise_writer_exception()
+            if scan_parameters:
+                scan_parameters = dict(scan_parameters)  # the caller may change the scan parameters before the data is written
+            item = (list(data_iterable), scan_parameters, new_file, flush)
+            try:
+                self._write_queue.put_nowait(item)
+            except Full:
+                self._n_queue_full += 1
+                logging.warning('Raw data file writer queue is full (%d items), waiting for writer thread...', self._write_queue.maxsize)
+                self._write_queue.put(item)
+            self._max_queue_size = max(self._max_queue_size, self._write_queue.qsize())
+        else:
+            self._append(data_iterable=data_iterable, scan_parameters=scan_parameters, new_file=new_file, flush=flush)
+
+    def _save_summary(self):
+        if self._summary is not None:
+            self._summary.save(self.h5_file, filters=self.filter_tables)
+
+    def _save_frame_counts(self):
+        if self.frame_index_table is not None:
+            self.frame_index_table.attrs.frame_counts = self._frame_counts
+
+    def _flush_if_required(self):
+        if not self.flush_interval and not self.flush_size:
+            self.flush()
+        elif self.flush_interval and time() - self._time_last_flush >= self.flush_interval:
+            self.flush()
+        elif self.flush_size and self._bytes_since_flush >= self.flush_size * 1024 ** 2:
+            self.flush()
 
     def flush(self):
         with self.lock:
+            time_start = time()
             self.raw_data_earray.flush()
             self.meta_data_table.flush()
-            if self.scan_parameters:
+            if self.scan_param_table is not None:
                 self.scan_param_table.flush()
+            if self.scan_parameter_ranges_table is not None:
+                self.scan_parameter_ranges_table.flush()
+            if self.trigger_index_table is not None:
+                self.trigger_index_table.flush()
+            if self.frame_index_table is not None:
+                self._save_frame_counts()
+                self.frame_index_table.flush()
+            self._flush_time += time() - time_start
+            self._time_last_flush = time()
+            self._bytes_since_flush = 0
+            self._n_flushes += 1
+
+    def _start_writer(self):
+        self._writer_thread = Thread(target=self._writer, name='RawDataFileWriterThread')
+        self._writer_thread.daemon = True
+        self._writer_thread.start()
+
+    def _stop_writer(self):
+        '''Stops the writer thread after all queued data is written.
+        '''
+        if self._writer_thread is not None:
+            self._write_queue.put(None)
+            self._writer_thread.join()
+            self._writer_thread = None
+
+    def _writer(self):
+        '''Writer thread writing queued data to the raw data file.
+        '''
+        logging.debug('Starting %s', self._writer_thread.name)
+        while True:
+            try:
+                item = self._write_queue.get(timeout=self.flush_interval if self.flush_interval else None)
+            except Empty:  # no data, check if flushing is required
+                if self._bytes_since_flush:
+                    with self.lock:
+                        self._flush_if_required()
+                continue
+            try:
+                if item is None:  # if None then exit
+                    break
+                if self._writer_exc_info is None:  # discard data after error
+                    self._append(*item)
+            except Exception:
+                self._writer_exc_info = sys.exc_info()
+                logging.error('Writing raw data file failed: %s', self._writer_exc_info[1])
+            finally:
+                self._write_queue.task_done()
+        logging.debug('Stopping %s', self._writer_thread.name)
+
+    def _raise_writer_exception(self):
+        if self._writer_exc_info is not None:
+            exc_info = self._writer_exc_info
+            self._writer_exc_info = None
+            raise exc_info[1].with_traceback(exc_info[2])
+
+    def get_statistics(self):
+        '''Returns write statistics.
+
+        Returns
+        -------
+        statistics : dict
+            Number of readouts, words and bytes (uncompressed) written, number of flushes, time spent in writing and flushing,
+            write throughput in MB/s, the queue usage of the asynchronous writer, the number of files and the time spent in switching files.
+        '''
+        n_bytes = self._n_words * 4
+        busy_time = self._write_time + self._flush_time
+        return dict(
+            n_readouts=self._n_readouts,
+            n_words=self._n_words,
+            n_bytes=n_bytes,
+            n_flushes=self._n_flushes,
+            write_time=self._write_time,
+            flush_time=self._flush_time,
+            write_throughput=n_bytes / busy_time / 1024 ** 2 if busy_time else 0.0,  # in MB/s
+            data_rate=n_bytes / ((self._time_close or time()) - self._time_open) / 1024 ** 2,  # in MB/s
+            queue_size=self._write_queue.qsize() if self._writer_thread is not None else 0,
+            max_queue_size=self._max_queue_size,
+            n_queue_full=self._n_queue_full,
+            n_files=self._n_files,
+            switch_time=self._switch_time
+        )
+
+    def print_statistics(self):
+        statistics = self.get_statistics()
+        logging.info('Raw data written: %d readouts, %0.1f MB, %d flushes', statistics['n_readouts'], statistics['n_bytes'] / 1024.0 ** 2, statistics['n_flushes'])
+        logging.info('Raw data write time: %0.1fs (flush: %0.1fs), write throughput: %0.1f MB/s',
+                     statistics['write_time'] + statistics['flush_time'], statistics['flush_time'], statistics['write_throughput'])
+        if statistics['n_files'] > 1:
+            logging.info('Raw data written to %d files, switch time: %0.2fs', statistics['n_files'], statistics['switch_time'])
+        if statistics['n_queue_full']:
+            logging.warning('Raw data file writer queue was full %d time(s), max. queue size: %d', statistics['n_queue_full'], statistics['max_queue_size'])
 
     @classmethod
-    def from_raw_data_file(cls, input_file, output_filename, mode="a"):
+    def from_raw_data_file(cls, input_file, output_filename, mode="a", **kwargs):
         if os.path.splitext(output_filename)[1].strip().lower() != '.h5':
             output_filename = os.path.splitext(output_filename)[0] + '.h5'
-        nodes = input_file.list_nodes('/', classname='Group')
+        nodes = [node for node in input_file.list_nodes('/', classname='Group') if node._v_name != 'raw_data_streams']
         with tb.open_file(output_filename, mode=mode, title=output_filename) as h5_file:  # append, since file can already exists when scan parameters are jumping back and forth
             for node in nodes:
                 input_file.copy_node(node, h5_file.root, overwrite=True, recursive=True)
-        try:
-            scan_parameters = input_file.root.scan_parameters.fields
-        except tb.exceptions.NoSuchNodeError:
+        if 'scan_parameter_ranges' in input_file.root:
+            scan_parameters = [name for name in input_file.root.scan_parameter_ranges.colnames if name not in scan_parameter_range_columns]
+        elif 'scan_parameters' in input_file.root:
+            scan_parameters = input_file.root.scan_parameters.colnames
+        else:
             scan_parameters = {}
-        return cls(output_filename, mode="a", scan_parameters=scan_parameters)
+        return cls(output_filename, mode="a", scan_parameters=scan_parameters, **kwargs)
+
+
+# Binary raw data format version
+BINARY_FORMAT_VERSION = 1
+BINARY_META_DATA_DTYPE = np.dtype([('index_start', '<u8'), ('index_stop', '<u8'), ('data_length', '<u4'), ('timestamp_start', '<f8'), ('timestamp_stop', '<f8'), ('error', '<u4')])
+
+
+class M26BinaryRawDataFile(M26RawDataFile):
+    '''Raw data file object writing to append-only binary files, for data rates at the limit of the disk throughput.
+
+    The raw data words are written to <filename>.raw (little-endian uint32), the meta data of the readouts to <filename>.meta
+    (see BINARY_META_DATA_DTYPE) and the scan parameters to <filename>.scan (little-endian int32 per scan parameter).
+    The title, the scan parameter names and the configuration are stored in <filename>.json.
+    Use pymosa.convert_raw_data (pymosa_convert) to convert the files to the HDF5 raw data file format.
+
+    The parameters are the same as for M26RawDataFile, the compression, chunkshape, transform, demultiplexing, index and summary settings are ignored.
+    The readout statistics, the trigger index, the frame index and the summary are created during conversion.
+    '''
+
+    file_extensions = ('.raw', '.meta', '.scan', '.json')
 
+    def open(self, filename, mode='w', title=''):
+        if os.path.splitext(filename)[1].strip().lower() in self.file_extensions + ('.h5',):
+            filename = os.path.splitext(filename)[0]
+        with self.lock:
+            append = mode in ('r+', 'a') and os.path.isfile(filename + '.json')
+            if append:
+                logging.info('Opening existing binary raw data file: %s', filename + '.raw')
+                with open(filename + '.json', 'r') as header_file:
+                    self._header = json.load(header_file)
+                if self._header['scan_parameters'] != list(self.scan_parameters):
+                    raise ValueError('Scan parameters of %s do not match: %s' % (filename, ', '.join(self._header['scan_parameters'])))
+            else:
+                logging.info('Opening new binary raw data file: %s', filename + '.raw')
+                self._header = dict(format_version=BINARY_FORMAT_VERSION, title=title if title else os.path.basename(filename), scan_parameters=list(self.scan_parameters), configuration={})
+            file_mode = 'ab' if append else 'wb'
+            self.filename = filename
+            if filename + '.raw' not in self.output_filenames:
+                self.output_filenames.append(filename + '.raw')
+            self._raw_data_file = open(filename + '.raw', file_mode, buffering=2**20)
+            self._meta_data_file = open(filename + '.meta', file_mode)
+            self._scan_param_file = open(filename + '.scan', file_mode) if self.scan_parameters else None
+            self._n_file_words = os.path.getsize(filename + '.raw') // 4
+            self._write_header()
+            if self.publisher:
+                self.publisher.send_meta_data(None, name='Reset')  # send reset to indicate a new scan
+                self.publisher.send_meta_data(os.path.basename(filename), name='Filename')
+            self._time_file_open = time()
+
+    def _write_header(self):
+        with open(self.filename + '.json', 'w') as header_file:
+            json.dump(self._header, header_file, indent=2)
+
+    def _close_file(self):
+        self.flush()
+        logging.info('Closing binary raw data file: %s', self.filename + '.raw')
+        for data_file in (self._raw_data_file, self._meta_data_file, self._scan_param_file):
+            if data_file is not None:
+                data_file.close()
+        self._raw_data_file, self._meta_data_file, self._scan_param_file = None, None, None
+        self._header['n_words'] = self._n_file_words
+        self._write_header()
+
+    def _switch_file(self, filename):
+        time_start = time()
+        configuration = self._header['configuration']
+        self._close_file()
+        self.open(filename, 'a', '')
+        for configuation_name, values in configuration.items():
+            self._header['configuration'].setdefault(configuation_name, values)
+        self._write_header()
+        self._n_files += 1
+        self._switch_time += time() - time_start
+
+    def _start_rotation_thread(self, old_h5_file=None):
+        pass  # switching binary files is fast
+
+    def save_configuration(self, configuation_name, configuration):
+        with self.lock:
+            self._header['configuration'][configuation_name] = {key: str(value) for key, value in dict.items(configuration)}
+            self._write_header()
+
+    def get_n_words(self):
+        return self._n_file_words
+
+    def _write(self, data_tuples, total_words):
+        n_readouts = len(data_tuples)
+        data_length = np.array([data_tuple[0].shape[0] for data_tuple in data_tuples], dtype=np.uint64)
+        if n_readouts == 1:
+            raw_data = data_tuples[0][0]
+        else:
+            raw_data = np.concatenate([data_tuple[0] for data_tuple in data_tuples])
+        self._raw_data_file.write(raw_data.astype('<u4', copy=False).tobytes())
+        meta_data = np.zeros(shape=(n_readouts,), dtype=BINARY_META_DATA_DTYPE)
+        index_stop = total_words + np.cumsum(data_length, dtype=np.uint64)
+        meta_data['index_start'] = index_stop - data_length
+        meta_data['index_stop'] = index_stop
+        meta_data['data_length'] = data_length
+        meta_data['timestamp_start'] = [data_tuple[1] for data_tuple in data_tuples]
+        meta_data['timestamp_stop'] = [data_tuple[2] for data_tuple in data_tuples]
+        meta_data['error'] = [data_tuple[3] for data_tuple in data_tuples]
+        self._meta_data_file.write(meta_data.tobytes())
+        if self.scan_parameters:
+            scan_param_data = np.zeros(shape=(n_readouts,), dtype=[(key, '<i4') for key in self.scan_parameters])
+            for key in self.scan_parameters:
+                scan_param_data[key] = self.scan_parameters[key]
+            self._scan_param_file.write(scan_param_data.tobytes())
+        self._n_file_words += raw_data.shape[0]
+        self._n_readouts += n_readouts
+        self._n_words += raw_data.shape[0]
+        self._bytes_since_flush += raw_data.nbytes
+
+    def flush(self):
+        with self.lock:
+            time_start = time()
+            for data_file in (self._raw_data_file, self._meta_data_file, self._scan_param_file):
+                if data_file is not None:
+                    data_file.flush()
+            self._flush_time += time() - time_start
+            self._time_last_flush = time()
+            self._bytes_since_flush = 0
+            self._n_flushes += 1
 
-def save_raw_data_from_data_queue(data_queue, filename, mode='a', title='', scan_parameters=None):  # mode="r+" to append data, raw_data_file_h5 must exist, "w" to overwrite raw_data_file_h5, "a" to append data, if raw_data_file_h5 does not exist it is created
+
+# HDF5 file format of SWMR files, oldest format with SWMR support (HDF5 >= 1.10), readable by PyTables
+SWMR_LIBVER = ('v110', 'v110')
+
+
+def get_h5py_compression(complib='blosc', complevel=5, shuffle='byte', fletcher32=False, **kwargs):
+    '''Returns the h5py dataset compression arguments for the given compression settings (see get_filters()).
+
+    Only the HDF5 built-in compression (complib 'zlib') is available in h5py, otherwise the data is not compressed.
+    '''
+    if complib == 'zlib' and complevel:
+        return dict(compression='gzip', compression_opts=complevel, shuffle=shuffle in ('byte', True), fletcher32=fletcher32)
+    return dict(fletcher32=fletcher32)
+
+
+class M26SWMRRawDataFile(M26RawDataFile):
+    '''Raw data file object writing the raw data and the meta data in HDF5 single-writer/multiple-reader (SWMR) mode, requires h5py.
+
+    Other processes can open the file while it is written (see M26RawDataTailReader) and read all readouts up to the last flush.
+    New nodes cannot be created in SWMR mode, therefore the configuration, the scan parameter ranges, the trigger index,
+    the frame index and the summary are kept in memory and written when the file is closed.
+    The raw data is compressed only if zlib is selected (Blosc is not available in h5py), use pymosa_archive to recompress finished files.
+
+    The parameters are the same as for M26RawDataFile. The per-readout scan parameter table, the raw data transform and demultiplexing are not supported.
+    '''
+
+    def open(self, filename, mode='w', title=''):
+        import h5py
+        if os.path.splitext(filename)[1].strip().lower() != '.h5':
+            filename = os.path.splitext(filename)[0] + '.h5'
+        with self.lock:
+            if os.path.isfile(filename) and mode in ('r+', 'a'):
+                raise IOError('Cannot append to existing raw data file %s in SWMR mode' % filename)
+            if self.raw_data_transform or self.demultiplex:
+                raise ValueError('Raw data transform and demultiplexing are not supported in SWMR mode')
+            logging.info('Opening new raw data file in SWMR mode: %s', filename)
+            h5_file = h5py.File(filename, mode='w', libver=SWMR_LIBVER)
+            h5_file.attrs['TITLE'] = title if title else filename
+            if self.expected_words:
+                chunkshape = get_raw_data_chunkshape(min(self.expected_words, self._get_max_words()))
+            else:
+                chunkshape = (2**16,)
+            self.raw_data_earray = h5_file.create_dataset('raw_data', shape=(0,), maxshape=(None,), dtype=np.uint32, chunks=chunkshape, **get_h5py_compression(**self.raw_data_compression))
+            self.meta_data_table = h5_file.create_dataset('meta_data', shape=(0,), maxshape=(None,), dtype=tb.dtype_from_descr(MetaTable), chunks=(1024,),
+                                                          **get_h5py_compression(**self.meta_data_compression))
+            self.meta_data_table.attrs['layout_version'] = META_DATA_LAYOUT_VERSION
+            h5_file.swmr_mode = True
+            self.h5_file = h5_file
+            self.filename = filename
+            if filename not in self.output_filenames:
+                self.output_filenames.append(filename)
+            # nodes written when the file is closed
+            self._configuration = {}
+            self._scan_parameter_ranges = []
+            self._trigger_index = []
+            self._frame_index = []
+            self._frame_counts = np.zeros(16, dtype=np.uint64)
+            self._summary = RunSummary(time_bin=self.summary_time_bin) if self.run_summary else None
+            if self.publisher:
+                self.publisher.send_meta_data(None, name='Reset')  # send reset to indicate a new scan
+                self.publisher.send_meta_data(os.path.basename(filename), name='Filename')
+            self._time_file_open = time()
+            self.max_table_size = M26RawDataFile.max_table_size
+
+    def _close_file(self):
+        self.flush()
+        logging.info('Closing raw data file: %s', self.filename)
+        self.h5_file.close()
+        self.h5_file = None
+        with tb.open_file(self.filename, mode='a') as h5_file:
+            for configuation_name, configuration in self._configuration.items():
+                save_configuration_dict(h5_file, configuation_name, configuration)
+            if self.scan_parameters:
+                scan_parameter_ranges_table = h5_file.create_table(h5_file.root, name='scan_parameter_ranges', description=generate_scan_parameter_ranges_description(self.scan_parameters),
+                                                                   title='scan_parameter_ranges', filters=self.filter_tables)
+                if self._scan_parameter_ranges:
+                    scan_parameter_ranges_table.append(np.concatenate(self._scan_parameter_ranges))
+            if self.trigger_index:
+                trigger_index_table = h5_file.create_table(h5_file.root, name='trigger_index', description=TriggerIndexTable, title='trigger_index', filters=self.filter_tables)
+                if self._trigger_index:
+                    trigger_index_table.append(np.concatenate(self._trigger_index))
+            if self.frame_index_interval:
+                frame_index_table = h5_file.create_table(h5_file.root, name='frame_index', description=FrameIndexTable, title='frame_index', filters=self.filter_tables)
+                frame_index_table.attrs.frame_index_interval = self.frame_index_interval
+                frame_index_table.attrs.frame_counts = self._frame_counts
+                if self._frame_index:
+                    frame_index_table.append(np.concatenate(self._frame_index))
+            if self._summary is not None:
+                self._summary.save(h5_file, filters=self.filter_tables)
+
+    def _switch_file(self, filename):
+        time_start = time()
+        configuration = self._configuration
+        self._close_file()
+        self.open(filename, 'a', '')
+        self._configuration.update(configuration)
+        self._n_files += 1
+        self._switch_time += time() - time_start
+
+    def _start_rotation_thread(self, old_h5_file=None):
+        pass  # files are switched synchronously
+
+    def save_configuration(self, configuation_name, configuration):
+        with self.lock:
+            self._configuration[configuation_name] = dict(configuration)
+
+    def get_n_words(self):
+        return self.raw_data_earray.shape[0]
+
+    def _write(self, data_tuples, total_words):
+        n_readouts = len(data_tuples)
+        data_length = np.array([data_tuple[0].shape[0] for data_tuple in data_tuples], dtype=np.uint64)
+        if n_readouts == 1:
+            raw_data = data_tuples[0][0]
+        else:
+            raw_data = np.concatenate([data_tuple[0] for data_tuple in data_tuples])
+        meta_data = np.zeros(shape=(n_readouts,), dtype=self.meta_data_table.dtype)
+        index_stop = total_words + np.cumsum(data_length, dtype=np.uint64)
+        meta_data['index_start'] = index_stop - data_length
+        meta_data['index_stop'] = index_stop
+        meta_data['data_length'] = data_length
+        meta_data['timestamp_start'] = [data_tuple[1] for data_tuple in data_tuples]
+        meta_data['timestamp_stop'] = [data_tuple[2] for data_tuple in data_tuples]
+        meta_data['error'] = [data_tuple[3] for data_tuple in data_tuples]
+        readout_statistics = get_readout_statistics(raw_data, data_length)
+        for name in readout_statistics.dtype.names:
+            meta_data[name] = readout_statistics[name]
+        # raw data first, a readout is complete when the meta data is visible to the readers
+        self.raw_data_earray.resize((total_words + raw_data.shape[0],))
+        self.raw_data_earray[total_words:] = raw_data
+        readout_start = self.meta_data_table.shape[0]
+        self.meta_data_table.resize((readout_start + n_readouts,))
+        self.meta_data_table[readout_start:] = meta_data
+        if self.scan_parameters:
+            scan_parameter_range = self._scan_parameter_ranges[-1] if self._scan_parameter_ranges else None
+            if (scan_parameter_range is not None and scan_parameter_range['readout_stop'][0] == readout_start and
+                    all(scan_parameter_range[key][0] == self.scan_parameters[key] for key in self.scan_parameters)):
+                scan_parameter_range['readout_stop'] = readout_start + n_readouts
+                scan_parameter_range['index_stop'] = total_words + raw_data.shape[0]
+            else:
+                scan_parameter_range = np.zeros(shape=(1,), dtype=generate_scan_parameter_ranges_description(self.scan_parameters))
+                for key in self.scan_parameters:
+                    scan_parameter_range[key] = self.scan_parameters[key]
+                scan_parameter_range['readout_start'] = readout_start
+                scan_parameter_range['readout_stop'] = readout_start + n_readouts
+                scan_parameter_range['index_start'] = total_words
+                scan_parameter_range['index_stop'] = total_words + raw_data.shape[0]
+                self._scan_parameter_ranges.append(scan_parameter_range)
+        if self.trigger_index:
+            self._trigger_index.append(get_trigger_index(raw_data, word_offset=total_words))
+        if self.frame_index_interval:
+            self._frame_index.append(get_frame_index(raw_data, frame_counts=self._frame_counts, interval=self.frame_index_interval, word_offset=total_words))
+        if self._summary is not None:
+            self._summary.add(raw_data, meta_data)
+        self._n_readouts += n_readouts
+        self._n_words += raw_data.shape[0]
+        self._bytes_since_flush += raw_data.nbytes
+
+    def flush(self):
+        with self.lock:
+            time_start = time()
+            self.raw_data_earray.flush()
+            self.meta_data_table.flush()  # readers see the new readouts
+            self._flush_time += time() - time_start
+            self._time_last_flush = time()
+            self._bytes_since_flush = 0
+            self._n_flushes += 1
+
+
+def save_raw_data_from_data_queue(data_queue, filename, mode='a', title='', scan_parameters=None):
+    # mode="r+" to append data, raw_data_file_h5 must exist, "w" to overwrite raw_data_file_h5, "a" to append data, if raw_data_file_h5 does not exist it is created
     '''Writing raw data file from data queue
 
     If you need to write raw data once in a while this function may make it easy for you.
@@ -292,15 +1671,1132 @@ def save_configuration_dict(h5_file, configuation_name, configuration, **kwargs)
             save_conf()
 
 
+# Meta data layout version:
+# 1: 32-bit word indices (index_start, index_stop), no layout_version attribute
+# 2: 64-bit word indices
+# 3: readout statistics (n_trigger_words, n_m26_words, data_loss, m26_timestamp_start, m26_timestamp_stop)
+META_DATA_LAYOUT_VERSION = 3
+meta_data_layout_version_1_columns = ('index_start', 'index_stop', 'data_length', 'timestamp_start', 'timestamp_stop', 'error')  # fields of all layout versions
+
+
 class MetaTable(tb.IsDescription):
-    index_start = tb.UInt32Col(pos=0)
-    index_stop = tb.UInt32Col(pos=1)
+    index_start = tb.UInt64Col(pos=0)
+    index_stop = tb.UInt64Col(pos=1)
     data_length = tb.UInt32Col(pos=2)
     # https://github.com/PyTables/PyTables/issues/230
 #    timestamp = tb.Time64Col(pos=3)
     timestamp_start = tb.Float64Col(pos=3)
     timestamp_stop = tb.Float64Col(pos=4)
     error = tb.UInt32Col(pos=5)
+    # readout statistics (layout version 3)
+    n_trigger_words = tb.UInt32Col(pos=6)
+    n_m26_words = tb.UInt32Col(shape=(6,), pos=7)  # Mimosa26 words of plane 1 to 6
+    data_loss = tb.UInt8Col(pos=8)  # bit 0 to 5 set if data loss of plane 1 to 6
+    m26_timestamp_start = tb.Int64Col(pos=9)  # Mimosa26 timestamp of first frame, -1 if no frame
+    m26_timestamp_stop = tb.Int64Col(pos=10)  # Mimosa26 timestamp of last frame, -1 if no frame
+
+
+class TriggerIndexTable(tb.IsDescription):
+    word_index = tb.UInt64Col(pos=0)
+    trigger_number = tb.UInt32Col(pos=1)
+
+
+class FrameIndexTable(tb.IsDescription):
+    word_index = tb.UInt64Col(pos=0)
+    plane = tb.UInt8Col(pos=1)
+    frame_count = tb.UInt64Col(pos=2)
+
+
+class RateTable(tb.IsDescription):
+    timestamp = tb.Float64Col(pos=0)  # start of time bin
+    n_readouts = tb.UInt32Col(pos=1)
+    n_words = tb.UInt64Col(pos=2)
+    n_trigger_words = tb.UInt64Col(pos=3)
+    n_m26_words = tb.UInt64Col(shape=(6,), pos=4)  # Mimosa26 words of plane 1 to 6
+    n_data_loss = tb.UInt32Col(shape=(6,), pos=5)  # readouts with data loss of plane 1 to 6
+    n_errors = tb.UInt32Col(pos=6)  # readouts with error flag
+    trigger_number_first = tb.Int64Col(pos=7)  # -1 if no trigger word
+    trigger_number_last = tb.Int64Col(pos=8)  # -1 if no trigger word
+
+
+def get_trigger_index(raw_data, word_offset=0):
+    '''Returns the word indices and trigger numbers of the trigger words.
+
+    Parameters
+    ----------
+    raw_data : numpy.array
+        Raw data array.
+    word_offset : int
+        Word index of the first word of the raw data array.
+
+    Returns
+    -------
+    trigger_index : numpy.array
+        Array with word index and trigger number (lower 31 bits of trigger word, depending on the TLU data format) of each trigger word.
+    '''
+    selection = np.flatnonzero(np.bitwise_and(raw_data, 0x80000000))
+    trigger_index = np.zeros(shape=(selection.shape[0],), dtype=tb.dtype_from_descr(TriggerIndexTable))
+    trigger_index['word_index'] = selection + word_offset
+    trigger_index['trigger_number'] = np.bitwise_and(raw_data[selection], 0x7FFFFFFF)
+    return trigger_index
+
+
+def get_frame_index(raw_data, frame_counts, interval=1000, word_offset=0):
+    '''Returns the word indices of every Nth Mimosa26 frame header (timestamp low word) of each plane.
+
+    Parameters
+    ----------
+    raw_data : numpy.array
+        Raw data array.
+    frame_counts : numpy.array
+        Number of frames of each plane (indexed by plane number) before the raw data array, will be updated.
+    interval : int
+        Interval of frames.
+    word_offset : int
+        Word index of the first word of the raw data array.
+
+    Returns
+    -------
+    frame_index : numpy.array
+        Array with word index, plane number and frame count (number of frames of the plane before the frame) ordered by word index.
+    '''
+    selection = np.flatnonzero(np.bitwise_and(raw_data, 0xFF010000) == 0x20010000)  # Mimosa26 frame header
+    planes = np.right_shift(np.bitwise_and(raw_data[selection], 0x00F00000), 20)
+    frame_index = []
+    for plane in np.unique(planes):
+        plane_selection = selection[planes == plane]
+        frame_count = frame_counts[plane] + np.arange(plane_selection.shape[0], dtype=np.uint64)
+        frame_counts[plane] += plane_selection.shape[0]
+        sampled = frame_count % interval == 0
+        plane_frame_index = np.zeros(shape=(np.count_nonzero(sampled),), dtype=tb.dtype_from_descr(FrameIndexTable))
+        plane_frame_index['word_index'] = plane_selection[sampled] + word_offset
+        plane_frame_index['plane'] = plane
+        plane_frame_index['frame_count'] = frame_count[sampled]
+        frame_index.append(plane_frame_index)
+    if not frame_index:
+        return np.zeros(shape=(0,), dtype=tb.dtype_from_descr(FrameIndexTable))
+    frame_index = np.concatenate(frame_index)
+    return frame_index[np.argsort(frame_index['word_index'], kind='stable')]
+
+
+def create_raw_data_index(filename, trigger_index=True, frame_index_interval=1000, block_size=2**22):
+    '''Creates the trigger index and frame index tables of an existing raw data file.
+
+    Existing index tables are replaced.
+    '''
+    with tb.open_file(filename, mode='a') as h5_file:
+        raw_data = get_raw_data(h5_file)
+        filters = h5_file.root.meta_data.filters
+        tables = []
+        if trigger_index:
+            if 'trigger_index' in h5_file.root:
+                h5_file.remove_node(h5_file.root, 'trigger_index')
+            trigger_index_table = h5_file.create_table(h5_file.root, name='trigger_index', description=TriggerIndexTable, title='trigger_index', filters=filters)
+            tables.append(trigger_index_table)
+        if frame_index_interval:
+            if 'frame_index' in h5_file.root:
+                h5_file.remove_node(h5_file.root, 'frame_index')
+            frame_index_table = h5_file.create_table(h5_file.root, name='frame_index', description=FrameIndexTable, title='frame_index', filters=filters)
+            frame_index_table.attrs.frame_index_interval = frame_index_interval
+            frame_counts = np.zeros(16, dtype=np.uint64)
+            tables.append(frame_index_table)
+        transform = get_raw_data_transform(raw_data)
+        for start in range(0, raw_data.nrows, block_size):
+            raw_data_block = raw_data.read(start=start, stop=start + block_size)
+            if transform is not None:
+                raw_data_block = transform.decode(raw_data_block, word_offset=start)
+            if trigger_index:
+                trigger_index_table.append(get_trigger_index(raw_data_block, word_offset=start))
+            if frame_index_interval:
+                frame_index_table.append(get_frame_index(raw_data_block, frame_counts=frame_counts, interval=frame_index_interval, word_offset=start))
+        if frame_index_interval:
+            frame_index_table.attrs.frame_counts = frame_counts
+        for table in tables:
+            table.flush()
+        logging.info('Created index of raw data file %s', filename)
+
+
+def get_readout_statistics(raw_data, data_length):
+    '''Returns statistics of the raw data words of each readout.
+
+    Parameters
+    ----------
+    raw_data : numpy.array
+        Raw data array of one or more readouts.
+    data_length : numpy.array
+        Number of raw data words of each readout.
+
+    Returns
+    -------
+    readout_statistics : numpy.array
+        Array with number of trigger words, number of Mimosa26 words of each plane, data loss flags of the planes
+        and the Mimosa26 timestamp of the first and last frame (frame header and subsequent timestamp word within the readout) of each readout.
+    '''
+    n_readouts = data_length.shape[0]
+    readout_statistics = np.zeros(shape=(n_readouts,), dtype=[('n_trigger_words', np.uint32), ('n_m26_words', np.uint32, (6,)), ('data_loss', np.uint8),
+                                                              ('m26_timestamp_start', np.int64), ('m26_timestamp_stop', np.int64)])
+    readout_statistics['m26_timestamp_start'] = -1
+    readout_statistics['m26_timestamp_stop'] = -1
+    if n_readouts == 0 or raw_data.shape[0] == 0:
+        return readout_statistics
+    readout_index_stop = np.cumsum(data_length, dtype=np.uint64)
+    readout_id = np.repeat(np.arange(n_readouts), data_length.astype(np.int64))
+    # trigger words
+    readout_statistics['n_trigger_words'] = np.bincount(readout_id[np.bitwise_and(raw_data, 0x80000000) != 0], minlength=n_readouts)
+    # Mimosa26 words
+    m26_selection = np.flatnonzero(np.logical_and(np.bitwise_and(raw_data, 0xFF000000) == 0x20000000, np.bitwise_and(raw_data, 0x00F00000) != 0))
+    m26_words = raw_data[m26_selection]
+    planes = np.right_shift(np.bitwise_and(m26_words, 0x00F00000), 20).astype(np.int64)
+    valid_plane = planes <= 6
+    m26_selection, m26_words, planes = m26_selection[valid_plane], m26_words[valid_plane], planes[valid_plane]
+    m26_readout_id = readout_id[m26_selection]
+    readout_statistics['n_m26_words'] = np.bincount(m26_readout_id * 6 + planes - 1, minlength=n_readouts * 6).reshape(n_readouts, 6)
+    data_loss = np.bitwise_and(m26_words, 0x00020000) != 0
+    data_loss_flags = np.zeros(shape=(n_readouts,), dtype=np.uint8)
+    np.bitwise_or.at(data_loss_flags, m26_readout_id[data_loss], np.left_shift(1, planes[data_loss] - 1).astype(np.uint8))
+    readout_statistics['data_loss'] = data_loss_flags
+    # Mimosa26 timestamps, frame header (timestamp low word) followed by timestamp high word of the same plane
+    frame_word_index, frame_timestamp = [], []
+    for plane in range(1, 7):
+        plane_selection = planes == plane
+        plane_words = m26_words[plane_selection]
+        plane_readout_id = m26_readout_id[plane_selection]
+        header = np.flatnonzero(np.logical_and(np.bitwise_and(plane_words[:-1], 0x00010000), plane_readout_id[:-1] == plane_readout_id[1:]))  # timestamp high word in the same readout
+        frame_word_index.append(m26_selection[plane_selection][header])
+        frame_timestamp.append(np.bitwise_or(np.bitwise_and(plane_words[header], 0xFFFF).astype(np.int64), np.left_shift(np.bitwise_and(plane_words[header + 1], 0xFFFF).astype(np.int64), 16)))
+    frame_word_index = np.concatenate(frame_word_index)
+    frame_timestamp = np.concatenate(frame_timestamp)
+    order = np.argsort(frame_word_index, kind='stable')
+    frame_word_index, frame_timestamp = frame_word_index[order], frame_timestamp[order]
+    frame_readout_id = np.searchsorted(readout_index_stop, frame_word_index, side='right')
+    first = np.searchsorted(frame_readout_id, np.arange(n_readouts), side='left')
+    last = np.searchsorted(frame_readout_id, np.arange(n_readouts), side='right') - 1
+    has_frame = first <= last
+    readout_statistics['m26_timestamp_start'][has_frame] = frame_timestamp[first[has_frame]]
+    readout_statistics['m26_timestamp_stop'][has_frame] = frame_timestamp[last[has_frame]]
+    return readout_statistics
+
+
+def set_raw_data_transform(raw_data_earray, name, block_size=2**16):
+    '''Sets the raw data transform (see pymosa.raw_data_transform) of an empty raw data array.
+    '''
+    from pymosa.raw_data_transform import get_transform  # numba
+    get_transform(name, block_size=block_size)  # check name
+    raw_data_earray.attrs.raw_data_transform = name
+    raw_data_earray.attrs.raw_data_transform_block_size = block_size
+
+
+def get_raw_data_transform(raw_data_earray):
+    '''Returns the raw data transform of the raw data array, None if the raw data is not transformed.
+    '''
+    if 'raw_data_transform' not in raw_data_earray.attrs:
+        return None
+    from pymosa.raw_data_transform import get_transform  # numba
+    return get_transform(str(raw_data_earray.attrs.raw_data_transform), block_size=int(raw_data_earray.attrs.raw_data_transform_block_size))
+
+
+def read_raw_data(raw_data_earray, start=None, stop=None):
+    '''Reads raw data words and decodes transformed raw data (see set_raw_data_transform()).
+
+    Parameters
+    ----------
+    raw_data_earray : tables.EArray
+        Raw data array.
+    start, stop : int
+        Range of raw data words.
+
+    Returns
+    -------
+    raw_data : numpy.array
+        Raw data array.
+    '''
+    start, stop, _ = slice(start, stop).indices(raw_data_earray.nrows)
+    transform = get_raw_data_transform(raw_data_earray)
+    if transform is None or stop <= start:
+        return raw_data_earray.read(start=start, stop=stop)
+    block_start = start - start % transform.block_size  # decoding starts at the beginning of a block
+    return transform.decode(raw_data_earray.read(start=block_start, stop=stop), word_offset=block_start)[start - block_start:]
+
+
+def get_meta_data_layout_version(meta_data_table):
+    '''Returns the layout version of the meta data table.
+    '''
+    try:
+        return int(meta_data_table.attrs.layout_version)
+    except AttributeError:
+        return 1
+
+
+def read_meta_data(h5_file, start=None, stop=None):
+    '''Reads the meta data and returns an array with 64-bit word indices.
+
+    Meta data with 32-bit word indices (layout version 1) is supported. The word indices, which wrap around after 2**32 words,
+    are recalculated from the data length.
+
+    Parameters
+    ----------
+    h5_file : file, table
+        Raw data file object or meta data table.
+    start, stop : int
+        Range of readouts.
+
+    Returns
+    -------
+    meta_data : numpy.array
+        Meta data array.
+    '''
+    if isinstance(h5_file, tb.file.File):
+        meta_data_table = h5_file.root.meta_data
+    else:
+        meta_data_table = h5_file
+    meta_data = meta_data_table.read(start=start, stop=stop)
+    if get_meta_data_layout_version(meta_data_table) >= 2:
+        return meta_data
+    # 32-bit word indices
+    start, stop, _ = slice(start, stop).indices(meta_data_table.nrows)
+    dtype = [(name, np.uint64) if name in ('index_start', 'index_stop') else (name, meta_data.dtype[name]) for name in meta_data.dtype.names]
+    meta_data = meta_data.astype(dtype)
+    if meta_data.shape[0] == 0:
+        return meta_data
+    data_length = meta_data_table.read(stop=stop, field='data_length').astype(np.uint64)
+    index_stop = np.cumsum(data_length, dtype=np.uint64) + np.uint64(meta_data_table[0]['index_start'])
+    meta_data['index_stop'] = index_stop[start:stop]
+    meta_data['index_start'] = meta_data['index_stop'] - meta_data['data_length']
+    return meta_data
+
+
+class RunSummary(object):
+    '''Accumulates a compact summary of the raw data: occupancy maps of the Mimosa26 planes,
+    time series of the data rate, trigger rate and data loss, and the totals.
+
+    The summary is stored in the summary group of the raw data file (see save()), which allows
+    selecting runs without reading the raw data.
+
+    Parameters
+    ----------
+    time_bin : float
+        Width of the time bins of the time series in seconds.
+    occupancy : bool
+        If True, the raw data is interpreted (see pymosa.online.histogram) to fill the occupancy maps.
+    '''
+
+    def __init__(self, time_bin=1.0, occupancy=True):
+        self.time_bin = time_bin
+        self.occupancy = occupancy
+        self._first_bin = None
+        self._buffer = self._allocate(0)  # time bins with spare capacity, self._rate is a view of the used time bins
+        self._start = 0
+        self._rate = self._buffer
+        if self.occupancy:
+            from pymosa.online import histogram  # numba
+            self._histogram = histogram
+            self.occ_hist = np.zeros(shape=(1152, 576, 6), dtype=np.uint32)
+            # interpreter state of each plane, see pymosa.online.OccupancyHistogramming
+            self._interpreter_state = (np.zeros(shape=(6,), dtype=np.int64), np.zeros(shape=(6,), dtype=np.uint32), np.ones(shape=(6,), dtype=np.bool_),
+                                       np.zeros(shape=(6,), dtype=np.uint32), np.zeros(shape=(6,), dtype=np.int64), np.zeros(shape=(6,), dtype=np.int64),
+                                       np.zeros(shape=(6,), dtype=np.uint32), np.zeros(shape=(6,), dtype=np.uint32), np.zeros(shape=(6,), dtype=np.uint32),
+                                       -1 * np.ones(shape=(6,), dtype=np.int64))
+            self._interpreter_state = self._histogram(np.zeros(shape=(0,), dtype=np.uint32), self.occ_hist, *self._interpreter_state)  # compile before data taking
+        else:
+            self.occ_hist = None
+
+    @staticmethod
+    def _allocate(n_bins):
+        rate = np.zeros(shape=(n_bins,), dtype=tb.dtype_from_descr(RateTable))
+        rate['trigger_number_first'] = -1
+        rate['trigger_number_last'] = -1
+        return rate
+
+    def _extend(self, first_bin, last_bin):
+        if self._first_bin is None:
+            self._first_bin = first_bin
+        n_bins = self._rate.shape[0]
+        n_prepend = max(0, self._first_bin - first_bin)
+        n_append = max(0, last_bin - (self._first_bin + n_bins - 1))
+        if not n_prepend and not n_append:
+            return
+        if n_prepend > self._start or self._start + n_bins + n_append > self._buffer.shape[0]:
+            # grow geometrically, a new time bin is appended every time_bin seconds
+            buffer = self._allocate(max(2 * self._buffer.shape[0], n_prepend + n_bins + n_append))
+            buffer[n_prepend:n_prepend + n_bins] = self._rate
+            self._buffer = buffer
+            self._start = n_prepend
+        self._start -= n_prepend
+        self._first_bin -= n_prepend
+        self._rate = self._buffer[self._start:self._start + n_prepend + n_bins + n_append]
+        # timestamps of the new time bins
+        self._rate['timestamp'][:n_prepend] = (self._first_bin + np.arange(n_prepend)) * self.time_bin
+        self._rate['timestamp'][n_prepend + n_bins:] = (self._first_bin + n_prepend + n_bins + np.arange(n_append)) * self.time_bin
+
+    def add(self, raw_data, meta_data):
+        '''Adds the raw data and meta data of one or more readouts.
+
+        Parameters
+        ----------
+        raw_data : numpy.array
+            Raw data array of the readouts.
+        meta_data : numpy.array
+            Meta data of the readouts. If the readout statistics (layout version 3) are missing, they are calculated from the raw data.
+        '''
+        if meta_data.shape[0] == 0:
+            return
+        data_length = meta_data['data_length'].astype(np.uint64)
+        if 'n_trigger_words' in meta_data.dtype.names:
+            readout_statistics = meta_data
+        else:
+            readout_statistics = get_readout_statistics(raw_data, data_length)
+        bins = np.floor(meta_data['timestamp_start'] / self.time_bin).astype(np.int64)
+        self._extend(int(bins.min()), int(bins.max()))
+        index = bins - self._first_bin
+        rate = self._rate
+        np.add.at(rate['n_readouts'], index, 1)
+        np.add.at(rate['n_words'], index, data_length)
+        np.add.at(rate['n_trigger_words'], index, readout_statistics['n_trigger_words'].astype(np.uint64))
+        np.add.at(rate['n_m26_words'], index, readout_statistics['n_m26_words'].astype(np.uint64))
+        for plane in range(6):
+            np.add.at(rate['n_data_loss'][:, plane], index, np.bitwise_and(np.right_shift(readout_statistics['data_loss'], plane), 1).astype(np.uint32))
+        np.add.at(rate['n_errors'], index, (meta_data['error'] != 0).astype(np.uint32))
+        # first and last trigger number of each time bin
+        trigger_selection = np.flatnonzero(np.bitwise_and(raw_data, 0x80000000))
+        if trigger_selection.shape[0]:
+            trigger_numbers = np.bitwise_and(raw_data[trigger_selection], 0x7FFFFFFF).astype(np.int64)
+            trigger_index = index[np.searchsorted(np.cumsum(data_length), trigger_selection, side='right')]
+            bin_index, first = np.unique(trigger_index, return_index=True)
+            new_bin = rate['trigger_number_first'][bin_index] == -1
+            rate['trigger_number_first'][bin_index[new_bin]] = trigger_numbers[first[new_bin]]
+            bin_index, last = np.unique(trigger_index[::-1], return_index=True)
+            rate['trigger_number_last'][bin_index] = trigger_numbers[::-1][last]
+        if self.occupancy:
+            self._interpreter_state = self._histogram(raw_data, self.occ_hist, *self._interpreter_state)
+
+    def get_totals(self):
+        '''Returns the totals.
+
+        Returns
+        -------
+        totals : dict
+            Number of readouts, words, trigger words and Mimosa26 words per plane, number of readouts with data loss per plane and with error flag,
+            first and last timestamp, first and last trigger number (-1 if no trigger word) and number of hits per plane (if occupancy is enabled).
+        '''
+        rate = self._rate[self._rate['n_readouts'] != 0]
+        triggers = self._rate[self._rate['trigger_number_first'] != -1]
+        totals = dict(
+            n_readouts=int(rate['n_readouts'].sum()),
+            n_words=int(rate['n_words'].sum()),
+            n_trigger_words=int(rate['n_trigger_words'].sum()),
+            n_m26_words=rate['n_m26_words'].sum(axis=0).tolist(),
+            n_data_loss=rate['n_data_loss'].sum(axis=0).tolist(),
+            n_errors=int(rate['n_errors'].sum()),
+            timestamp_start=float(rate['timestamp'][0]) if rate.shape[0] else 0.0,
+            timestamp_stop=float(rate['timestamp'][-1] + self.time_bin) if rate.shape[0] else 0.0,
+            trigger_number_first=int(triggers['trigger_number_first'][0]) if triggers.shape[0] else -1,
+            trigger_number_last=int(triggers['trigger_number_last'][-1]) if triggers.shape[0] else -1
+        )
+        if self.occupancy:
+            totals['n_hits'] = self.occ_hist.sum(axis=(0, 1), dtype=np.uint64).tolist()
+        return totals
+
+    def save(self, h5_file, filters=None):
+        '''Stores the summary to the summary group of the raw data file, an existing summary is replaced.
+        '''
+        if 'summary' in h5_file.root:
+            h5_file.remove_node(h5_file.root, 'summary', recursive=True)
+        summary_group = h5_file.create_group(h5_file.root, name='summary', title='summary')
+        summary_group._v_attrs.time_bin = self.time_bin
+        for key, value in self.get_totals().items():
+            setattr(summary_group._v_attrs, key, value)
+        rate_table = h5_file.create_table(summary_group, name='rate', description=RateTable, title='rate', filters=filters, expectedrows=max(1, self._rate.shape[0]))
+        rate_table.append(self._rate)
+        rate_table.flush()
+        if self.occupancy:
+            occupancy_carray = h5_file.create_carray(summary_group, name='occupancy', obj=self.occ_hist, title='occupancy (column, row, plane)', filters=filters)
+            occupancy_carray.flush()
+
+    @classmethod
+    def load(cls, h5_file, occupancy=True):
+        '''Loads the summary of a raw data file, e.g. to continue the summary of an existing file.
+        '''
+        summary_group = h5_file.root.summary
+        summary = cls(time_bin=float(summary_group._v_attrs.time_bin), occupancy=occupancy and 'occupancy' in summary_group)
+        rate = summary_group.rate[:]
+        if rate.shape[0]:
+            summary._first_bin = int(np.round(rate['timestamp'][0] / summary.time_bin))
+            summary._buffer = rate
+            summary._rate = rate
+        if summary.occupancy:
+            summary.occ_hist[:] = summary_group.occupancy[:]
+        return summary
+
+
+def create_run_summary(filename, time_bin=1.0, occupancy=True, block_size=2**22):
+    '''Creates the summary of an existing raw data file, see RunSummary.
+
+    An existing summary is replaced.
+    '''
+    summary = RunSummary(time_bin=time_bin, occupancy=occupancy)
+    with M26RawDataReader(filename, block_size=block_size) as reader:
+        for raw_data, meta_data in reader.iter_blocks():
+            summary.add(raw_data, meta_data)
+    with tb.open_file(filename, mode='a') as h5_file:
+        summary.save(h5_file, filters=h5_file.root.meta_data.filters)
+    logging.info('Created summary of raw data file %s', filename)
+    return summary
+
+
+class M26RawDataReader(object):
+    '''Reading raw data files block by block in constant memory.
+
+    The raw data is read in blocks of whole readouts (using the word indices of the meta data).
+    The next block is read by a separate thread while the current block is processed.
+    Only the word indices of the readouts (16 bytes per readout) are kept in memory, the meta data is read block by block.
+    The meta_data attribute reads the whole meta data on first access.
+
+    Parameters
+    ----------
+    filename : str
+        Filename of the raw data file.
+    block_size : int
+        Maximum number of raw data words per block. A block contains at least one readout.
+    prefetch : bool
+        If True, the next block is read in advance by a separate thread.
+    mmap : bool
+        If True and the raw data is not compressed, the raw data is read via memory-mapping of the file.
+
+    Usage
+    -----
+    with M26RawDataReader('run_1_M26_TELESCOPE.h5') as reader:
+        for raw_data, meta_data in reader.iter_blocks():
+            ...
+    '''
+
+    def __init__(self, filename, block_size=2**22, prefetch=True, mmap=False):
+        self.filename = filename
+        self.block_size = block_size
+        self.prefetch = prefetch
+        self.h5_file = tb.open_file(filename, mode='r')
+        self.raw_data_earray = get_raw_data(self.h5_file)
+        self._index_start, self._index_stop = self._read_word_indices()
+        self._meta_data = None
+        if 'scan_parameter_ranges' in self.h5_file.root:
+            self.scan_parameter_ranges = self.h5_file.root.scan_parameter_ranges[:]
+        elif 'scan_parameters' in self.h5_file.root:  # files without scan parameter ranges
+            self.scan_parameter_ranges = get_scan_parameter_ranges(self.h5_file.root.scan_parameters[:], {'index_start': self._index_start, 'index_stop': self._index_stop})
+        else:
+            self.scan_parameter_ranges = None
+        self._scan_parameters = None
+        self._transform = get_raw_data_transform(self.raw_data_earray)
+        self._mmap = None
+        if mmap:
+            filters = self.raw_data_earray.filters
+            if filters.complevel or filters.fletcher32 or isinstance(self.raw_data_earray, DemultiplexedRawData):
+                logging.warning('Raw data of %s is compressed or demultiplexed, memory-mapping is not possible', filename)
+            else:
+                self._mmap = np.memmap(filename, dtype=np.uint8, mode='r')
+                self._chunk_offsets = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False  # do not hide exceptions
+
+    def close(self):
+        self._mmap = None
+        if self.h5_file is not None:
+            self.h5_file.close()
+            self.h5_file = None
+
+    @property
+    def n_words(self):
+        return self.raw_data_earray.nrows
+
+    @property
+    def n_readouts(self):
+        return self._index_stop.shape[0]
+
+    @property
+    def meta_data(self):
+        '''Meta data of all readouts, read on first access.
+        '''
+        if self._meta_data is None:
+            self._meta_data = self.get_meta_data()
+        return self._meta_data
+
+    def _read_word_indices(self):
+        # 64-bit word indices of every readout, see read_meta_data()
+        meta_data_table = self.h5_file.root.meta_data
+        if get_meta_data_layout_version(meta_data_table) >= 2:
+            return meta_data_table.col('index_start'), meta_data_table.col('index_stop')
+        data_length = meta_data_table.col('data_length').astype(np.uint64)
+        index_stop = np.cumsum(data_length, dtype=np.uint64)
+        if meta_data_table.nrows:
+            index_stop += np.uint64(meta_data_table[0]['index_start'])
+        return index_stop - data_length, index_stop
+
+    def get_meta_data(self, start=None, stop=None):
+        '''Reads the meta data with 64-bit word indices (see read_meta_data()).
+
+        Parameters
+        ----------
+        start, stop : int
+            Range of readouts.
+
+        Returns
+        -------
+        meta_data : numpy.array
+            Meta data array.
+        '''
+        start, stop, _ = slice(start, stop).indices(self.n_readouts)
+        meta_data = self.h5_file.root.meta_data.read(start=start, stop=stop)
+        if meta_data.dtype['index_start'] != np.uint64:  # 32-bit word indices (layout version 1)
+            meta_data = meta_data.astype([(name, np.uint64) if name in ('index_start', 'index_stop') else (name, meta_data.dtype[name]) for name in meta_data.dtype.names])
+        meta_data['index_start'] = self._index_start[start:stop]
+        meta_data['index_stop'] = self._index_stop[start:stop]
+        return meta_data
+
+    def read(self, start=None, stop=None):
+        '''Reads raw data words.
+
+        Parameters
+        ----------
+        start, stop : int
+            Range of raw data words.
+
+        Returns
+        -------
+        raw_data : numpy.array
+            Raw data array.
+        '''
+        start, stop, _ = slice(start, stop).indices(self.n_words)
+        if self._transform is not None and stop > start:
+            block_start = start - start % self._transform.block_size  # decoding starts at the beginning of a block
+            transform = type(self._transform)(block_size=self._transform.block_size)  # new state, read() is also called by the prefetch thread
+            return transform.decode(self._read(block_start, stop), word_offset=block_start)[start - block_start:]
+        return self._read(start, stop)
+
+    def _read(self, start, stop):
+        if self._mmap is None or stop <= start:
+            return self.raw_data_earray.read(start=start, stop=stop)
+        # read chunk by chunk from memory-mapped file
+        chunk_size = self.raw_data_earray.chunkshape[0]
+        dtype = np.dtype(self.raw_data_earray.atom.dtype).newbyteorder('<' if self.raw_data_earray.byteorder == 'little' else '>')
+        raw_data = np.empty(shape=(stop - start,), dtype=self.raw_data_earray.atom.dtype)
+        for chunk_start in range(start - start % chunk_size, stop, chunk_size):
+            offset = self._chunk_offsets.get(chunk_start)
+            if offset is None:
+                offset = self.raw_data_earray.chunk_info((chunk_start,)).offset
+                self._chunk_offsets[chunk_start] = offset
+            index_start = max(start, chunk_start)
+            index_stop = min(stop, chunk_start + chunk_size)
+            raw_data[index_start - start:index_stop - start] = self._mmap[offset + (index_start - chunk_start) * dtype.itemsize:offset + (index_stop - chunk_start) * dtype.itemsize].view(dtype)
+        return raw_data
+
+    def read_stream(self, stream, start=None, stop=None):
+        '''Reads the raw data words of a single Mimosa26 plane or the trigger words.
+
+        If the raw data is demultiplexed (see DemultiplexedRawData), only the words of the stream are read.
+
+        Parameters
+        ----------
+        stream : int, str
+            Plane number or stream name ('trigger', 'other').
+        start, stop : int
+            Range of raw data words.
+        '''
+        if isinstance(self.raw_data_earray, DemultiplexedRawData):
+            return self.raw_data_earray.read_stream(stream, start=start, stop=stop)
+        raw_data = self.read(start=start, stop=stop)
+        return raw_data[get_raw_data_stream_ids(raw_data) == get_raw_data_stream_id(stream)]
+
+    def get_readout_index(self, word_index):
+        '''Returns the index of the readout containing the given word index.
+        '''
+        return int(np.searchsorted(self._index_stop, word_index, side='right'))
+
+    def find_trigger(self, trigger_number):
+        '''Returns the word indices of the trigger words with the given trigger number using the trigger index.
+
+        Returns
+        -------
+        word_indices : numpy.array
+            Word indices of the trigger words, can be passed to get_readout_index().
+        '''
+        if 'trigger_index' not in self.h5_file.root:
+            raise ValueError('No trigger index in %s, see create_raw_data_index()' % self.filename)
+        return self.h5_file.root.trigger_index.read_where('trigger_number == %d' % trigger_number, field='word_index')
+
+    def get_frame_index(self, plane):
+        '''Returns the frame index of a plane (word indices of every Nth frame header).
+        '''
+        if 'frame_index' not in self.h5_file.root:
+            raise ValueError('No frame index in %s, see create_raw_data_index()' % self.filename)
+        return self.h5_file.root.frame_index.read_where('plane == %d' % plane)
+
+    @property
+    def scan_parameter_names(self):
+        if self.scan_parameter_ranges is None:
+            return ()
+        return tuple(name for name in self.scan_parameter_ranges.dtype.names if name not in scan_parameter_range_columns)
+
+    @property
+    def scan_parameters(self):
+        '''Scan parameter values of every readout, None if there are no scan parameters.
+        '''
+        if self.scan_parameter_ranges is None:
+            return None
+        if self._scan_parameters is None:
+            values = self.scan_parameter_ranges[list(self.scan_parameter_names)]
+            self._scan_parameters = np.repeat(values, (self.scan_parameter_ranges['readout_stop'] - self.scan_parameter_ranges['readout_start']).astype(np.int64))
+        return self._scan_parameters
+
+    def get_scan_parameter_ranges(self, names=None):
+        '''Returns the readout ranges with constant scan parameter values.
+
+        Parameters
+        ----------
+        names : list
+            Names of the scan parameters. If None, all scan parameters are used.
+
+        Returns
+        -------
+        scan_parameter_ranges : list
+            List of tuples (scan parameter dict, first readout, last readout + 1).
+        '''
+        if self.scan_parameter_ranges is None or self.scan_parameter_ranges.shape[0] == 0:
+            return [({}, 0, self.n_readouts)] if self.n_readouts else []
+        if names is None:
+            names = self.scan_parameter_names
+        values = self.scan_parameter_ranges[list(names)]
+        # merge adjacent ranges with same values of the given scan parameters
+        changes = np.concatenate(([0], np.where(values[1:] != values[:-1])[0] + 1, [values.shape[0]]))
+        readout_start, readout_stop = self.scan_parameter_ranges['readout_start'].astype(np.int64), self.scan_parameter_ranges['readout_stop'].astype(np.int64)
+        return [(dict(zip(names, values[index_start].tolist())), int(readout_start[index_start]), int(readout_stop[index_stop - 1]))
+                for index_start, index_stop in zip(changes[:-1].tolist(), changes[1:].tolist())]
+
+    def find_scan_parameter_ranges(self, **scan_parameters):
+        '''Returns the ranges of readouts and raw data words with the given scan parameter values.
+
+        Parameters
+        ----------
+        scan_parameters : dict
+            Scan parameter values, e.g. find_scan_parameter_ranges(TRIGGER_DATA_DELAY=5).
+
+        Returns
+        -------
+        scan_parameter_ranges : numpy.array
+            Scan parameter ranges with the scan parameter values, the range of readouts (readout_start, readout_stop) and the range of raw data words (index_start, index_stop).
+        '''
+        if self.scan_parameter_ranges is None:
+            raise ValueError('No scan parameters in %s' % self.filename)
+        diff = set(scan_parameters).difference(self.scan_parameter_names)
+        if diff:
+            raise ValueError('Unknown scan parameter(s): %s' % ', '.join(diff))
+        selection = np.ones(shape=self.scan_parameter_ranges.shape, dtype=np.bool_)
+        for name, value in scan_parameters.items():
+            selection &= self.scan_parameter_ranges[name] == value
+        return self.scan_parameter_ranges[selection]
+
+    def get_block_ranges(self, start=None, stop=None, block_size=None):
+        '''Returns the readout ranges of blocks with a maximum number of raw data words.
+        '''
+        start, stop, _ = slice(start, stop).indices(self.n_readouts)
+        if block_size is None:
+            block_size = self.block_size
+        block_ranges = []
+        while start < stop:
+            block_stop = start + int(np.searchsorted(self._index_stop[start:stop], self._index_start[start] + block_size, side='right'))
+            block_stop = max(block_stop, start + 1)  # at least one readout
+            block_ranges.append((start, block_stop))
+            start = block_stop
+        return block_ranges
+
+    def iter_blocks(self, start=None, stop=None, block_size=None):
+        '''Iterates over blocks of whole readouts.
+
+        Parameters
+        ----------
+        start, stop : int
+            Range of readouts.
+        block_size : int
+            Maximum number of raw data words per block. If None, the block size of the reader is used.
+
+        Returns
+        -------
+        Generator of tuples (raw data array, meta data array). The word indices of the meta data refer to the whole raw data array.
+        '''
+        return self._iter_block_data(self.get_block_ranges(start=start, stop=stop, block_size=block_size))
+
+    def iter_readouts(self, start=None, stop=None):
+        '''Iterates over readouts.
+
+        Returns
+        -------
+        Generator of tuples (raw data array, meta data) for every readout.
+        '''
+        for raw_data, meta_data in self.iter_blocks(start=start, stop=stop):
+            offset = meta_data['index_start'][0]
+            for readout in meta_data:
+                yield raw_data[readout['index_start'] - offset:readout['index_stop'] - offset], readout
+
+    def iter_scan_parameters(self, names=None, block_size=None):
+        '''Iterates over blocks of whole readouts, blocks do not extend over changes of the scan parameter values.
+
+        Returns
+        -------
+        Generator of tuples (scan parameter dict, raw data array, meta data array).
+        '''
+        block_ranges, scan_parameters = [], []
+        for values, start, stop in self.get_scan_parameter_ranges(names=names):
+            ranges = self.get_block_ranges(start=start, stop=stop, block_size=block_size)
+            block_ranges.extend(ranges)
+            scan_parameters.extend([values] * len(ranges))
+        for values, (raw_data, meta_data) in zip(scan_parameters, self._iter_block_data(block_ranges)):
+            yield values, raw_data, meta_data
+
+    def _read_block(self, start, stop):
+        meta_data = self.get_meta_data(start, stop)
+        return self.read(start=meta_data['index_start'][0], stop=meta_data['index_stop'][-1]), meta_data
+
+    def _iter_block_data(self, block_ranges):
+        if not self.prefetch:
+            for start, stop in block_ranges:
+                yield self._read_block(start, stop)
+            return
+        block_queue = Queue(maxsize=1)  # read only one block in advance
+        stop_event = Event()
+
+        def put(item):
+            while not stop_event.is_set():  # stop if the generator is closed
+                try:
+                    block_queue.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    pass
+            return False
+
+        def prefetch():
+            try:
+                for start, stop in block_ranges:
+                    if not put((self._read_block(start, stop), None)):
+                        return
+            except Exception:
+                put((None, sys.exc_info()))
+            else:
+                put((None, None))
+
+        prefetch_thread = Thread(target=prefetch, name='RawDataPrefetchThread')
+        prefetch_thread.daemon = True
+        prefetch_thread.start()
+        try:
+            while True:
+                block, exc_info = block_queue.get()
+                if block is None:
+                    if exc_info is not None:
+                        raise exc_info[1].with_traceback(exc_info[2])
+                    break
+                yield block
+        finally:
+            stop_event.set()
+            prefetch_thread.join()
+
+
+def get_raw_data_filenames(filename):
+    '''Returns the raw data files of a run, which is split into several files by M26RawDataFile
+    (e.g. run_1_M26_TELESCOPE.h5, run_1_M26_TELESCOPE_1.h5, ... by file rotation or new files for scan parameters).
+
+    Only files with the suffixes of M26RawDataFile are used: the file index of the file rotation (e.g. _1) and
+    the scan parameter values of new files (e.g. _PARAM_1 or _PARAM_1_2), which are checked against the scan parameter names of the file.
+    The files are sorted by the timestamp of the first readout. Files without readouts are omitted.
+
+    Parameters
+    ----------
+    filename : str
+        Filename of the run without extension or filename of the first file.
+
+    Returns
+    -------
+    filenames : list
+        List of raw data filenames.
+    '''
+    if os.path.splitext(filename)[1].strip().lower() == '.h5':
+        filename = os.path.splitext(filename)[0]
+    base = re.escape(os.path.basename(filename))
+    filenames = []
+    for h5_filename in glob.glob(glob.escape(filename) + '*.h5'):
+        basename = os.path.basename(h5_filename)
+        if not re.match(base + r'(_.+)?\.h5$', basename):  # other filename (e.g. run_1_M26_TELESCOPE2.h5)
+            continue
+        with tb.open_file(h5_filename, mode='r') as in_file_h5:
+            if ('raw_data' not in in_file_h5.root and 'raw_data_streams' not in in_file_h5.root) or 'meta_data' not in in_file_h5.root:  # not a raw data file (e.g. analysis results)
+                continue
+            if in_file_h5.root.meta_data.nrows == 0:
+                continue
+            if not re.match(base + r'(_\d+)?\.h5$', basename):  # new file for scan parameter values, see M26RawDataFile._update_scan_parameters()
+                if 'scan_parameter_ranges' in in_file_h5.root:
+                    scan_parameter_names = [name for name in in_file_h5.root.scan_parameter_ranges.colnames if name not in scan_parameter_range_columns]
+                elif 'scan_parameters' in in_file_h5.root:
+                    scan_parameter_names = in_file_h5.root.scan_parameters.colnames
+                else:
+                    scan_parameter_names = []
+                scan_parameter_pattern = base + r'(_(%s)_-?\d+)+(_\d+)?\.h5$' % '|'.join(re.escape(name) for name in scan_parameter_names)
+                if not scan_parameter_names or not re.match(scan_parameter_pattern, basename):  # other run (e.g. run_1_M26_TELESCOPE_TEST.h5)
+                    continue
+            filenames.append((float(in_file_h5.root.meta_data[0]['timestamp_start']), h5_filename))
+    return [h5_filename for _, h5_filename in sorted(filenames)]
+
+
+class M26RawDataView(M26RawDataReader):
+    '''View of a run, which is split into several raw data files, as a single raw data file.
+
+    The raw data and meta data of the files are concatenated with continuous word and readout indices
+    without copying the data. The view provides the methods of M26RawDataReader.
+    If the scan parameters are jumping back and forth, the readouts of one file stay together.
+    If the files have different meta data layouts (e.g. layout version 1 and 3, see MetaTable), the meta data
+    contains only the fields, which are common to all files.
+
+    Parameters
+    ----------
+    filename : str, list
+        Filename of the run without extension or filename of the first file (see get_raw_data_filenames()) or list of raw data filenames.
+    block_size, prefetch, mmap :
+        See M26RawDataReader.
+
+    Usage
+    -----
+    with M26RawDataView('run_1_M26_TELESCOPE') as view:
+        for raw_data, meta_data in view.iter_blocks():
+            ...
+    '''
+
+    def __init__(self, filename, block_size=2**22, prefetch=True, mmap=False):
+        self.filenames = list(filename) if isinstance(filename, (list, tuple)) else get_raw_data_filenames(filename)
+        if not self.filenames:
+            raise IOError('No raw data files found: %s' % filename)
+        self.filename = self.filenames[0]
+        self.block_size = block_size
+        self.prefetch = prefetch
+        self.h5_file = None
+        self.readers = []
+        try:
+            for h5_filename in self.filenames:
+                self.readers.append(M26RawDataReader(h5_filename, prefetch=False, mmap=mmap))
+        except Exception:
+            self.close()
+            raise
+        # offsets of the files
+        self.word_offsets = np.cumsum([0] + [reader.n_words for reader in self.readers], dtype=np.uint64)
+        self.readout_offsets = np.cumsum([0] + [reader.n_readouts for reader in self.readers], dtype=np.uint64)
+        self._index_start = np.concatenate([reader._index_start + word_offset for reader, word_offset in zip(self.readers, self.word_offsets)])
+        self._index_stop = np.concatenate([reader._index_stop + word_offset for reader, word_offset in zip(self.readers, self.word_offsets)])
+        self._meta_data = None
+        try:
+            self._meta_data_dtype = self._get_meta_data_dtype()
+        except Exception:
+            self.close()
+            raise
+        if all(reader.scan_parameter_ranges is not None for reader in self.readers):
+            scan_parameter_ranges = []
+            for reader, word_offset, readout_offset in zip(self.readers, self.word_offsets, self.readout_offsets):
+                reader_scan_parameter_ranges = reader.scan_parameter_ranges.copy()
+                reader_scan_parameter_ranges['readout_start'] += readout_offset
+                reader_scan_parameter_ranges['readout_stop'] += readout_offset
+                reader_scan_parameter_ranges['index_start'] += word_offset
+                reader_scan_parameter_ranges['index_stop'] += word_offset
+                scan_parameter_ranges.append(reader_scan_parameter_ranges)
+            self.scan_parameter_ranges = np.concatenate(scan_parameter_ranges)
+        else:
+            self.scan_parameter_ranges = None
+        self._scan_parameters = None
+
+    def close(self):
+        for reader in self.readers:
+            reader.close()
+        self.readers = []
+
+    @property
+    def n_words(self):
+        return int(self.word_offsets[-1])
+
+    def _iter_file_ranges(self, start, stop):
+        # yields reader and range of raw data words within the file
+        start, stop, _ = slice(start, stop).indices(self.n_words)
+        for index in range(max(0, int(np.searchsorted(self.word_offsets, start, side='right')) - 1), len(self.readers)):
+            word_offset = int(self.word_offsets[index])
+            if word_offset >= stop:
+                break
+            yield self.readers[index], max(start - word_offset, 0), min(stop, int(self.word_offsets[index + 1])) - word_offset
+
+    def _get_meta_data_dtype(self):
+        # fields of the meta data, which are common to all files
+        dtypes = [reader.get_meta_data(0, 0).dtype for reader in self.readers]
+        names = [name for name in dtypes[0].names if all(name in dtype.names for dtype in dtypes[1:])]
+        for h5_filename, dtype in zip(self.filenames, dtypes):
+            missing = [name for name in meta_data_layout_version_1_columns if name not in dtype.names]
+            if missing:
+                raise ValueError('Incompatible meta data in %s, missing field(s): %s' % (h5_filename, ', '.join(missing)))
+        if len(names) < max(len(dtype.names) for dtype in dtypes):
+            logging.info('Different meta data layouts in %s, using the common fields: %s', ', '.join(self.filenames), ', '.join(names))
+        return np.dtype([(name, dtypes[0][name]) for name in names])
+
+    def get_meta_data(self, start=None, stop=None):
+        start, stop, _ = slice(start, stop).indices(self.n_readouts)
+        meta_data = []
+        for index in range(min(max(0, int(np.searchsorted(self.readout_offsets, start, side='right')) - 1), len(self.readers) - 1), len(self.readers)):
+            readout_offset = int(self.readout_offsets[index])
+            if readout_offset >= stop and meta_data:
+                break
+            reader_meta_data = self.readers[index].get_meta_data(start=max(start - readout_offset, 0), stop=max(min(stop, int(self.readout_offsets[index + 1])) - readout_offset, 0))
+            if reader_meta_data.dtype != self._meta_data_dtype:  # different meta data layout
+                common_meta_data = np.empty(shape=reader_meta_data.shape, dtype=self._meta_data_dtype)
+                for name in self._meta_data_dtype.names:
+                    common_meta_data[name] = reader_meta_data[name]
+                reader_meta_data = common_meta_data
+            reader_meta_data['index_start'] += self.word_offsets[index]
+            reader_meta_data['index_stop'] += self.word_offsets[index]
+            meta_data.append(reader_meta_data)
+        return np.concatenate(meta_data)
+
+    def read(self, start=None, stop=None):
+        raw_data = [reader.read(start=file_start, stop=file_stop) for reader, file_start, file_stop in self._iter_file_ranges(start, stop)]
+        return np.concatenate(raw_data) if raw_data else np.zeros(shape=(0,), dtype=np.uint32)
+
+    def read_stream(self, stream, start=None, stop=None):
+        raw_data = [reader.read_stream(stream, start=file_start, stop=file_stop) for reader, file_start, file_stop in self._iter_file_ranges(start, stop)]
+        return np.concatenate(raw_data) if raw_data else np.zeros(shape=(0,), dtype=np.uint32)
+
+    def find_trigger(self, trigger_number):
+        return np.concatenate([reader.find_trigger(trigger_number) + word_offset for reader, word_offset in zip(self.readers, self.word_offsets)])
+
+    def get_frame_index(self, plane):
+        frame_index = []
+        for reader, word_offset in zip(self.readers, self.word_offsets):
+            reader_frame_index = reader.get_frame_index(plane)
+            reader_frame_index['word_index'] += word_offset
+            frame_index.append(reader_frame_index)
+        return np.concatenate(frame_index)
+
+
+class M26RawDataTailReader(object):
+    '''Following a raw data file, which is written in SWMR mode (see M26SWMRRawDataFile), requires h5py.
+
+    The new readouts are returned as soon as they are flushed by the writer.
+    In contrast to the data stream of the online monitor, no readouts are dropped.
+    If the reader is used in the writing process, the reader must be closed before the writer closes the file.
+
+    Parameters
+    ----------
+    filename : str
+        Filename of the raw data file.
+    block_size : int
+        Maximum number of raw data words per block. A block contains at least one readout.
+    poll_interval : float
+        Time in seconds between checks for new readouts.
+    timeout : float
+        Stop if there are no new readouts for the given time in seconds. If None, wait until stop() is called (e.g. by another thread).
+    start : int
+        Index of the first readout.
+
+    Usage
+    -----
+    with M26RawDataTailReader('run_1_M26_TELESCOPE.h5', timeout=10.0) as reader:
+        for raw_data, meta_data in reader.iter_blocks():
+            ...
+    '''
+    max_readouts = 2**16  # maximum number of readouts per block
+
+    def __init__(self, filename, block_size=2**22, poll_interval=0.1, timeout=None, start=0):
+        import h5py
+        self.filename = filename
+        self.block_size = block_size
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.h5_file = h5py.File(filename, mode='r', swmr=True)
+        self.raw_data_earray = self.h5_file['raw_data']
+        self.meta_data_table = self.h5_file['meta_data']
+        self.n_readouts = start  # index of the next readout
+        self._stop = Event()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False  # do not hide exceptions
+
+    def close(self):
+        if self.h5_file is not None:
+            self.h5_file.close()
+            self.h5_file = None
+
+    def stop(self):
+        '''Stops iter_blocks() and iter_readouts().
+        '''
+        self._stop.set()
+
+    def read_new(self, block_size=None):
+        '''Reads the new readouts.
+
+        Only readouts, whose raw data is completely written, are returned.
+
+        Returns
+        -------
+        raw_data, meta_data : numpy.array
+            Raw data and meta data of the new readouts up to the block size, None if there are no new readouts.
+        '''
+        if block_size is None:
+            block_size = self.block_size
+        self.meta_data_table.refresh()
+        self.raw_data_earray.refresh()
+        n_readouts = min(self.meta_data_table.shape[0], self.n_readouts + self.max_readouts)
+        if n_readouts <= self.n_readouts:
+            return None
+        meta_data = self.meta_data_table[self.n_readouts:n_readouts]
+        n_words = self.raw_data_earray.shape[0]
+        # readouts up to the block size, at least one readout
+        n_readouts = int(np.searchsorted(meta_data['index_stop'], min(n_words, int(meta_data['index_start'][0]) + block_size), side='right'))
+        if n_readouts == 0 and meta_data['index_stop'][0] <= n_words:
+            n_readouts = 1
+        if n_readouts == 0:
+            return None
+        meta_data = meta_data[:n_readouts]
+        raw_data = self.raw_data_earray[int(meta_data['index_start'][0]):int(meta_data['index_stop'][-1])]
+        self.n_readouts += n_readouts
+        return raw_data, meta_data
+
+    def iter_blocks(self, block_size=None):
+        '''Iterates over blocks of new readouts until stop() is called or the timeout is reached.
+
+        Yields
+        ------
+        raw_data, meta_data : numpy.array
+            Raw data and meta data of the block.
+        '''
+        time_last_data = time()
+        while not self._stop.is_set():
+            block = self.read_new(block_size=block_size)
+            if block is None:
+                if self.timeout is not None and time() - time_last_data >= self.timeout:
+                    break
+                self._stop.wait(self.poll_interval)
+                continue
+            time_last_data = time()
+            yield block
+
+    def iter_readouts(self):
+        '''Iterates over the new readouts until stop() is called or the timeout is reached.
+
+        Yields
+        ------
+        raw_data : numpy.array
+            Raw data of the readout.
+        meta_data : numpy.void
+            Meta data of the readout.
+        '''
+        for raw_data, meta_data in self.iter_blocks():
+            offset = meta_data['index_start'][0]
+            for readout in meta_data:
+                yield raw_data[readout['index_start'] - offset:readout['index_stop'] - offset], readout
 
 
 def generate_scan_parameter_description(scan_parameters):
@@ -322,3 +2818,53 @@ def generate_scan_parameter_description(scan_parameters):
     '''
     table_description = np.dtype([(key, tb.Int32Col(pos=idx)) for idx, key in enumerate(scan_parameters)])
     return table_description
+
+
+# readout range and word range of the scan_parameter_ranges table
+scan_parameter_range_columns = ('readout_start', 'readout_stop', 'index_start', 'index_stop')
+
+
+def generate_scan_parameter_ranges_description(scan_parameters):
+    '''Generate the description of the scan parameter ranges table: the scan parameter values, the range of readouts
+    (readout_start, readout_stop) and the range of raw data words (index_start, index_stop) with these values.
+
+    Parameters
+    ----------
+    scan_parameters : list, tuple
+        List of scan parameters names (strings).
+
+    Returns
+    -------
+    table_description : dict
+        Table description.
+    '''
+    table_description = np.dtype([(key, tb.Int32Col(pos=idx)) for idx, key in enumerate(scan_parameters)] +
+                                 [(key, tb.UInt64Col(pos=len(scan_parameters) + idx)) for idx, key in enumerate(scan_parameter_range_columns)])
+    return table_description
+
+
+def get_scan_parameter_ranges(scan_parameters, meta_data):
+    '''Returns the scan parameter ranges (see generate_scan_parameter_ranges_description()) from the scan parameter values of every readout.
+
+    Parameters
+    ----------
+    scan_parameters : numpy.array
+        Scan parameter values of every readout.
+    meta_data : numpy.array
+        Meta data.
+
+    Returns
+    -------
+    scan_parameter_ranges : numpy.array
+        Scan parameter ranges.
+    '''
+    names = scan_parameters.dtype.names
+    changes = np.concatenate(([0], np.where(scan_parameters[1:] != scan_parameters[:-1])[0] + 1, [scan_parameters.shape[0]])) if scan_parameters.shape[0] else np.zeros(shape=(1,), dtype=np.int64)
+    scan_parameter_ranges = np.zeros(shape=(changes.shape[0] - 1,), dtype=[(name, scan_parameters.dtype[name]) for name in names] + [(key, np.uint64) for key in scan_parameter_range_columns])
+    for name in names:
+        scan_parameter_ranges[name] = scan_parameters[name][changes[:-1]]
+    scan_parameter_ranges['readout_start'] = changes[:-1]
+    scan_parameter_ranges['readout_stop'] = changes[1:]
+    scan_parameter_ranges['index_start'] = meta_data['index_start'][changes[:-1]]
+    scan_parameter_ranges['index_stop'] = meta_data['index_stop'][changes[1:] - 1]
+    return scan_parameter_ranges
@@ -9,7 +9,7 @@ from matplotlib.backends.backend_pdf import PdfPages
 
 from pymosa.m26 import m26
 from pymosa import online as oa
-from pymosa.m26_raw_data import open_raw_data_file, send_meta_data
+from pymosa.m26_raw_data import open_raw_data_file
 from pymosa import plotting as plotting
 
 
@@ -58,12 +58,12 @@ class NoiseOccScan(m26):
         self.raw_data_file = open_raw_data_file(filename=self.run_filename,
                                                 mode='w',
                                                 title=os.path.basename(self.run_filename),
-                                                socket_address=self.send_data)
-        if self.raw_data_file.socket:
+                                                publisher=self.publisher)
+        if self.publisher:
             # send reset to indicate a new scan for the online monitor
-            send_meta_data(self.raw_data_file.socket, None, name='Reset')
+            self.publisher.send_meta_data(None, name='Reset')
 
-    def handle_data(self, data, new_file=False, flush=True):
+    def handle_data(self, data, new_file=False, flush=None):
         '''Handling of raw data and meta data during readout.
         '''
         for data_tuple in data:
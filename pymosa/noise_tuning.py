@@ -7,11 +7,9 @@ import numpy as np
 from tqdm import tqdm
 from matplotlib.backends.backend_pdf import PdfPages
 
-from basil.utils.BitLogic import BitLogic
-
 from pymosa.m26 import m26
 from pymosa import online as oa
-from pymosa.m26_raw_data import open_raw_data_file, send_meta_data
+from pymosa.m26_raw_data import open_raw_data_file
 from pymosa import plotting as plotting
 
 
@@ -72,8 +70,8 @@ class NoiseOccTuning(m26):
         # Set configuration
         self.dut['BIAS_DAC_ALL'][:] = ''.join(map(str, bias_dac_all[::-1]))
         # Write register
-        self.dut['JTAG'].scan_ir([BitLogic('01111')] * 6)
-        self.dut['JTAG'].scan_dr([self.dut['BIAS_DAC_ALL'][:]])[0]
+        self.remove_jtag_state()  # register is changed outside of configure_m26()
+        self.m26_jtag.scan_register('01111', [self.dut['BIAS_DAC_ALL'][:]])
 
     def deactivate_column(self, disable_columns):
         '''
@@ -87,8 +85,8 @@ class NoiseOccTuning(m26):
         # Set configuration
         self.dut['DIS_DISCRI_ALL'][:] = ''.join(map(str, dis_discri_all[::-1]))
         # Write register
-        self.dut['JTAG'].scan_ir([BitLogic('10001')] * 6)
-        self.dut['JTAG'].scan_dr([self.dut['DIS_DISCRI_ALL'][:]])[0]
+        self.remove_jtag_state()  # register is changed outside of configure_m26()
+        self.m26_jtag.scan_register('10001', [self.dut['DIS_DISCRI_ALL'][:]])
 
     def take_data(self, update_rate=1):
         with self.readout():
@@ -124,12 +122,12 @@ class NoiseOccTuning(m26):
         self.raw_data_file = open_raw_data_file(filename=self.run_filename,
                                                 mode='w',
                                                 title=os.path.basename(self.run_filename),
-                                                socket_address=self.send_data)
-        if self.raw_data_file.socket:
+                                                publisher=self.publisher)
+        if self.publisher:
             # send reset to indicate a new scan for the online monitor
-            send_meta_data(self.raw_data_file.socket, None, name='Reset')
+            self.publisher.send_meta_data(None, name='Reset')
 
-    def handle_data(self, data, new_file=False, flush=True):
+    def handle_data(self, data, new_file=False, flush=None):
         '''Handling of raw data and meta data during readout.
         '''
         for data_tuple in data:
@@ -144,6 +144,8 @@ def histogram(raw_data, occ_hist, m26_frame_ids, m26_frame_length, m26_data_loss
         if is_mimosa_data(raw_data_word):  # Check if word is from Mimosa26.
             # Check to which plane the data belongs
             plane_id = get_plane_number(raw_data_word) - 1  # The actual_plane if the actual word belongs to (0 to 5)
+            if plane_id < 0 or plane_id > 5:  # Invalid plane number
+                continue
             # In the following, interpretation of the raw data words of the actual plane
             # Check for data loss bit set by the M26 RX FSM
             if is_data_loss(raw_data_word):
@@ -1,16 +1,24 @@
 import numpy as np
+import zmq
 from zmq.utils import jsonapi
 
 from online_monitor.converter.transceiver import Transceiver
 from online_monitor.utils import utils
 from pymosa_mimosa26_interpreter import raw_data_interpreter
 
+from pymosa.m26_raw_data import decompress_data, get_topic_subscription
+
 
 class PymosaMimosa26(Transceiver):
 
     def setup_interpretation(self):
         analyze_m26_header_ids = self.config.get('analyze_m26_header_ids', [1, 2, 3, 4, 5, 6])
         self._raw_data_interpreter = raw_data_interpreter.RawDataInterpreter(analyze_m26_header_ids=analyze_m26_header_ids)
+        topic = self.config.get('topic', None)
+        if topic is not None:  # receive only the data of the topic, see send_data_topics of the telescope configuration
+            for actual_frontend in self.frontends:
+                actual_frontend[1].setsockopt(zmq.UNSUBSCRIBE, b'')
+                actual_frontend[1].setsockopt(zmq.SUBSCRIBE, get_topic_subscription(topic))
         self.n_hits = 0
         self.n_events = 0
 
@@ -21,9 +29,10 @@ class PymosaMimosa26(Transceiver):
             try:
                 dtype = self.meta_data.pop('dtype')
                 shape = self.meta_data.pop('shape')
+                compression = self.meta_data.pop('compression', None)
                 if self.meta_data:
                     try:
-                        raw_data_array = np.frombuffer(data, dtype=dtype).reshape(shape)
+                        raw_data_array = decompress_data(data, compression=compression, dtype=dtype, shape=shape)
                         return raw_data_array
                     except (KeyError, ValueError):  # KeyError happens if meta data read is omitted; ValueError if np.frombuffer fails due to wrong shape
                         return None
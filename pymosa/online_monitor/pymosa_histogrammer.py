@@ -63,8 +63,9 @@ class PymosaMimosa26Histogrammer(Transceiver):
             total_events_now = meta_data['n_events']
             self.events_last_readout = total_events_now
             ts_now = float(meta_data['timestamp_stop'])
+            prescale = meta_data.get('prescale', 1)  # number of readouts represented by this readout
             # Calculate readout per second with smoothing
-            recent_fps = 1.0 / (ts_now - self.ts_last_readout)
+            recent_fps = prescale / (ts_now - self.ts_last_readout)
             self.fps = self.fps * 0.95 + recent_fps * 0.05
             # Calulate hits per second with smoothing
             recent_hps = self.hits_last_readout * recent_fps
@@ -74,8 +75,8 @@ class PymosaMimosa26Histogrammer(Transceiver):
             self.eps = self.eps * 0.95 + recent_eps * 0.05
 
             self.ts_last_readout = ts_now
-            self.total_hits += total_hits_now
-            self.total_events += total_events_now
+            self.total_hits += total_hits_now * prescale  # estimate in case of prescaled data
+            self.total_events += total_events_now * prescale
 
             meta_data.update({'fps': self.fps, 'hps': self.hps, 'total_hits': self.total_hits, 'eps': self.eps, 'total_events': self.total_events})
             return [data[0][1]]
@@ -3,44 +3,44 @@
 import logging
 import time
 
-import numpy as np
-import tables as tb
 import zmq
 
 from online_monitor.utils.producer_sim import ProducerSim
 
+from pymosa.m26_raw_data import M26RawDataReader, compress_data
+
 
 class Pymosa(ProducerSim):
 
     def setup_producer_device(self):
         ProducerSim.setup_producer_device(self)
-        self.in_file_h5 = tb.open_file(self.config['data_file'], mode="r")
-        self.meta_data = self.in_file_h5.root.meta_data[:]
-        self.raw_data = self.in_file_h5.root.raw_data
-        self.n_readouts = self.meta_data.shape[0]
+        self.reader = M26RawDataReader(self.config['data_file'])
+        self.meta_data = self.reader.meta_data
+        self.n_readouts = self.reader.n_readouts
         self.total_data = 0  # amount of replayed data in MB
         self.time_start = time.time()  # calculate duration of replay
         self.time_end = 0  # calculate duration of replay
 
-        try:
-            self.scan_parameter_name = self.in_file_h5.root.scan_parameters.dtype.names
-            self.scan_parameters = self.in_file_h5.root.scan_parameters[:]
-        except tb.NoSuchNodeError:
+        if self.reader.scan_parameters is not None:
+            self.scan_parameter_name = self.reader.scan_parameters.dtype.names
+            self.scan_parameters = self.reader.scan_parameters
+        else:
             self.scan_parameter_name = 'No parameter'
             self.scan_parameters = None
 
-        self.readout_word_indeces = np.column_stack((self.meta_data['index_start'], self.meta_data['index_stop']))
+        self.readouts = self.reader.iter_readouts()  # raw data is read block by block
         self.actual_readout = 0
         self.last_readout_time = None
+        self.compression = self.config.get('compression', None)  # compression of the sent raw data, 'blosc2' or 'lz4'
 
     def get_data(self):  # Return the data of one readout
         if self.actual_readout < self.n_readouts:
-            index_start, index_stop = self.readout_word_indeces[self.actual_readout]
+            raw_data, meta_data = next(self.readouts)
             data = []
-            data.append(self.raw_data[index_start:index_stop])
-            data.extend((float(self.meta_data[self.actual_readout]['timestamp_start']),
-                         float(self.meta_data[self.actual_readout]['timestamp_stop']),
-                         int(self.meta_data[self.actual_readout]['error'])))
+            data.append(raw_data)
+            data.extend((float(meta_data['timestamp_start']),
+                         float(meta_data['timestamp_stop']),
+                         int(meta_data['error'])))
 
             # FIXME: Simple syncronization to replay with similar timing, does not really work
             now = time.time()
@@ -80,12 +80,17 @@ class Pymosa(ProducerSim):
             readout_error=data[3],  # int
             scan_parameters=scan_parameters  # dict
         )
+        if self.compression:
+            data_meta_data['compression'] = self.compression
+            payload = compress_data(data[0], self.compression)
+        else:
+            payload = data[0]  # PyZMQ supports sending numpy arrays without copying any data
         try:
-            self.total_data += data[0].nbytes  # sum up sent data packages
+            self.total_data += len(payload) if self.compression else data[0].nbytes  # sum up sent data packages
             self.sender.send_json(data_meta_data, flags=zmq.SNDMORE | zmq.NOBLOCK)
-            self.sender.send(data[0], flags=zmq.NOBLOCK)  # PyZMQ supports sending numpy arrays without copying any data
+            self.sender.send(payload, flags=zmq.NOBLOCK)
         except zmq.Again:
             pass
 
     def __del__(self):
-        self.in_file_h5.close()
+        self.reader.close()
@@ -0,0 +1,122 @@
+#
+# ------------------------------------------------------------
+# Copyright (c) All rights reserved
+# SiLab, Institute of Physics, University of Bonn
+# ------------------------------------------------------------
+#
+
+'''
+    Reversible transform of the raw data words to improve the compression of Mimosa26 data streams
+'''
+
+import numpy as np
+from numba import njit
+
+
+@njit
+def _m26_delta(raw_data, word_offset, block_size, decode, prev_values, word_index, frame_length, prev_trigger):
+    output = np.empty_like(raw_data)
+    for i in range(raw_data.shape[0]):
+        if (word_offset + i) % block_size == 0:  # reset state at the beginning of each block
+            prev_values[:] = 0
+            word_index[:] = -1
+            frame_length[:] = 0
+            prev_trigger[0] = 0
+        word = np.int64(raw_data[i])
+        if (word & 0x80000000) != 0:  # trigger word, trigger number or timestamp
+            if decode:
+                value = (word + prev_trigger[0]) & 0x7fffffff
+            else:
+                value = word & 0x7fffffff
+                word = (word - prev_trigger[0]) & 0x7fffffff
+            prev_trigger[0] = value
+            output[i] = 0x80000000 | (word if not decode else value)
+        elif (word & 0xff000000) == 0x20000000:  # Mimosa26 word, the upper 16 bits are not changed
+            plane = (word >> 20) & 0xf
+            if (word & 0x00010000) != 0:  # frame header
+                word_index[plane] = 0
+                frame_length[plane] = 0
+            elif word_index[plane] >= 0:
+                word_index[plane] += 1
+            index = word_index[plane]
+            low = word & 0xffff
+            if 0 <= index < 4:  # timestamp and frame ID, difference to previous frame
+                if decode:
+                    value = (low + prev_values[plane, index]) & 0xffff
+                    low = value
+                else:
+                    value = low
+                    low = (low - prev_values[plane, index]) & 0xffff
+                prev_values[plane, index] = value
+            elif index == 4:  # frame length
+                frame_length[plane] = low
+            elif index == 5:  # frame length, a second time
+                low = low ^ frame_length[plane]
+                frame_length[plane] += low if decode else word & 0xffff
+            elif index == 5 + frame_length[plane] + 1:  # frame trailer0
+                low = low ^ 0xaa50
+            elif index == 5 + frame_length[plane] + 2:  # frame trailer1
+                low = low ^ (0xaa50 | plane)
+                word_index[plane] = -1
+            output[i] = (word & 0xffff0000) | low
+        else:
+            output[i] = word
+    return output
+
+
+class M26DeltaTransform(object):
+    '''Reversible transform of Mimosa26 raw data words (name 'm26_delta').
+
+    The header bits (word type, plane, frame start and data loss flag) are not changed.
+    The Mimosa26 timestamp and frame ID words are replaced by the difference to the previous frame of the same plane,
+    the second frame length word and the frame trailers by the XOR with their expected values
+    and the trigger words by the difference to the previous trigger word. Other words are not changed.
+    Most of these words become constant and are compressed much better.
+
+    The state is reset every block_size words, a block can be decoded without the preceding raw data.
+
+    Parameters
+    ----------
+    block_size : int
+        Number of raw data words per block.
+    '''
+    name = 'm26_delta'
+
+    def __init__(self, block_size=2**16):
+        self.block_size = block_size
+        self.reset()
+
+    def reset(self):
+        self._prev_values = np.zeros(shape=(16, 4), dtype=np.int64)
+        self._word_index = np.full(shape=(16,), fill_value=-1, dtype=np.int64)
+        self._frame_length = np.zeros(shape=(16,), dtype=np.int64)
+        self._prev_trigger = np.zeros(shape=(1,), dtype=np.int64)
+
+    def encode(self, raw_data, word_offset):
+        '''Encodes raw data words, which are following the previously encoded words.
+
+        Parameters
+        ----------
+        raw_data : numpy.array
+            Raw data array.
+        word_offset : int
+            Word index of the first word of the raw data array.
+        '''
+        return _m26_delta(np.ascontiguousarray(raw_data, dtype=np.uint32), word_offset, self.block_size, False, self._prev_values, self._word_index, self._frame_length, self._prev_trigger)
+
+    def decode(self, raw_data, word_offset):
+        '''Decodes raw data words, which are following the previously decoded words or start at the beginning of a block.
+        '''
+        return _m26_delta(np.ascontiguousarray(raw_data, dtype=np.uint32), word_offset, self.block_size, True, self._prev_values, self._word_index, self._frame_length, self._prev_trigger)
+
+
+raw_data_transforms = {M26DeltaTransform.name: M26DeltaTransform}
+
+
+def get_transform(name, block_size=2**16):
+    '''Returns the raw data transform with the given name.
+    '''
+    try:
+        return raw_data_transforms[name](block_size=block_size)
+    except KeyError:
+        raise ValueError('Unknown raw data transform: %s' % name)
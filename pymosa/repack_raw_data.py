@@ -0,0 +1,135 @@
+#
+# ------------------------------------------------------------
+# Copyright (c) All rights reserved
+# SiLab, Institute of Physics, University of Bonn
+# ------------------------------------------------------------
+#
+
+'''
+    Rewrite finished raw data files with read-optimized chunking
+'''
+
+import logging
+import os
+import tempfile
+
+import tables as tb
+
+from pymosa.m26_raw_data import get_filters, get_raw_data_chunkshape, get_raw_data_transform, set_raw_data_transform
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def _repack_raw_data(raw_data, out_file_h5, chunk_size=None, compression=None, raw_data_transform=None, block_size=2**22):
+    if chunk_size is None:
+        chunkshape = get_raw_data_chunkshape(raw_data.nrows, max_chunk_size=2**20)
+    else:
+        chunkshape = (chunk_size,)
+    filters = raw_data.filters if compression is None else get_filters(**compression)
+    logger.info('Repacking %s: %d raw data words, chunk size %d -> %d', raw_data._v_file.filename, raw_data.nrows, raw_data.chunkshape[0], chunkshape[0])
+    transform = get_raw_data_transform(raw_data)
+    if raw_data_transform is None or raw_data_transform == (transform.name if transform is not None else 'none'):
+        raw_data.copy(out_file_h5.root, chunkshape=chunkshape, filters=filters)
+    else:  # decode and encode raw data
+        logger.info('Changing raw data transform: %s -> %s', transform.name if transform is not None else 'none', raw_data_transform)
+        out_raw_data = out_file_h5.create_earray(out_file_h5.root, name='raw_data', atom=raw_data.atom, shape=(0,), title=raw_data.title, filters=filters, chunkshape=chunkshape, expectedrows=raw_data.nrows)
+        for name in raw_data.attrs._f_list('user'):
+            if name not in ('raw_data_transform', 'raw_data_transform_block_size'):
+                out_raw_data.attrs[name] = raw_data.attrs[name]
+        if raw_data_transform != 'none':
+            set_raw_data_transform(out_raw_data, raw_data_transform)
+        out_transform = get_raw_data_transform(out_raw_data)
+        for start in range(0, raw_data.nrows, block_size):
+            raw_data_block = raw_data.read(start=start, stop=start + block_size)
+            if transform is not None:
+                raw_data_block = transform.decode(raw_data_block, word_offset=start)
+            if out_transform is not None:
+                raw_data_block = out_transform.encode(raw_data_block, word_offset=start)
+            out_raw_data.append(raw_data_block)
+
+
+def repack_raw_data_file(input_filename, output_filename=None, chunk_size=None, compression=None, raw_data_transform=None, block_size=2**22):
+    '''Rewrites a raw data file with read-optimized chunking of the raw data array.
+
+    Parameters
+    ----------
+    input_filename : str
+        Filename of the raw data file.
+    output_filename : str
+        Filename of the repacked raw data file. If None, the input file is replaced.
+    chunk_size : int
+        Chunk size of the raw data array in words. If None, the chunk size is derived from the number of raw data words (max. 4 MiB).
+    compression : dict
+        Compression settings of the raw data array (or the arrays of demultiplexed raw data), see get_filters(). If None, the compression settings of the input file are kept.
+    raw_data_transform : str
+        Raw data transform (e.g. 'm26_delta', see pymosa.raw_data_transform) or 'none' to store the raw data words unchanged.
+        If None, the raw data transform of the input file is kept.
+    block_size : int
+        Number of raw data words converted at once, if the raw data transform is changed.
+
+    Returns
+    -------
+    output_filename : str
+        Filename of the repacked raw data file.
+    '''
+    replace = output_filename is None or os.path.abspath(output_filename) == os.path.abspath(input_filename)
+    if replace:  # write to temporary file and replace input file afterwards
+        fd, tmp_filename = tempfile.mkstemp(suffix='.h5', prefix=os.path.splitext(os.path.basename(input_filename))[0] + '_', dir=os.path.dirname(os.path.abspath(input_filename)))
+        os.close(fd)
+    else:
+        tmp_filename = output_filename
+    try:
+        with tb.open_file(input_filename, mode='r') as in_file_h5:
+            with tb.open_file(tmp_filename, mode='w', title=in_file_h5.title) as out_file_h5:
+                if 'raw_data_streams' in in_file_h5.root:  # demultiplexed raw data, see DemultiplexedRawData
+                    if raw_data_transform not in (None, 'none'):
+                        raise ValueError('Raw data transform is not supported for demultiplexed raw data')
+                    raw_data = in_file_h5.root.raw_data_streams
+                    filters = raw_data._v_filters if compression is None else get_filters(**compression)
+                    logger.info('Repacking %s: demultiplexed raw data', input_filename)
+                    out_raw_data = out_file_h5.create_group(out_file_h5.root, name='raw_data_streams', title=raw_data._v_title, filters=filters)
+                    in_file_h5.copy_node_attrs(raw_data, out_raw_data)
+                    for node in raw_data:
+                        if isinstance(node, tb.EArray):
+                            node.copy(out_raw_data, chunkshape=(chunk_size,) if chunk_size else get_raw_data_chunkshape(node.nrows, max_chunk_size=2**20), filters=filters)
+                        else:  # order table
+                            node.copy(out_raw_data)
+                else:
+                    raw_data = in_file_h5.root.raw_data
+                    _repack_raw_data(raw_data, out_file_h5, chunk_size=chunk_size, compression=compression, raw_data_transform=raw_data_transform, block_size=block_size)
+                for node in in_file_h5.iter_nodes(in_file_h5.root):
+                    if node is not raw_data:
+                        in_file_h5.copy_node(node, out_file_h5.root, recursive=True)
+                in_file_h5.copy_node_attrs(in_file_h5.root, out_file_h5.root)
+        if replace:
+            os.replace(tmp_filename, input_filename)
+            output_filename = input_filename
+    except Exception:
+        if replace and os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+    logger.info('Repacked raw data file: %s', output_filename)
+    return output_filename
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Rewrite pymosa raw data files with read-optimized chunking for analysis\nExample: pymosa_repack run_1_M26_TELESCOPE.h5 run_2_M26_TELESCOPE.h5',
+                                     formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('filenames', type=str, nargs='+', metavar='<raw data file>', help='raw data files, the files will be replaced')
+    parser.add_argument('--chunk_size', type=int, metavar='<chunk size>', action='store', help='chunk size of the raw data in words, default: derived from the file size (max. 4 MiB)')
+    parser.add_argument('--complib', type=str, metavar='<compression library>', action='store', help='compression library (e.g. blosc:zstd), default: keep compression')
+    parser.add_argument('--complevel', type=int, metavar='<compression level>', default=5, action='store', help='compression level, default: 5')
+    parser.add_argument('--shuffle', type=str, metavar='<shuffle mode>', default='byte', action='store', help='shuffle mode (byte, bit, none), default: byte')
+    parser.add_argument('--transform', type=str, metavar='<raw data transform>', action='store', help='raw data transform (m26_delta, none), default: keep transform')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)-7s %(message)s')
+    compression = dict(complib=args.complib, complevel=args.complevel, shuffle=args.shuffle) if args.complib else None
+    for filename in args.filenames:
+        repack_raw_data_file(filename, chunk_size=args.chunk_size, compression=compression, raw_data_transform=args.transform)
+
+
+if __name__ == "__main__":
+    main()
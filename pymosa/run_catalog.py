@@ -0,0 +1,207 @@
+#
+# ------------------------------------------------------------
+# Copyright (c) All rights reserved
+# SiLab, Institute of Physics, University of Bonn
+# ------------------------------------------------------------
+#
+
+'''
+    Catalog of the runs in the output folder
+'''
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+from threading import RLock
+from time import strftime, time
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def get_configuration_hash(configuration):
+    '''Returns the SHA-1 hash of a configuration dictionary.
+    '''
+    return hashlib.sha1(json.dumps(configuration, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class RunCatalog(object):
+    '''Catalog of the runs in the output folder, stored in a SQLite database.
+
+    The catalog is used to allocate filenames of new runs without listing the output folder
+    and records the properties of each run (run number, filenames, configuration hash, duration, number of triggers and data volume).
+    When the catalog is created, the files already existing in the output folder are imported once.
+
+    Parameters
+    ----------
+    folder : str
+        Output folder.
+    filename : str
+        Filename of the SQLite database in the output folder.
+    '''
+    file_extensions = ('.h5', '.log', '.raw')  # files of a run, checked in addition to the catalog
+
+    def __init__(self, folder, filename='run_catalog.sqlite'):
+        self.folder = folder
+        self.filename = os.path.join(folder, filename)
+        self.lock = RLock()
+        new_catalog = not os.path.isfile(self.filename)
+        self.connection = sqlite3.connect(self.filename, timeout=30.0, isolation_level=None, check_same_thread=False)  # explicit transactions
+        self.connection.row_factory = sqlite3.Row
+        with self.lock:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS runs (filename TEXT PRIMARY KEY, run_number INTEGER, run_id TEXT, status TEXT, start_time REAL, stop_time REAL, duration REAL, '
+                                    'configuration_hash TEXT, filenames TEXT, n_files INTEGER, n_triggers INTEGER, n_readouts INTEGER, n_bytes INTEGER)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS runs_run_number ON runs (run_id, run_number)')
+            if new_catalog:
+                self._import_folder()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def _import_folder(self):
+        '''Imports the existing files of the output folder.
+        '''
+        names = set(os.path.splitext(f)[0] for f in os.listdir(self.folder) if os.path.isfile(os.path.join(self.folder, f)) and os.path.join(self.folder, f) != self.filename)
+        rows = []
+        for name in names:
+            match = re.match(r'^run_(\d+)_(.+)$', name)
+            rows.append((name, int(match.group(1)) if match else None, match.group(2) if match else None, 'imported'))
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            self.connection.executemany('INSERT OR IGNORE INTO runs (filename, run_number, run_id, status) VALUES (?, ?, ?, ?)', rows)
+        except Exception:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.connection.execute('COMMIT')
+        if rows:
+            logger.info('Imported %d existing file(s) into run catalog %s', len(rows), self.filename)
+
+    def _exists(self, name):
+        if self.connection.execute('SELECT 1 FROM runs WHERE filename = ?', (name,)).fetchone() is not None:
+            return True
+        return any(os.path.isfile(os.path.join(self.folder, name + extension)) for extension in self.file_extensions)
+
+    def _next_run_number(self, run_id, run_number):
+        # first run number after the given run number which is not in the catalog
+        run_number += 1
+        for row in self.connection.execute('SELECT run_number FROM runs WHERE run_id = ? AND run_number >= ? ORDER BY run_number', (run_id, run_number)):
+            if row[0] > run_number:
+                break
+            run_number = row[0] + 1
+        return run_number
+
+    def allocate_run(self, run_id, run_number=None, filename=None, configuration=None):
+        '''Returns a filename that is not in use and adds the run to the catalog.
+
+        Parameters
+        ----------
+        run_id : str
+            Run ID, e.g. M26_TELESCOPE.
+        run_number : int
+            Run number. If the filename run_<run number>_<run ID> is in use, the run number is increased. Ignored if filename is given.
+        filename : str
+            Filename without extension. If None, the filename is generated from the run number or the current time.
+        configuration : dict
+            Configuration of the run, the hash of the configuration is stored.
+
+        Returns
+        -------
+        filename : str
+            Filename of the run (without folder and extension).
+        run_number : int
+            Run number, which may have been increased.
+        '''
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')  # lock database, the folder may be used by several processes
+            try:
+                while True:
+                    if not filename and run_number:
+                        name = 'run_' + str(run_number) + '_' + run_id
+                    elif filename:
+                        name = filename
+                    else:
+                        name = strftime("%Y%m%d-%H%M%S") + '_' + run_id
+                    if self._exists(name):
+                        if not filename and run_number:
+                            run_number = self._next_run_number(run_id, run_number)  # increase run number and try again
+                            continue
+                        else:
+                            raise IOError("Filename %s already exists." % name)
+                    break
+                self.connection.execute('INSERT OR REPLACE INTO runs (filename, run_number, run_id, status, start_time, configuration_hash) VALUES (?, ?, ?, ?, ?, ?)',
+                                        (name, run_number if (not filename and run_number) else None, run_id, 'running', time(),
+                                         get_configuration_hash(configuration) if configuration is not None else None))
+            except Exception:
+                self.connection.execute('ROLLBACK')
+                raise
+            self.connection.execute('COMMIT')
+        return name, run_number
+
+    def close_run(self, filename, filenames=None, n_triggers=None, n_readouts=None, n_bytes=None):
+        '''Updates the run in the catalog when the run is finished.
+
+        Parameters
+        ----------
+        filename : str
+            Filename of the run (without folder and extension).
+        filenames : list
+            Filenames of the raw data files of the run.
+        n_triggers : int
+            Number of triggers.
+        n_readouts, n_bytes : int
+            Number of readouts and bytes of raw data (uncompressed).
+        '''
+        stop_time = time()
+        filenames = [os.path.basename(f) for f in filenames] if filenames is not None else None
+        with self.lock:
+            self.connection.execute('UPDATE runs SET status = ?, stop_time = ?, duration = ? - start_time, filenames = ?, n_files = ?, n_triggers = ?, n_readouts = ?, n_bytes = ? WHERE filename = ?',
+                                    ('closed', stop_time, stop_time, json.dumps(filenames) if filenames is not None else None, len(filenames) if filenames is not None else None,
+                                     n_triggers, n_readouts, n_bytes, filename))
+
+    def get_run(self, filename):
+        '''Returns the catalog entry of a run as dictionary, None if the run is not in the catalog.
+        '''
+        with self.lock:
+            row = self.connection.execute('SELECT * FROM runs WHERE filename = ?', (filename,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def get_runs(self, run_id=None, status=None):
+        '''Returns the catalog entries of the runs ordered by run number and start time.
+
+        Parameters
+        ----------
+        run_id : str
+            Select runs with given run ID. If None, all runs are returned.
+        status : str
+            Select runs with given status ('running', 'closed' or 'imported'). If None, all runs are returned.
+        '''
+        conditions, values = [], []
+        if run_id is not None:
+            conditions.append('run_id = ?')
+            values.append(run_id)
+        if status is not None:
+            conditions.append('status = ?')
+            values.append(status)
+        query = 'SELECT * FROM runs' + (' WHERE ' + ' AND '.join(conditions) if conditions else '') + ' ORDER BY run_number, start_time, filename'
+        with self.lock:
+            rows = self.connection.execute(query, values).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def _to_dict(self, row):
+        run = dict(zip(row.keys(), tuple(row)))
+        if run['filenames'] is not None:
+            run['filenames'] = json.loads(run['filenames'])
+        return run
@@ -0,0 +1,41 @@
+#
+# ------------------------------------------------------------
+# Copyright (c) All rights reserved
+# SiLab, Institute of Physics, University of Bonn
+# ------------------------------------------------------------
+#
+
+import os
+from time import sleep
+
+import numpy as np
+import pytest
+import tables as tb
+
+from pymosa.m26 import m26
+from pymosa.m26_raw_data import open_raw_data_file
+
+
+def test_startup_timing(tmp_path):
+    ''' Test recording of the startup phase durations and storing them in all files of the run '''
+    telescope = m26.__new__(m26)  # no hardware
+    telescope.startup_timing = {}
+    with telescope.startup_phase('load_dut'):
+        sleep(0.01)
+    with pytest.raises(ValueError):
+        with telescope.startup_phase('init_dut'):
+            raise ValueError()
+    startup_timing = telescope.get_startup_timing()
+    assert list(startup_timing) == ['load_dut', 'init_dut']
+    assert startup_timing['load_dut'] >= 0.01
+
+    filename = os.path.join(str(tmp_path), 'run_1_M26_TELESCOPE')
+    telescope.raw_data_file = open_raw_data_file(filename, mode='w', max_file_size=1000 * 4 / 1024.0 ** 2)  # 1000 words per file
+    with telescope.raw_data_file:
+        telescope.save_startup_timing()
+        for i in range(5):
+            telescope.raw_data_file.append([(np.arange(600, dtype=np.uint32), float(i), float(i + 1), 0)])
+    assert len(telescope.raw_data_file.output_filenames) > 1
+    for output_filename in telescope.raw_data_file.output_filenames:
+        with tb.open_file(output_filename, mode='r') as in_file_h5:
+            assert {row['name'].decode(): float(row['value']) for row in in_file_h5.root.configuration.startup_timing[:]} == startup_timing
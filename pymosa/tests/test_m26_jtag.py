@@ -0,0 +1,189 @@
+#
+# ------------------------------------------------------------
+# Copyright (c) All rights reserved
+# SiLab, Institute of Physics, University of Bonn
+# ------------------------------------------------------------
+#
+
+import os
+from threading import Lock
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import pytest
+from basil.utils.BitLogic import BitLogic
+
+from pymosa.m26 import m26
+from pymosa.m26_jtag import M26Jtag, TCK, TMS, TDI, TDO
+
+
+class JtagChainSim(object):
+    ''' Simulation of the TAP controllers of chained devices connected to the JTAG GPIO via SiTCP '''
+
+    def __init__(self, ir_size, dr_size, tcp_to_bus):
+        self.registers = {'IR': [0] * ir_size, 'DR': [0] * dr_size}
+        self.state = 'IDLE'
+        self.tck = 0
+        self.tdo = 0
+        self.n_transfers = 0
+        self._sock_tcp = object() if tcp_to_bus else None
+        self._init = {'tcp_to_bus': tcp_to_bus}
+        self._udp_lock = Lock()
+
+    def _send_tcp_data(self, data):
+        self.n_transfers += 1
+        requests = np.frombuffer(bytes(data), dtype=[('size', '<u2'), ('addr', '<u4'), ('data', 'u1')])
+        assert np.all(requests['size'] == 1)
+        for request in requests:
+            self._set(int(request['data']))
+
+    def write(self, addr, data):
+        self.n_transfers += 1
+        self._set(data[0])
+
+    def read(self, addr, size):
+        self.n_transfers += 1
+        return [TDO if self.tdo else 0]
+
+    def _set(self, value):
+        tck = 1 if value & TCK else 0
+        if tck and not self.tck:  # rising edge
+            tms = 1 if value & TMS else 0
+            register = 'IR' if self.state.endswith('IR') else 'DR'
+            if self.state.startswith('SHIFT'):
+                self.registers[register] = self.registers[register][1:] + [1 if value & TDI else 0]
+            self.state = {
+                ('IDLE', 1): 'SELECT_DR', ('SELECT_DR', 1): 'SELECT_IR', ('SELECT_DR', 0): 'CAPTURE_DR', ('SELECT_IR', 0): 'CAPTURE_IR',
+                ('CAPTURE_DR', 0): 'SHIFT_DR', ('CAPTURE_IR', 0): 'SHIFT_IR', ('SHIFT_DR', 0): 'SHIFT_DR', ('SHIFT_IR', 0): 'SHIFT_IR',
+                ('SHIFT_DR', 1): 'EXIT1_DR', ('SHIFT_IR', 1): 'EXIT1_IR', ('EXIT1_DR', 1): 'UPDATE_DR', ('EXIT1_IR', 1): 'UPDATE_IR',
+                ('UPDATE_DR', 0): 'IDLE', ('UPDATE_IR', 0): 'IDLE', ('IDLE', 0): 'IDLE'}[(self.state, tms)]
+        elif not tck and self.tck:  # falling edge
+            register = 'IR' if self.state.endswith('IR') else 'DR'
+            self.tdo = self.registers[register][0] if self.state.startswith('SHIFT') else 0
+        self.tck = tck
+
+
+class GpioSim(object):
+    ''' GPIO module with the interface of basil.HL.gpio '''
+
+    def __init__(self, intf):
+        self._intf = intf
+        self._base_addr = 0xb000
+        self._registers = {'INPUT': {'descr': {'addr': 1}}, 'OUTPUT': {'descr': {'addr': 2}}}
+
+
+@pytest.mark.parametrize('tcp_to_bus', [True, False])
+def test_m26_jtag_scan_register(tcp_to_bus):
+    ''' Test batched JTAG register scan with simulated TAP controllers '''
+    rng = np.random.default_rng(0)
+    sim = JtagChainSim(ir_size=6 * 5, dr_size=6 * 152, tcp_to_bus=tcp_to_bus)
+    jtag = M26Jtag(GpioSim(sim), n_devices=6)
+    values = [BitLogic(''.join(map(str, rng.integers(0, 2, size=6 * 152)))) for _ in range(3)]
+
+    assert jtag.scan_register('01111', [values[0]]) is None
+    assert sim.state == 'IDLE' and sim.tck == 0
+    assert sim.registers['IR'] == [bit for _ in range(6) for bit in (1, 1, 1, 1, 0)]  # bit 0 first
+    assert sim.registers['DR'] == [1 if bit else 0 for bit in values[0]]
+    if tcp_to_bus:
+        assert sim.n_transfers == 1  # IR and DR scan in a single transfer
+    for previous, value in zip(values[:-1], values[1:]):
+        ret = jtag.scan_register('01111', [value], readback=True)
+        assert len(ret) == 1 and len(ret[0]) == len(previous)
+        assert ret[0] == previous
+        assert sim.registers['DR'] == [1 if bit else 0 for bit in value]
+
+
+class RegisterValue(BitLogic):
+    ''' BitLogic value, which can be printed with all bitarray versions '''
+
+    def __str__(self):
+        return self.to01()[::-1]
+
+
+class RegisterSim(object):
+    ''' JTAG register of the DUT (BitLogic value, no fields) '''
+
+    def __init__(self, value):
+        self.value = value
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.value
+        return []
+
+    def __setitem__(self, key, value):
+        self.value = value
+
+
+class M26JtagSim(object):
+    ''' Mimosa26 registers behind M26Jtag, the writes of the registers in broken fail '''
+
+    def __init__(self):
+        self.registers = {}
+        self.writes = []
+        self.broken = set()
+
+    def scan_register(self, ir, data, readback=False):
+        previous = self.registers.get(ir, RegisterValue('0' * len(data[0])))
+        if not readback:
+            self.writes.append(ir)
+        if ir not in self.broken:
+            self.registers[ir] = data[0].copy()
+        return [previous] if readback else None
+
+
+def test_m26_jtag_cache(tmp_path):
+    ''' Test programming of changed JTAG registers using the cached configuration state '''
+    rng = np.random.default_rng(0)
+    irs = {"DEV_ID_ALL": '01110', "BIAS_DAC_ALL": '01111', "BYPASS_ALL": '11111', "BSR_ALL": '00101', "RO_MODE0_ALL": '11110', "RO_MODE1_ALL": '11101',
+           "DIS_DISCRI_ALL": '10001', "LINEPAT0_REG_ALL": '10000', "LINEPAT1_REG_ALL": '10100', "CONTROL_PIX_REG_ALL": '10011', "SEQUENCER_PIX_REG_ALL": '10010',
+           "HEADER_REG_ALL": '10110', "CONTROL_SUZE_REG_ALL": '10111', "SEQUENCER_SUZE_REG_ALL": '10101', "CTRL_8b10b_REG0_ALL": '11000', "CTRL_8b10b_REG1_ALL": '11001'}
+
+    def random_value():
+        return RegisterValue(''.join(map(str, rng.integers(0, 2, size=6 * 16))))
+
+    registers = {ir: RegisterSim(random_value()) for ir in irs}
+    devices = {'ETH': SimpleNamespace(_init={'ip': '192.168.10.16'})}
+    dut = mock.MagicMock()
+    dut.__getitem__.side_effect = lambda name: registers[name] if name in registers else devices.setdefault(name, mock.MagicMock())
+    telescope = m26.__new__(m26)
+    telescope.dut = dut
+    telescope.m26_jtag = M26JtagSim()
+    telescope.m26_jtag.registers[irs['DEV_ID_ALL']] = registers['DEV_ID_ALL'].value.copy()  # device IDs of the sensors
+    telescope.startup_timing = {}
+    telescope.telescope_conf = {'fw_version': 1}
+    telescope.working_dir = str(tmp_path)
+    telescope.m26_jtag_configuration = True
+    telescope.m26_jtag_cache = True
+    state_filename = os.path.join(str(tmp_path), m26.jtag_state_filename)
+
+    def configure():
+        telescope.m26_jtag.writes = []
+        telescope.configure_m26(m26_configuration_file='m26_configuration.yaml')
+        return set(ir for ir in telescope.m26_jtag.writes if ir != irs['RO_MODE0_ALL'])  # RO_MODE0 is written by the start sequence
+
+    # no cached state, all registers are written
+    assert configure() == set(irs.values()) - set([irs['RO_MODE0_ALL']])
+    assert os.path.exists(state_filename)
+    # only changed registers are written
+    assert configure() == set()
+    registers['DIS_DISCRI_ALL'].value = random_value()
+    assert configure() == set([irs['DIS_DISCRI_ALL']])
+    registers['BIAS_DAC_ALL'].value = random_value()  # written by the readback of the verified registers
+    assert configure() == set()
+    assert telescope.m26_jtag.registers[irs['BIAS_DAC_ALL']] == registers['BIAS_DAC_ALL'].value
+    # verification of the cached state fails (e.g. power cycle), all registers are written
+    telescope.m26_jtag.registers[irs['HEADER_REG_ALL']] = random_value()
+    assert configure() == set(irs.values()) - set([irs['RO_MODE0_ALL']])
+    # session changed, all registers are written
+    telescope.telescope_conf['fw_version'] = 2
+    assert configure() == set(irs.values()) - set([irs['RO_MODE0_ALL']])
+    # programming fails, state is not stored
+    telescope.m26_jtag.broken.add(irs['DIS_DISCRI_ALL'])
+    registers['DIS_DISCRI_ALL'].value = random_value()
+    assert configure() == set([irs['DIS_DISCRI_ALL']])
+    assert not os.path.exists(state_filename)
+    telescope.m26_jtag.broken.clear()
+    assert configure() == set(irs.values()) - set([irs['RO_MODE0_ALL']])
+    assert os.path.exists(state_filename)
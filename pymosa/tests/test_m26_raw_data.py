@@ -0,0 +1,831 @@
+#
+# ------------------------------------------------------------
+# Copyright (c) All rights reserved
+# SiLab, Institute of Physics, University of Bonn
+# ------------------------------------------------------------
+#
+
+import os
+import time
+
+import pytest
+import numpy as np
+import tables as tb
+import zmq
+
+from pymosa.m26_raw_data import (DemultiplexedRawData, M26RawDataFile, M26RawDataReader, M26RawDataTailReader, M26RawDataView, RawDataPublisher, RunSummary, META_DATA_LAYOUT_VERSION,
+                                 create_raw_data_index, create_run_summary, compress_data, decompress_data, estimate_expected_words, get_meta_data_layout_version, get_raw_data,
+                                 get_raw_data_filenames, get_raw_data_stream_ids, get_scan_parameter_ranges, get_topic_subscription, open_raw_data_file, read_meta_data, read_raw_data,
+                                 save_configuration_dict)
+from pymosa.repack_raw_data import repack_raw_data_file
+from pymosa.raw_data_transform import M26DeltaTransform
+from pymosa.convert_raw_data import convert_raw_data_file
+from pymosa.archive_raw_data import recompress_raw_data_file, find_finished_raw_data_files
+from pymosa.run_catalog import RunCatalog
+
+
+def create_readouts(n_readouts=100, n_words=1000, seed=0):
+    ''' Create data tuples (raw data, timestamp_start, timestamp_stop, error) as provided by M26Readout '''
+    rng = np.random.default_rng(seed)
+    readouts = []
+    for i in range(n_readouts):
+        raw_data = rng.integers(0, 2**32, size=rng.integers(0, n_words), dtype=np.uint32)
+        readouts.append((raw_data, 100.0 + i * 0.05, 100.0 + (i + 1) * 0.05, 0))
+    return readouts
+
+
+@pytest.fixture()
+def raw_data_filename(tmp_path):
+    return os.path.join(str(tmp_path), 'run_1_M26_TELESCOPE')
+
+
+@pytest.mark.parametrize('asynchronous', [False, True])
+def test_raw_data_file(raw_data_filename, asynchronous):
+    ''' Test writing of raw data and meta data '''
+    readouts = create_readouts()
+    with open_raw_data_file(raw_data_filename, mode='w', asynchronous=asynchronous, queue_size=10, flush_interval=0.1) as raw_data_file:
+        for i in range(0, len(readouts), 10):
+            raw_data_file.append(readouts[i:i + 10])
+    statistics = raw_data_file.get_statistics()
+    assert statistics['n_readouts'] == len(readouts)
+    assert statistics['n_words'] == sum(readout[0].shape[0] for readout in readouts)
+    assert statistics['n_flushes'] >= 1
+
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        meta_data = in_file_h5.root.meta_data[:]
+        raw_data = in_file_h5.root.raw_data
+        assert meta_data.shape[0] == len(readouts)
+        for i, readout in enumerate(readouts):
+            assert np.array_equal(raw_data[meta_data['index_start'][i]:meta_data['index_stop'][i]], readout[0])
+            assert meta_data['timestamp_start'][i] == readout[1]
+            assert meta_data['timestamp_stop'][i] == readout[2]
+
+
+def test_raw_data_file_batch_rotation(raw_data_filename, monkeypatch):
+    ''' Test batch append with scan parameters and file size limit '''
+    readouts = create_readouts(n_readouts=20)
+    n_words = sum(readout[0].shape[0] for readout in readouts)
+    max_table_size = n_words // 2 + max(readout[0].shape[0] for readout in readouts)  # two files
+    monkeypatch.setattr(M26RawDataFile, 'max_table_size', max_table_size)
+    with open_raw_data_file(raw_data_filename, mode='w', scan_parameters={'n_trigger': 0}) as raw_data_file:
+        raw_data_file.append(readouts, scan_parameters={'n_trigger': 5})
+
+    raw_data, n_trigger = [], []
+    for filename in [raw_data_filename + '.h5', raw_data_filename + '_1.h5']:
+        with tb.open_file(filename, mode='r') as in_file_h5:
+            meta_data = in_file_h5.root.meta_data[:]
+            assert in_file_h5.root.raw_data.nrows <= max_table_size
+            assert meta_data['index_stop'][-1] == in_file_h5.root.raw_data.nrows
+            assert np.array_equal(meta_data['index_start'][1:], meta_data['index_stop'][:-1])
+            raw_data.append(in_file_h5.root.raw_data[:])
+            scan_parameter_ranges = in_file_h5.root.scan_parameter_ranges[:]
+            n_trigger.append(np.repeat(scan_parameter_ranges['n_trigger'], (scan_parameter_ranges['readout_stop'] - scan_parameter_ranges['readout_start']).astype(np.int64)))
+    assert np.array_equal(np.concatenate(raw_data), np.concatenate([readout[0] for readout in readouts]))
+    assert np.all(np.concatenate(n_trigger) == 5)
+    assert np.concatenate(n_trigger).shape[0] == len(readouts)
+
+
+@pytest.mark.parametrize('asynchronous', [False, True])
+def test_raw_data_file_rotation(raw_data_filename, asynchronous):
+    ''' Test file rotation by size and time with prepared files '''
+    readouts = create_readouts(n_readouts=40)
+    max_file_size = 5000 * 4 / 1024.0 ** 2  # 5000 words
+    with open_raw_data_file(raw_data_filename, mode='w', asynchronous=asynchronous, max_file_size=max_file_size, max_file_time=0.2) as raw_data_file:
+        save_configuration_dict(raw_data_file.h5_file, 'configuration', {'run_id': 'M26_TELESCOPE'})
+        for i in range(0, 20, 5):
+            raw_data_file.append(readouts[i:i + 5])
+        time.sleep(0.3)  # file time limit
+        for i in range(20, 40, 5):
+            raw_data_file.append(readouts[i:i + 5])
+    statistics = raw_data_file.get_statistics()
+
+    filenames = sorted(os.listdir(os.path.dirname(raw_data_filename)), key=lambda f: (len(f), f))
+    assert len(filenames) == statistics['n_files']
+    assert statistics['n_files'] > 3
+    raw_data = []
+    for filename in filenames:
+        with tb.open_file(os.path.join(os.path.dirname(raw_data_filename), filename), mode='r') as in_file_h5:
+            assert in_file_h5.root.raw_data.nrows <= 5000
+            assert in_file_h5.root.raw_data.nrows > 0
+            assert in_file_h5.root.meta_data[-1]['index_stop'] == in_file_h5.root.raw_data.nrows
+            assert 'configuration' in in_file_h5.root
+            raw_data.append(in_file_h5.root.raw_data[:])
+    assert np.array_equal(np.concatenate(raw_data), np.concatenate([readout[0] for readout in readouts]))
+
+
+def test_raw_data_publisher(raw_data_filename):
+    ''' Test sending of data via publisher thread for several raw data files '''
+    readouts = create_readouts(n_readouts=20)
+    publisher = RawDataPublisher(socket_address='tcp://127.0.0.1:*', queue_size=5, hwm=10)
+    try:
+        for index in range(2):  # socket is reused for every file
+            with open_raw_data_file(raw_data_filename + '_%d' % index, mode='w', publisher=publisher, asynchronous=True) as raw_data_file:
+                raw_data_file.append(readouts)
+            assert raw_data_file.publisher is None
+        assert not publisher.socket.closed
+    finally:
+        publisher.close()
+    assert publisher.socket.closed
+    statistics = publisher.get_statistics()
+    n_messages = 2 * (len(readouts) + 2)  # data + reset and filename
+    assert statistics['n_sent'] + statistics['n_dropped'] == n_messages
+    assert statistics['n_sent_bytes'] + statistics['n_dropped_bytes'] == 2 * sum(readout[0].nbytes for readout in readouts)
+
+
+@pytest.mark.parametrize('prescale, trigger_only', [(1, False), (3, False), (1, True)])
+def test_raw_data_publisher_prescale(prescale, trigger_only):
+    ''' Test prescaling of the data sent by the publisher '''
+    readouts = create_readouts(n_readouts=30, seed=1)
+    has_trigger = [bool(np.any(readout[0] & 0x80000000)) for readout in readouts]
+    for i in range(0, len(readouts), 2):  # remove trigger words from every other readout
+        readouts[i][0][:] &= 0x7fffffff
+        has_trigger[i] = False
+    publisher = RawDataPublisher(socket_address='inproc://test_raw_data_publisher_%d_%d' % (prescale, trigger_only), queue_size=100, hwm=1000, prescale=prescale, trigger_only=trigger_only)
+    socket = zmq.Context.instance().socket(zmq.SUB)
+    socket.setsockopt(zmq.SUBSCRIBE, b'')
+    socket.connect(publisher.socket_address)
+    time.sleep(0.2)  # wait for subscription
+    try:
+        for readout in readouts:
+            publisher.send_data(readout)
+    finally:
+        publisher.close()
+    received = []
+    while socket.poll(timeout=100):
+        header = socket.recv_json()
+        received.append((header['prescale'], socket.recv()))
+    socket.close()
+
+    if trigger_only:
+        expected = [i for i in range(len(readouts)) if has_trigger[i]]
+        expected_prescale = np.diff(np.concatenate(([-1], expected)))
+    else:
+        expected = list(range(prescale - 1, len(readouts), prescale))
+        expected_prescale = [prescale] * len(expected)
+    assert [item[0] for item in received] == list(expected_prescale)
+    assert [item[1] for item in received] == [readouts[i][0].tobytes() for i in expected]
+    assert publisher.get_statistics()['n_skipped'] == len(readouts) - len(expected)
+
+
+def test_raw_data_publisher_topics():
+    ''' Test topics with selected planes sent by the publisher '''
+    readouts = create_m26_readouts(n_readouts=10)
+    publisher = RawDataPublisher(socket_address='inproc://test_raw_data_publisher_topics', queue_size=100, hwm=1000, topics={'planes_1_2': [1, 'plane_2', 'trigger'], 'plane_3': [3], 'all': None})
+    sockets = {}
+    for topic in ('planes_1_2', 'all'):
+        sockets[topic] = zmq.Context.instance().socket(zmq.SUB)
+        sockets[topic].setsockopt(zmq.SUBSCRIBE, get_topic_subscription(topic))
+        sockets[topic].connect(publisher.socket_address)
+    try:
+        for _ in range(50):  # wait for the subscriptions received by the publisher thread
+            if len(publisher.get_subscribed_topics()) == 2:
+                break
+            time.sleep(0.1)
+        assert sorted(publisher.get_subscribed_topics()) == ['all', 'planes_1_2']  # no subscriber of plane_3
+        publisher.send_meta_data({'reset': True}, name='Reset')
+        for readout in readouts:
+            publisher.send_data(readout)
+    finally:
+        publisher.close()
+    for topic, socket in sockets.items():
+        assert socket.recv_json() == {'topic': topic, 'name': 'Reset', 'conf': {'reset': True}}
+        received = []
+        while socket.poll(timeout=100):
+            header = socket.recv_json()
+            assert header['topic'] == topic
+            received.append(np.frombuffer(socket.recv(), dtype=header['dtype']))
+        socket.close()
+        if topic == 'all':
+            expected = [readout[0] for readout in readouts]
+        else:
+            expected = [readout[0][np.isin(readout[0] & 0xFFF00000, [0x20100000, 0x20200000]) | (readout[0] >= 0x80000000)] for readout in readouts]
+        assert len(received) == len(readouts)
+        for received_raw_data, expected_raw_data in zip(received, expected):
+            assert np.array_equal(received_raw_data, expected_raw_data)
+
+
+@pytest.mark.parametrize('compression', [None, 'blosc2', 'lz4'])
+def test_compress_data(compression):
+    ''' Test compression of the data sent to the online monitor '''
+    if compression:
+        pytest.importorskip(compression)
+    raw_data = np.repeat(np.arange(1000, dtype=np.uint32), 10)
+    buffer = compress_data(raw_data, compression) if compression else raw_data.tobytes()
+    if compression:
+        assert len(buffer) < raw_data.nbytes / 4
+    assert np.array_equal(decompress_data(buffer, compression=compression, dtype=str(raw_data.dtype), shape=raw_data.shape), raw_data)
+
+
+@pytest.mark.parametrize('prefetch, mmap, complib', [(True, False, 'blosc'), (False, True, 'none'), (True, True, 'none')])
+def test_raw_data_reader(raw_data_filename, prefetch, mmap, complib):
+    ''' Test reading of raw data file in blocks '''
+    readouts = create_readouts(n_readouts=60)
+    with open_raw_data_file(raw_data_filename, mode='w', scan_parameters={'PARAM': 0}, raw_data_compression=dict(complib=complib), expected_words=2**10) as raw_data_file:
+        for i in range(0, len(readouts), 20):
+            raw_data_file.append(readouts[i:i + 20], scan_parameters={'PARAM': i // 20})
+    raw_data = np.concatenate([readout[0] for readout in readouts])
+
+    with M26RawDataReader(raw_data_filename + '.h5', block_size=3000, prefetch=prefetch, mmap=mmap) as reader:
+        assert (reader._mmap is not None) == mmap
+        assert reader.n_readouts == len(readouts)
+        assert np.array_equal(reader.read(), raw_data)
+        assert np.array_equal(reader.read(1000, 5555), raw_data[1000:5555])
+        # blocks of whole readouts
+        blocks = list(reader.iter_blocks())
+        assert np.array_equal(np.concatenate([block[0] for block in blocks]), raw_data)
+        assert np.concatenate([block[1] for block in blocks]).shape[0] == len(readouts)
+        for block_raw_data, block_meta_data in blocks:
+            assert block_raw_data.shape[0] <= 3000 or block_meta_data.shape[0] == 1
+            assert block_raw_data.shape[0] == block_meta_data['index_stop'][-1] - block_meta_data['index_start'][0]
+        assert reader._meta_data is None  # meta data is read block by block
+        # readouts
+        for readout, (readout_raw_data, readout_meta_data) in zip(readouts, reader.iter_readouts()):
+            assert np.array_equal(readout_raw_data, readout[0])
+            assert readout_meta_data['timestamp_start'] == readout[1]
+        # scan parameters
+        assert [item[0] for item in reader.get_scan_parameter_ranges()] == [{'PARAM': 0}, {'PARAM': 1}, {'PARAM': 2}]
+        for scan_parameters, block_raw_data, block_meta_data in reader.iter_scan_parameters():
+            index_start, index_stop = block_meta_data['index_start'][0], block_meta_data['index_stop'][-1]
+            assert np.array_equal(block_raw_data, raw_data[index_start:index_stop])
+            readout_index = np.searchsorted(reader.meta_data['index_start'], index_start)
+            assert readout_index // 20 == scan_parameters['PARAM']
+            assert (readout_index + block_meta_data.shape[0] - 1) // 20 == scan_parameters['PARAM']
+        # stop iteration early
+        for _ in reader.iter_blocks(block_size=100):
+            break
+
+
+@pytest.mark.parametrize('scan_parameter_table', [False, True])
+def test_scan_parameter_ranges(raw_data_filename, scan_parameter_table):
+    ''' Test scan parameter ranges '''
+    readouts = create_readouts(n_readouts=60)
+    values = [(0, 0), (0, 0), (1, 0), (1, 1), (0, 0), (0, 0)]  # scan parameter values of every 10 readouts
+    with open_raw_data_file(raw_data_filename, mode='w', scan_parameters=['PARAM_A', 'PARAM_B'], scan_parameter_table=scan_parameter_table) as raw_data_file:
+        for i in range(0, len(readouts), 5):
+            raw_data_file.append(readouts[i:i + 5], scan_parameters={'PARAM_A': values[i // 10][0], 'PARAM_B': values[i // 10][1]})
+    raw_data = np.concatenate([readout[0] for readout in readouts])
+
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        assert ('scan_parameters' in in_file_h5.root) == scan_parameter_table
+        scan_parameter_ranges = in_file_h5.root.scan_parameter_ranges[:]
+        assert scan_parameter_ranges.shape[0] == 4
+        assert np.array_equal(scan_parameter_ranges['readout_start'], [0, 20, 30, 40])
+        assert np.array_equal(scan_parameter_ranges['readout_stop'], [20, 30, 40, 60])
+        if scan_parameter_table:  # ranges from scan parameter values of every readout
+            assert np.array_equal(get_scan_parameter_ranges(in_file_h5.root.scan_parameters[:], in_file_h5.root.meta_data[:]), scan_parameter_ranges)
+    with M26RawDataReader(raw_data_filename + '.h5') as reader:
+        assert [item[1:] for item in reader.get_scan_parameter_ranges()] == [(0, 20), (20, 30), (30, 40), (40, 60)]
+        assert reader.get_scan_parameter_ranges(names=['PARAM_A']) == [({'PARAM_A': 0}, 0, 20), ({'PARAM_A': 1}, 20, 40), ({'PARAM_A': 0}, 40, 60)]
+        assert np.array_equal(reader.scan_parameters['PARAM_A'], np.repeat([value[0] for value in values], 10))
+        scan_parameter_ranges = reader.find_scan_parameter_ranges(PARAM_A=0, PARAM_B=0)
+        assert np.array_equal(scan_parameter_ranges['readout_start'], [0, 40])
+        for scan_parameter_range in scan_parameter_ranges:
+            index_start = reader.meta_data['index_start'][scan_parameter_range['readout_start']]
+            index_stop = reader.meta_data['index_stop'][scan_parameter_range['readout_stop'] - 1]
+            assert np.array_equal(reader.read(scan_parameter_range['index_start'], scan_parameter_range['index_stop']), raw_data[index_start:index_stop])
+        with pytest.raises(ValueError):
+            reader.find_scan_parameter_ranges(PARAM_C=0)
+
+
+def create_m26_readouts(n_readouts=20, n_frames=5, seed=0):
+    ''' Create data tuples with trigger words and Mimosa26 frame headers of 6 planes '''
+    rng = np.random.default_rng(seed)
+    readouts = []
+    trigger_number = 0
+    for i in range(n_readouts):
+        words = []
+        for _ in range(n_frames):
+            for plane in range(1, 7):
+                words.append(0x20010000 | (plane << 20) | rng.integers(0, 2**16))  # frame header
+                words.extend(0x20000000 | (plane << 20) | rng.integers(0, 2**16, size=rng.integers(0, 5)))  # other Mimosa26 words
+            words.append(0x80000000 | trigger_number)
+            trigger_number += 1
+        readouts.append((np.array(words, dtype=np.uint32), float(i), float(i + 1), 0))
+    return readouts
+
+
+def test_raw_data_index(raw_data_filename):
+    ''' Test trigger index and frame index '''
+    readouts = create_m26_readouts()
+    with open_raw_data_file(raw_data_filename, mode='w', frame_index_interval=3) as raw_data_file:
+        for i in range(0, len(readouts), 3):
+            raw_data_file.append(readouts[i:i + 3])
+    raw_data = np.concatenate([readout[0] for readout in readouts])
+
+    with M26RawDataReader(raw_data_filename + '.h5') as reader:
+        trigger_index = reader.h5_file.root.trigger_index[:]
+        frame_index = reader.h5_file.root.frame_index[:]
+        assert np.array_equal(trigger_index['trigger_number'], np.arange(len(readouts) * 5))
+        assert np.array_equal(raw_data[trigger_index['word_index']], trigger_index['trigger_number'] | 0x80000000)
+        word_index = reader.find_trigger(42)
+        assert word_index.shape[0] == 1
+        assert reader.get_readout_index(word_index[0]) == 42 // 5
+        for plane in range(1, 7):
+            plane_frame_index = reader.get_frame_index(plane)
+            frame_headers = np.flatnonzero((raw_data & 0xFFF10000) == (0x20010000 | (plane << 20)))
+            assert np.array_equal(plane_frame_index['frame_count'], np.arange(0, len(readouts) * 5, 3))
+            assert np.array_equal(plane_frame_index['word_index'], frame_headers[::3])
+
+    # create index of existing file
+    create_raw_data_index(raw_data_filename + '.h5', frame_index_interval=3, block_size=100)
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        assert np.array_equal(in_file_h5.root.trigger_index[:], trigger_index)
+        assert np.array_equal(in_file_h5.root.frame_index[:], frame_index)
+
+
+def test_readout_statistics(raw_data_filename):
+    ''' Test readout statistics in meta data '''
+    readouts = create_m26_readouts(n_readouts=10, seed=2)
+    readouts[3][0][5] |= 0x00020000  # data loss
+    with open_raw_data_file(raw_data_filename, mode='w') as raw_data_file:
+        raw_data_file.append(readouts)
+
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        meta_data = read_meta_data(in_file_h5)
+    for readout, readout_meta_data in zip(readouts, meta_data):
+        raw_data = readout[0]
+        assert readout_meta_data['n_trigger_words'] == np.count_nonzero(raw_data & 0x80000000)
+        timestamps = []
+        for plane in range(1, 7):
+            plane_words = raw_data[(raw_data & 0xFFF00000) == (0x20000000 | (plane << 20))]
+            assert readout_meta_data['n_m26_words'][plane - 1] == plane_words.shape[0]
+            assert bool(readout_meta_data['data_loss'] & (1 << (plane - 1))) == bool(np.any(plane_words & 0x00020000))
+            timestamps.extend([(np.flatnonzero(raw_data == word)[0], (word & 0xFFFF) | ((plane_words[i + 1] & 0xFFFF) << 16)) for i, word in enumerate(plane_words[:-1]) if word & 0x00010000])
+        timestamps = sorted(timestamps)
+        assert readout_meta_data['m26_timestamp_start'] == timestamps[0][1]
+        assert readout_meta_data['m26_timestamp_stop'] == timestamps[-1][1]
+    assert meta_data['data_loss'][3] != 0
+    assert np.count_nonzero(meta_data['data_loss']) == 1
+
+
+def test_raw_data_file_writer_exception(raw_data_filename):
+    ''' Test that errors of the asynchronous writer are raised in the calling thread '''
+    raw_data_file = open_raw_data_file(raw_data_filename, mode='w', asynchronous=True)
+    raw_data_file.append([(np.zeros((10, 2), dtype=np.uint32), 0.0, 0.0, 0)])  # wrong shape
+    with pytest.raises(Exception):
+        raw_data_file.close()
+
+
+def test_raw_data_file_close_file(raw_data_filename):
+    ''' Test that queued data of the asynchronous writer is written when closing the file only '''
+    readouts = create_readouts()
+    raw_data_file = open_raw_data_file(raw_data_filename, mode='w', asynchronous=True)
+    with raw_data_file.lock:  # block the writer thread to keep the data in the queue
+        for readout in readouts[:50]:
+            raw_data_file.append([readout])
+        assert raw_data_file._write_queue.qsize() > 0
+    raw_data_file.close(close_socket=False)
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        assert in_file_h5.root.meta_data.nrows == 50
+    raw_data_file.open(raw_data_filename, mode='a')
+    for readout in readouts[50:]:
+        raw_data_file.append([readout])
+    raw_data_file.close()
+
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        meta_data = in_file_h5.root.meta_data[:]
+        raw_data = in_file_h5.root.raw_data
+        assert meta_data.shape[0] == len(readouts)
+        for i, readout in enumerate(readouts):
+            assert np.array_equal(raw_data[meta_data['index_start'][i]:meta_data['index_stop'][i]], readout[0])
+
+
+class MetaTableV1(tb.IsDescription):
+    ''' Meta data with 32-bit word indices (layout version 1) '''
+    index_start = tb.UInt32Col(pos=0)
+    index_stop = tb.UInt32Col(pos=1)
+    data_length = tb.UInt32Col(pos=2)
+    timestamp_start = tb.Float64Col(pos=3)
+    timestamp_stop = tb.Float64Col(pos=4)
+    error = tb.UInt32Col(pos=5)
+
+
+def test_meta_data_layout_version_1(raw_data_filename):
+    ''' Test reading of meta data with 32-bit word indices '''
+    data_length = np.full(6, 2**31 - 1, dtype=np.uint64)
+    index_stop = np.cumsum(data_length)
+    index_start = index_stop - data_length
+    with tb.open_file(raw_data_filename + '.h5', mode='w') as out_file_h5:
+        meta_data_table = out_file_h5.create_table(out_file_h5.root, name='meta_data', description=MetaTableV1)
+        for i in range(data_length.shape[0]):
+            meta_data_table.row['index_start'] = index_start[i] % 2**32  # 32-bit word indices wrap around
+            meta_data_table.row['index_stop'] = index_stop[i] % 2**32
+            meta_data_table.row['data_length'] = data_length[i]
+            meta_data_table.row.append()
+
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        assert get_meta_data_layout_version(in_file_h5.root.meta_data) == 1
+        meta_data = read_meta_data(in_file_h5)
+        assert np.array_equal(meta_data['index_start'], index_start)
+        assert np.array_equal(meta_data['index_stop'], index_stop)
+        meta_data = read_meta_data(in_file_h5, start=3, stop=5)
+        assert np.array_equal(meta_data['index_start'], index_start[3:5])
+        assert np.array_equal(meta_data['index_stop'], index_stop[3:5])
+
+    # appending to files with 32-bit word indices is limited to 2**32 words
+    with open_raw_data_file(raw_data_filename, mode='a') as raw_data_file:
+        assert raw_data_file.max_table_size == 2**32 - 1
+    with open_raw_data_file(raw_data_filename + '_new', mode='w') as raw_data_file:
+        assert raw_data_file.max_table_size > 2**32
+        assert get_meta_data_layout_version(raw_data_file.meta_data_table) == META_DATA_LAYOUT_VERSION
+
+
+@pytest.mark.parametrize('complib, shuffle', [('blosc:lz4', 'byte'), ('blosc:zstd', 'bit'), ('none', 'none')])
+def test_raw_data_compression(raw_data_filename, complib, shuffle):
+    ''' Test compression settings of raw data '''
+    readouts = create_readouts(n_readouts=10)
+    with open_raw_data_file(raw_data_filename, mode='w', raw_data_compression=dict(complib=complib, complevel=3, shuffle=shuffle, nthreads=2)) as raw_data_file:
+        raw_data_file.append(readouts)
+
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        filters = in_file_h5.root.raw_data.filters
+        if complib == 'none':
+            assert filters.complevel == 0
+        else:
+            assert filters.complib == complib
+            assert filters.complevel == 3
+            assert filters.bitshuffle == (shuffle == 'bit')
+        assert np.array_equal(in_file_h5.root.raw_data[:], np.concatenate([readout[0] for readout in readouts]))
+
+
+def test_raw_data_chunkshape_and_repack(raw_data_filename):
+    ''' Test chunkshape from expected run size and repacking of raw data file '''
+    assert estimate_expected_words(data_rate=1000, scan_timeout=60) == 60000
+    assert estimate_expected_words(data_rate=1000, scan_timeout=60, max_triggers=100, trigger_rate=10) == 10000
+    assert estimate_expected_words(data_rate=1000, max_triggers=100, run_duration=10) == 10000
+
+    readouts = create_readouts(n_readouts=50)
+    with open_raw_data_file(raw_data_filename, mode='w', expected_words=2**32) as raw_data_file:
+        assert raw_data_file.raw_data_earray.chunkshape == (2**18,)
+        raw_data_file.append(readouts)
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        raw_data = in_file_h5.root.raw_data[:]
+        meta_data = in_file_h5.root.meta_data[:]
+
+    repack_raw_data_file(raw_data_filename + '.h5', chunk_size=2**10)
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        assert in_file_h5.root.raw_data.chunkshape == (2**10,)
+        assert np.array_equal(in_file_h5.root.raw_data[:], raw_data)
+        assert np.array_equal(in_file_h5.root.meta_data[:], meta_data)
+        assert get_meta_data_layout_version(in_file_h5.root.meta_data) == META_DATA_LAYOUT_VERSION
+    assert os.listdir(os.path.dirname(raw_data_filename)) == [os.path.basename(raw_data_filename) + '.h5']
+
+
+@pytest.mark.parametrize('asynchronous', [False, True])
+def test_binary_raw_data_file(raw_data_filename, asynchronous):
+    ''' Test writing of binary raw data files and conversion to HDF5 '''
+    readouts = create_m26_readouts(n_readouts=30)
+    with open_raw_data_file(raw_data_filename, mode='w', scan_parameters={'n_trigger': 0}, backend='binary', asynchronous=asynchronous, flush_interval=0.1) as raw_data_file:
+        raw_data_file.save_configuration('configuration', {'run_id': 'M26_TELESCOPE', 'max_triggers': 100})
+        for i in range(0, len(readouts), 10):
+            raw_data_file.append(readouts[i:i + 10], scan_parameters={'n_trigger': i // 20})
+    assert raw_data_file.get_statistics()['n_words'] == sum(readout[0].shape[0] for readout in readouts)
+    assert sorted(os.listdir(os.path.dirname(raw_data_filename))) == [os.path.basename(raw_data_filename) + extension for extension in ('.json', '.meta', '.raw', '.scan')]
+    # reference HDF5 raw data file
+    with open_raw_data_file(os.path.join(os.path.dirname(raw_data_filename), 'reference'), mode='w', scan_parameters={'n_trigger': 0}) as raw_data_file:
+        raw_data_file.save_configuration('configuration', {'run_id': 'M26_TELESCOPE', 'max_triggers': 100})
+        for i in range(0, len(readouts), 10):
+            raw_data_file.append(readouts[i:i + 10], scan_parameters={'n_trigger': i // 20})
+
+    assert convert_raw_data_file(raw_data_filename + '.raw', block_size=100) == raw_data_filename + '.h5'
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        with tb.open_file(os.path.join(os.path.dirname(raw_data_filename), 'reference.h5'), mode='r') as reference_file_h5:
+            for node in ('raw_data', 'meta_data', 'scan_parameter_ranges', 'trigger_index', 'frame_index', 'configuration/configuration'):
+                assert np.array_equal(in_file_h5.get_node('/' + node)[:], reference_file_h5.get_node('/' + node)[:])
+
+
+def test_swmr_raw_data_file(raw_data_filename):
+    ''' Test writing of raw data files in SWMR mode and reading while writing '''
+    pytest.importorskip('h5py')
+    readouts = create_m26_readouts(n_readouts=30)
+    raw_data_file = open_raw_data_file(raw_data_filename, mode='w', scan_parameters={'n_trigger': 0}, backend='swmr', run_summary=True)
+    raw_data_file.save_configuration('configuration', {'run_id': 'M26_TELESCOPE', 'max_triggers': 100})
+    with M26RawDataTailReader(raw_data_filename + '.h5', block_size=100, poll_interval=0.01, timeout=1.0) as tail_reader:
+        assert tail_reader.read_new() is None
+        tail_readouts = []
+        for i in range(0, len(readouts), 10):
+            raw_data_file.append(readouts[i:i + 10], scan_parameters={'n_trigger': i // 20})
+            for raw_data, meta_data in tail_reader.iter_readouts():
+                tail_readouts.append(raw_data)
+                if len(tail_readouts) == i + 10:
+                    break
+    raw_data_file.close()  # after closing the tail reader, same process
+    assert len(tail_readouts) == len(readouts)
+    for tail_readout, readout in zip(tail_readouts, readouts):
+        assert np.array_equal(tail_readout, readout[0])
+    # reference HDF5 raw data file
+    with open_raw_data_file(os.path.join(os.path.dirname(raw_data_filename), 'reference'), mode='w', scan_parameters={'n_trigger': 0}, run_summary=True) as raw_data_file:
+        raw_data_file.save_configuration('configuration', {'run_id': 'M26_TELESCOPE', 'max_triggers': 100})
+        for i in range(0, len(readouts), 10):
+            raw_data_file.append(readouts[i:i + 10], scan_parameters={'n_trigger': i // 20})
+
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        with tb.open_file(os.path.join(os.path.dirname(raw_data_filename), 'reference.h5'), mode='r') as reference_file_h5:
+            for node in ('raw_data', 'meta_data', 'scan_parameter_ranges', 'trigger_index', 'frame_index', 'configuration/configuration', 'summary/rate', 'summary/occupancy'):
+                assert np.array_equal(in_file_h5.get_node('/' + node)[:], reference_file_h5.get_node('/' + node)[:])
+            assert np.array_equal(in_file_h5.root.frame_index.attrs.frame_counts, reference_file_h5.root.frame_index.attrs.frame_counts)
+    with M26RawDataReader(raw_data_filename + '.h5') as reader:
+        scan_parameter_ranges = reader.find_scan_parameter_ranges(n_trigger=1)
+        assert scan_parameter_ranges['readout_start'].tolist() == [20]
+        assert scan_parameter_ranges['readout_stop'].tolist() == [30]
+
+
+def create_m26_frame(plane, column, row, frame_id=0):
+    ''' Create a Mimosa26 frame with a single hit '''
+    words = [0x0001, 0x0000, frame_id & 0xFFFF, frame_id >> 16, 1, 1, (row << 4) | 1, column << 2, 0xaa50, 0xaa50 | plane]
+    words = [0x20000000 | (plane << 20) | word for word in words]
+    words[0] |= 0x00010000  # frame header
+    return words
+
+
+def test_run_summary(raw_data_filename, monkeypatch):
+    ''' Test summary of raw data files '''
+    readouts = []
+    for i in range(20):
+        words = [word for plane in range(1, 7) for word in create_m26_frame(plane, column=10 * plane, row=i % 4, frame_id=i)]
+        words.append(0x80000000 | i)
+        readouts.append((np.array(words, dtype=np.uint32), 100.0 + i * 0.5, 100.0 + (i + 1) * 0.5, 1 if i == 7 else 0))
+    readouts[5][0][12] |= 0x00020000  # data loss plane 2
+    n_words = sum(readout[0].shape[0] for readout in readouts)
+    monkeypatch.setattr(M26RawDataFile, 'max_table_size', n_words // 2)  # two files
+    with open_raw_data_file(raw_data_filename, mode='w', run_summary=True) as raw_data_file:
+        raw_data_file.append(readouts[:10])
+    with open_raw_data_file(raw_data_filename, mode='a', run_summary=True) as raw_data_file:  # continue summary
+        raw_data_file.append(readouts[10:])
+
+    for filename, file_readouts in ((raw_data_filename + '.h5', readouts[:10]), (raw_data_filename + '_1.h5', readouts[10:])):
+        with tb.open_file(filename, mode='r') as in_file_h5:
+            summary = in_file_h5.root.summary
+            rate = summary.rate[:]
+            occupancy = summary.occupancy[:]
+            assert summary._v_attrs.n_readouts == len(file_readouts)
+            assert summary._v_attrs.n_trigger_words == len(file_readouts)
+            assert summary._v_attrs.trigger_number_first == int(file_readouts[0][0][-1] & 0x7FFFFFFF)
+            assert summary._v_attrs.trigger_number_last == int(file_readouts[-1][0][-1] & 0x7FFFFFFF)
+            assert np.array_equal(rate['timestamp'], np.arange(file_readouts[0][1], file_readouts[-1][1] + 0.5, 1.0))
+            assert np.all(rate['n_readouts'] == 2)
+            assert np.array_equal(rate['n_words'], [sum(readout[0].shape[0] for readout in file_readouts[i:i + 2]) for i in range(0, len(file_readouts), 2)])
+            assert np.array_equal(rate['trigger_number_first'], [int(readout[0][-1] & 0x7FFFFFFF) for readout in file_readouts[::2]])
+            assert np.array_equal(rate['trigger_number_last'], [int(readout[0][-1] & 0x7FFFFFFF) for readout in file_readouts[1::2]])
+            for plane in range(1, 7):
+                hits = np.zeros(shape=(1152, 576), dtype=np.uint32)
+                for readout in file_readouts:
+                    if readout is not readouts[5] or plane != 2:  # frame with data loss is discarded
+                        hits[10 * plane, (readout[0][6] >> 4) & 0x7FF] += 1
+                assert np.array_equal(occupancy[:, :, plane - 1], hits)
+            # same summary from existing file
+            attrs = {name: summary._v_attrs[name] for name in summary._v_attrs._f_list()}
+        create_run_summary(filename)
+        with tb.open_file(filename, mode='r') as in_file_h5:
+            assert np.array_equal(in_file_h5.root.summary.rate[:], rate)
+            assert np.array_equal(in_file_h5.root.summary.occupancy[:], occupancy)
+            for name, value in attrs.items():
+                assert np.array_equal(in_file_h5.root.summary._v_attrs[name], value)
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        assert in_file_h5.root.summary._v_attrs.n_errors == 1
+        assert np.array_equal(in_file_h5.root.summary._v_attrs.n_data_loss, [0, 1, 0, 0, 0, 0])
+
+
+def test_run_summary_time_bins():
+    ''' Test time bins of the summary for readouts in arbitrary order '''
+    summary = RunSummary(time_bin=1.0, occupancy=False)
+    timestamps = [5.2, 7.5, 6.1, 2.1, 8.0, 1000.3, 999.9]
+    n_allocations = 0
+    for i, timestamp in enumerate(timestamps):
+        meta_data = np.zeros(shape=(1,), dtype=[('index_start', np.uint32), ('index_stop', np.uint32), ('data_length', np.uint32),
+                                                ('timestamp_start', np.float64), ('timestamp_stop', np.float64), ('error', np.uint32)])
+        meta_data['data_length'] = 1
+        meta_data['timestamp_start'] = timestamp
+        buffer = summary._buffer
+        summary.add(np.array([0x80000000 | i], dtype=np.uint32), meta_data)
+        n_allocations += summary._buffer is not buffer
+    rate = summary._rate
+    assert np.array_equal(rate['timestamp'], np.arange(2.0, 1001.0))
+    assert np.array_equal(np.flatnonzero(rate['n_readouts']), sorted(int(timestamp) - 2 for timestamp in timestamps))
+    assert np.array_equal(rate['trigger_number_first'][[int(timestamp) - 2 for timestamp in timestamps]], np.arange(len(timestamps)))
+    assert np.all(rate['trigger_number_first'][rate['n_readouts'] == 0] == -1)
+    assert n_allocations < len(timestamps)
+    assert summary.get_totals()['n_readouts'] == len(timestamps)
+
+
+def test_raw_data_transform(raw_data_filename):
+    ''' Test reversible transform of the raw data words '''
+    readouts = []
+    for i in range(1200):
+        words = [word for plane in range(1, 7) for word in create_m26_frame(plane, column=(3 * i) % 1152, row=(7 * i) % 576, frame_id=i)]
+        words.append(0x80000000 | i)
+        readouts.append((np.array(words, dtype=np.uint32), float(i), float(i + 1), 0))
+    raw_data = np.concatenate([readout[0] for readout in readouts])
+    # encoding in pieces, decoding from beginning of a block
+    for data in (raw_data, create_readouts(n_readouts=1, n_words=10000)[0][0]):
+        transform = M26DeltaTransform(block_size=1000)
+        encoded = np.concatenate([transform.encode(data[start:start + 37], word_offset=start) for start in range(0, data.shape[0], 37)])
+        assert np.array_equal(M26DeltaTransform(block_size=1000).decode(encoded[3000:], word_offset=3000), data[3000:])
+    # reference HDF5 raw data file
+    with open_raw_data_file(os.path.join(os.path.dirname(raw_data_filename), 'reference'), mode='w') as raw_data_file:
+        raw_data_file.append(readouts)
+    with open_raw_data_file(raw_data_filename, mode='w', raw_data_transform='m26_delta') as raw_data_file:
+        raw_data_file.append(readouts[:700])
+    with open_raw_data_file(raw_data_filename, mode='a') as raw_data_file:  # continue encoding of existing file
+        raw_data_file.append(readouts[700:])
+
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        with tb.open_file(os.path.join(os.path.dirname(raw_data_filename), 'reference.h5'), mode='r') as reference_file_h5:
+            assert in_file_h5.root.raw_data.nrows > 2**16
+            assert in_file_h5.root.raw_data.size_on_disk < reference_file_h5.root.raw_data.size_on_disk
+            assert np.array_equal(read_raw_data(in_file_h5.root.raw_data), raw_data)
+            for node in ('meta_data', 'trigger_index', 'frame_index'):
+                assert np.array_equal(in_file_h5.get_node('/' + node)[:], reference_file_h5.get_node('/' + node)[:])
+    with M26RawDataReader(raw_data_filename + '.h5', block_size=5000) as reader:
+        assert np.array_equal(reader.read(start=70000, stop=70100), raw_data[70000:70100])
+        assert np.array_equal(np.concatenate([data for data, _ in reader.iter_blocks()]), raw_data)
+    repack_raw_data_file(raw_data_filename + '.h5', raw_data_transform='none')
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        assert 'raw_data_transform' not in in_file_h5.root.raw_data.attrs
+        assert np.array_equal(in_file_h5.root.raw_data[:], raw_data)
+
+
+def test_demultiplexed_raw_data(raw_data_filename):
+    ''' Test raw data file with per-plane demultiplexed raw data '''
+    readouts = []
+    for i in range(300):
+        words = [word for plane in range(1, 7) for word in create_m26_frame(plane, column=(3 * i) % 1152, row=(7 * i) % 576, frame_id=i)]
+        words.insert(i % len(words), 0x80000000 | i)
+        words.append(0x00000fff & i)
+        readouts.append((np.array(words, dtype=np.uint32), float(i), float(i + 1), 0))
+    raw_data = np.concatenate([readout[0] for readout in readouts])
+    stream_ids = get_raw_data_stream_ids(raw_data)
+    with open_raw_data_file(os.path.join(os.path.dirname(raw_data_filename), 'reference'), mode='w') as raw_data_file:
+        raw_data_file.append(readouts)
+    with open_raw_data_file(raw_data_filename, mode='w', demultiplex=True) as raw_data_file:
+        raw_data_file.append(readouts[:170])
+    with open_raw_data_file(raw_data_filename, mode='a') as raw_data_file:  # continue demultiplexed raw data
+        raw_data_file.append(readouts[170:])
+
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        with tb.open_file(os.path.join(os.path.dirname(raw_data_filename), 'reference.h5'), mode='r') as reference_file_h5:
+            assert 'raw_data' not in in_file_h5.root
+            assert sorted(in_file_h5.root.raw_data_streams._v_children) == ['order', 'other', 'plane_1', 'plane_2', 'plane_3', 'plane_4', 'plane_5', 'plane_6', 'trigger']
+            assert np.array_equal(in_file_h5.root.raw_data_streams.plane_3[:], raw_data[stream_ids == 3])
+            assert get_raw_data(in_file_h5).nrows == raw_data.shape[0]
+            for node in ('meta_data', 'trigger_index', 'frame_index'):
+                assert np.array_equal(in_file_h5.get_node('/' + node)[:], reference_file_h5.get_node('/' + node)[:])
+    with M26RawDataReader(raw_data_filename + '.h5', block_size=5000) as reader:
+        assert np.array_equal(reader.read(start=1234, stop=9876), raw_data[1234:9876])
+        assert np.array_equal(np.concatenate([data for data, _ in reader.iter_blocks()]), raw_data)
+        for stream, stream_id in ((1, 1), ('plane_6', 6), ('trigger', 16), ('other', 17)):
+            assert np.array_equal(reader.read_stream(stream, start=1234, stop=9876), raw_data[1234:9876][stream_ids[1234:9876] == stream_id])
+            assert np.array_equal(reader.read_stream(stream), raw_data[stream_ids == stream_id])
+        assert reader.read_stream(7).shape[0] == 0
+    with M26RawDataReader(os.path.join(os.path.dirname(raw_data_filename), 'reference.h5')) as reader:  # not demultiplexed
+        assert np.array_equal(reader.read_stream('trigger', start=1234, stop=9876), raw_data[1234:9876][stream_ids[1234:9876] == 16])
+    repack_raw_data_file(raw_data_filename + '.h5', compression=dict(complib='blosc:zstd', complevel=5, shuffle='bit'))
+    with M26RawDataReader(raw_data_filename + '.h5') as reader:
+        assert np.array_equal(reader.read(), raw_data)
+
+
+def test_demultiplexed_raw_data_order(raw_data_filename):
+    ''' Test reading of demultiplexed raw data with an order table of several chunks '''
+    rng = np.random.default_rng(0)
+    prefixes = np.array([0x20100000, 0x20200000, 0x20300000, 0x20500000, 0x20600000, 0x80000000, 0x00000000], dtype=np.uint32)
+    prefix = np.repeat(prefixes[rng.integers(0, prefixes.shape[0], size=20000)], rng.integers(1, 5, size=20000))
+    raw_data = prefix | rng.integers(0, 2**16, size=prefix.shape[0], dtype=np.uint32)
+    raw_data[:10] = 0x20400000  # words of plane 4 only at the beginning and the end of the data
+    raw_data[-10:] = 0x20400000
+    stream_ids = get_raw_data_stream_ids(raw_data)
+    with tb.open_file(raw_data_filename + '.h5', mode='w') as out_file_h5:
+        demultiplexed_raw_data = DemultiplexedRawData(out_file_h5)
+        for start in range(0, raw_data.shape[0], 7001):
+            demultiplexed_raw_data.append(raw_data[start:start + 7001])
+        assert demultiplexed_raw_data.order_table.nrows > 3 * demultiplexed_raw_data.order_table.chunkshape[0]
+        assert np.array_equal(demultiplexed_raw_data.read(), raw_data)
+        for start, stop in rng.integers(0, raw_data.shape[0], size=(20, 2)):
+            start, stop = min(start, stop), max(start, stop)
+            assert np.array_equal(demultiplexed_raw_data.read(start, stop), raw_data[start:stop])
+            for stream_id in (1, 4, 16, 17):
+                assert np.array_equal(demultiplexed_raw_data.read_stream(stream_id, start, stop), raw_data[start:stop][stream_ids[start:stop] == stream_id])
+
+
+def test_raw_data_view(raw_data_filename):
+    ''' Test view of a run split into several files '''
+    readouts = create_m26_readouts(n_readouts=40)
+    max_file_size = 1000 * 4 / 1024.0 ** 2  # 1000 words
+    with open_raw_data_file(os.path.join(os.path.dirname(raw_data_filename), 'reference'), mode='w', scan_parameters={'PARAM': 0}) as raw_data_file:
+        for i in range(0, 40, 5):
+            raw_data_file.append(readouts[i:i + 5], scan_parameters={'PARAM': i // 20})
+    with open_raw_data_file(raw_data_filename, mode='w', scan_parameters={'PARAM': 0}, max_file_size=max_file_size) as raw_data_file:
+        for i in range(0, 40, 5):
+            raw_data_file.append(readouts[i:i + 5], scan_parameters={'PARAM': i // 20})
+    with tb.open_file(raw_data_filename + '_interpreted.h5', mode='w') as out_file_h5:  # other file of the run
+        out_file_h5.create_array(out_file_h5.root, name='hits', obj=np.zeros(10))
+    with open_raw_data_file(raw_data_filename + '_TEST', mode='w') as other_raw_data_file:  # other run with the same prefix
+        other_raw_data_file.append(readouts[:5])
+    filenames = get_raw_data_filenames(raw_data_filename + '.h5')
+    assert len(filenames) == len(raw_data_file.output_filenames) > 3
+    assert filenames == [raw_data_filename + '.h5'] + [raw_data_filename + '_%d.h5' % index for index in range(1, len(filenames))]
+    # new files for scan parameter values
+    scan_filename = os.path.join(os.path.dirname(raw_data_filename), 'run_3_M26_TELESCOPE')
+    with open_raw_data_file(scan_filename, mode='w', scan_parameters={'PARAM': 0}) as scan_raw_data_file:
+        for i in range(0, 40, 10):
+            scan_raw_data_file.append(readouts[i:i + 10], scan_parameters={'PARAM': i // 10}, new_file=True)
+    assert get_raw_data_filenames(scan_filename) == [scan_filename + '.h5'] + [scan_filename + '_PARAM_%d.h5' % i for i in range(1, 4)]
+
+    with M26RawDataReader(os.path.join(os.path.dirname(raw_data_filename), 'reference.h5')) as reader:
+        with M26RawDataView(raw_data_filename, block_size=1500) as view:
+            assert view.n_words == reader.n_words
+            assert view.n_readouts == reader.n_readouts
+            assert np.array_equal(view.meta_data, reader.meta_data)
+            assert np.array_equal(view.get_meta_data(7, 33), reader.meta_data[7:33])  # across files
+            assert view.get_meta_data(5, 5).shape[0] == 0
+            assert np.array_equal(view.read(start=900, stop=4321), reader.read(start=900, stop=4321))
+            assert np.array_equal(view.read_stream('trigger', start=900, stop=4321), reader.read_stream('trigger', start=900, stop=4321))
+            assert np.array_equal(np.concatenate([raw_data for raw_data, _ in view.iter_blocks()]), reader.read())
+            assert [meta_data.shape[0] for _, meta_data in view.iter_blocks()] == [meta_data.shape[0] for _, meta_data in reader.iter_blocks(block_size=1500)]
+            assert view.get_scan_parameter_ranges() == reader.get_scan_parameter_ranges()
+            assert np.array_equal(view.scan_parameters, reader.scan_parameters)
+            assert np.array_equal(view.find_trigger(123), reader.find_trigger(123))
+            frame_index = view.get_frame_index(3)  # including the first frame of every file
+            assert np.all(np.isin(reader.get_frame_index(3)['word_index'], frame_index['word_index']))
+            assert np.all(view.read()[frame_index['word_index'].astype(np.int64)] & 0xFFF10000 == 0x20310000)
+    with pytest.raises(IOError):
+        M26RawDataView(os.path.join(os.path.dirname(raw_data_filename), 'run_2_M26_TELESCOPE'))
+
+
+def test_raw_data_view_meta_data_layouts(raw_data_filename):
+    ''' Test view of a run with files of different meta data layouts '''
+    readouts = create_readouts(n_readouts=30)
+    old_filename = os.path.join(os.path.dirname(raw_data_filename), 'old.h5')
+    with tb.open_file(old_filename, mode='w') as out_file_h5:  # file with meta data layout version 1
+        out_file_h5.create_earray(out_file_h5.root, name='raw_data', atom=tb.UIntAtom(), shape=(0,)).append(np.concatenate([readout[0] for readout in readouts[:10]]))
+        meta_data_table = out_file_h5.create_table(out_file_h5.root, name='meta_data', description=MetaTableV1)
+        index_stop = np.cumsum([readout[0].shape[0] for readout in readouts[:10]])
+        for i, readout in enumerate(readouts[:10]):
+            meta_data_table.row['index_start'] = index_stop[i] - readout[0].shape[0]
+            meta_data_table.row['index_stop'] = index_stop[i]
+            meta_data_table.row['data_length'] = readout[0].shape[0]
+            meta_data_table.row['timestamp_start'] = readout[1]
+            meta_data_table.row['timestamp_stop'] = readout[2]
+            meta_data_table.row.append()
+    with open_raw_data_file(raw_data_filename, mode='w') as raw_data_file:
+        raw_data_file.append(readouts[10:])
+
+    with M26RawDataView([old_filename, raw_data_filename + '.h5'], block_size=2000) as view:
+        assert view.meta_data.dtype.names == ('index_start', 'index_stop', 'data_length', 'timestamp_start', 'timestamp_stop', 'error')
+        assert np.array_equal(view.meta_data['timestamp_start'], [readout[1] for readout in readouts])
+        assert np.array_equal(view.meta_data['index_stop'], np.cumsum([readout[0].shape[0] for readout in readouts]))
+        assert np.array_equal(np.concatenate([raw_data for raw_data, _ in view.iter_blocks()]), np.concatenate([readout[0] for readout in readouts]))
+    with tb.open_file(old_filename, mode='a') as out_file_h5:  # incompatible meta data with a single timestamp
+        meta_data = out_file_h5.root.meta_data[:]
+        out_file_h5.root.meta_data.remove()
+        description = np.dtype([('index_start', np.uint32), ('index_stop', np.uint32), ('data_length', np.uint32), ('timestamp', np.float64)])
+        meta_data_table = out_file_h5.create_table(out_file_h5.root, name='meta_data', description=description)
+        meta_data_table.append(list(zip(meta_data['index_start'], meta_data['index_stop'], meta_data['data_length'], meta_data['timestamp_start'])))
+    with pytest.raises(ValueError, match='old.h5'):
+        M26RawDataView([raw_data_filename + '.h5', old_filename])
+
+
+def test_find_finished_raw_data_files(raw_data_filename):
+    ''' Test selection of finished raw data files with a run catalog '''
+    folder = os.path.dirname(raw_data_filename)
+    with open_raw_data_file(os.path.join(folder, 'run_1_M26_TELESCOPE'), mode='w') as raw_data_file:  # existing before the run catalog
+        raw_data_file.append(create_readouts(n_readouts=5))
+    with RunCatalog(folder) as run_catalog:
+        assert [run['status'] for run in run_catalog.get_runs()] == ['imported']
+        run_catalog.allocate_run('M26_TELESCOPE', filename='run_2_M26_TELESCOPE')
+        with open_raw_data_file(os.path.join(folder, 'run_2_M26_TELESCOPE'), mode='w') as raw_data_file:
+            raw_data_file.append(create_readouts(n_readouts=5))
+        assert find_finished_raw_data_files(folder, min_age=0) == [os.path.join(folder, 'run_1_M26_TELESCOPE.h5')]  # run 2 is running
+        run_catalog.close_run('run_2_M26_TELESCOPE', filenames=raw_data_file.output_filenames)
+    assert sorted(find_finished_raw_data_files(folder, min_age=0)) == [os.path.join(folder, 'run_%d_M26_TELESCOPE.h5' % i) for i in (1, 2)]
+    assert find_finished_raw_data_files(folder, min_age=600.0) == []  # files are too new
+
+
+def test_recompress_raw_data_file(raw_data_filename):
+    ''' Test recompression of finished raw data files '''
+    readouts = create_readouts(n_readouts=50)
+    with open_raw_data_file(raw_data_filename, mode='w', raw_data_compression=dict(complib='blosc:lz4', complevel=1)) as raw_data_file:
+        raw_data_file.append(readouts)
+    with RunCatalog(os.path.dirname(raw_data_filename)) as run_catalog:
+        run_catalog.allocate_run('M26_TELESCOPE', filename='run_2_M26_TELESCOPE')  # running
+        run_catalog.close_run(os.path.basename(raw_data_filename), filenames=raw_data_file.output_filenames)
+    assert find_finished_raw_data_files(os.path.dirname(raw_data_filename), min_age=0) == [raw_data_filename + '.h5']
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        raw_data = in_file_h5.root.raw_data[:]
+        meta_data = in_file_h5.root.meta_data[:]
+
+    result = recompress_raw_data_file(raw_data_filename + '.h5', compression=dict(complib='blosc:zstd', complevel=9, shuffle='bit'))
+    assert result['size_after'] < result['size_before']
+    with tb.open_file(raw_data_filename + '.h5', mode='r') as in_file_h5:
+        assert in_file_h5.root.raw_data.filters.complib == 'blosc:zstd'
+        assert in_file_h5.root.raw_data.filters.bitshuffle
+        assert np.array_equal(in_file_h5.root.raw_data[:], raw_data)
+        assert np.array_equal(in_file_h5.root.meta_data[:], meta_data)
+    # already recompressed
+    result = recompress_raw_data_file(raw_data_filename + '.h5', compression=dict(complib='blosc:zstd', complevel=9, shuffle='bit'))
+    assert result['size_after'] == result['size_before']
+    assert sorted(os.listdir(os.path.dirname(raw_data_filename))) == [os.path.basename(raw_data_filename) + '.h5', 'run_catalog.sqlite']
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main(['-s', __file__])
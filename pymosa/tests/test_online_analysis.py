@@ -18,6 +18,7 @@ matplotlib.use('Agg')  # noqa: E402 Allow headless plotting
 
 import pymosa  # noqa: E731 E402
 from pymosa import online as oa  # noqa: E402
+from pymosa.m26_raw_data import read_meta_data  # noqa: E402
 from pymosa.tests import utils  # noqa: E40
 
 
@@ -52,7 +53,7 @@ def get_raw_data(raw_data_file):
         Delay return if replay is too fast
     '''
     with tb.open_file(raw_data_file, mode="r") as in_file_h5:
-        meta_data = in_file_h5.root.meta_data[:]
+        meta_data = read_meta_data(in_file_h5)
         raw_data = in_file_h5.root.raw_data
         n_readouts = meta_data.shape[0]
 
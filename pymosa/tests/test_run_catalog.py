@@ -0,0 +1,47 @@
+#
+# ------------------------------------------------------------
+# Copyright (c) All rights reserved
+# SiLab, Institute of Physics, University of Bonn
+# ------------------------------------------------------------
+#
+
+import os
+
+import pytest
+
+from pymosa.run_catalog import RunCatalog, get_configuration_hash
+
+
+def test_run_catalog(tmp_path):
+    ''' Test filename allocation and run records '''
+    folder = str(tmp_path)
+    for filename in ('run_1_M26_TELESCOPE.h5', 'run_2_M26_TELESCOPE.log', 'run_4_M26_TELESCOPE.h5'):
+        open(os.path.join(folder, filename), 'w').close()
+    with RunCatalog(folder) as run_catalog:  # existing files are imported
+        assert len(run_catalog.get_runs(status='imported')) == 3
+        assert run_catalog.allocate_run('M26_TELESCOPE', run_number=1) == ('run_3_M26_TELESCOPE', 3)
+        assert run_catalog.allocate_run('M26_TELESCOPE', run_number=1, configuration={'max_triggers': 10}) == ('run_5_M26_TELESCOPE', 5)
+        assert run_catalog.allocate_run('TUNE_TLU', run_number=1) == ('run_1_TUNE_TLU', 1)
+        with pytest.raises(IOError):
+            run_catalog.allocate_run('M26_TELESCOPE', filename='run_4_M26_TELESCOPE')
+        run_catalog.close_run('run_5_M26_TELESCOPE', filenames=[os.path.join(folder, 'run_5_M26_TELESCOPE.h5'), os.path.join(folder, 'run_5_M26_TELESCOPE_1.h5')],
+                              n_triggers=10, n_readouts=100, n_bytes=4000)
+
+    with RunCatalog(folder) as run_catalog:
+        # files created outside of the catalog
+        open(os.path.join(folder, 'run_6_M26_TELESCOPE.h5'), 'w').close()
+        assert run_catalog.allocate_run('M26_TELESCOPE', run_number=5) == ('run_7_M26_TELESCOPE', 7)
+        run = run_catalog.get_run('run_5_M26_TELESCOPE')
+        assert run['status'] == 'closed'
+        assert run['run_number'] == 5
+        assert run['configuration_hash'] == get_configuration_hash({'max_triggers': 10})
+        assert run['filenames'] == ['run_5_M26_TELESCOPE.h5', 'run_5_M26_TELESCOPE_1.h5']
+        assert run['n_files'] == 2
+        assert (run['n_triggers'], run['n_readouts'], run['n_bytes']) == (10, 100, 4000)
+        assert run['duration'] >= 0.0
+        assert [run['filename'] for run in run_catalog.get_runs(run_id='M26_TELESCOPE', status='running')] == ['run_3_M26_TELESCOPE', 'run_7_M26_TELESCOPE']
+        assert run_catalog.get_run('run_6_M26_TELESCOPE') is None
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
@@ -10,7 +10,7 @@ from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
 from matplotlib.backends.backend_pdf import PdfPages
 
 from pymosa.m26 import m26
-from m26_raw_data import open_raw_data_file, send_meta_data
+from m26_raw_data import open_raw_data_file, M26RawDataView
 
 
 class TluTuning(m26):
@@ -44,13 +44,13 @@ class TluTuning(m26):
         self.raw_data_file = open_raw_data_file(filename=self.run_filename,
                                                 mode='w',
                                                 title=os.path.basename(self.run_filename),
-                                                socket_address=self.send_data,
+                                                publisher=self.publisher,
                                                 scan_parameters=self.scan_parameters)
-        if self.raw_data_file.socket:
+        if self.publisher:
             # send reset to indicate a new scan for the online monitor
-            send_meta_data(self.raw_data_file.socket, None, name='Reset')
+            self.publisher.send_meta_data(None, name='Reset')
 
-    def handle_data(self, data, new_file=False, flush=True):
+    def handle_data(self, data, new_file=False, flush=None):
         '''Handling of raw data and meta data during readout.
         '''
         for data_tuple in data:
@@ -71,39 +71,21 @@ class TluTuning(m26):
                     raise RuntimeError('No triggers collected. Check if TLU is on and the IO is set correctly.')
 
     def analyze(self):
-        # Small analysis helper functions
-        def _get_meta_data_index_at_scan_parameter(scan_parameter_values):
-            diff = np.concatenate(([1], np.diff(scan_parameter_values)))
-            idx = np.concatenate((np.where(diff)[0], [len(scan_parameter_values)]))
-            return idx[:-1]
-
-        def _get_ranges_from_array(arr, append_last=True):
-            right = arr[1:]
-            if append_last:
-                left = arr[:]
-                right = np.append(right, None)
-            else:
-                left = arr[:-1]
-            return np.column_stack((left, right))
-
-        with tb.open_file(self.run_filename + '.h5', 'r') as in_file_h5:
-            scan_parameters = in_file_h5.root.scan_parameters[:]['TRIGGER_DATA_DELAY']  # Table with the scan parameter value for every readout
-            meta_data = in_file_h5.root.meta_data[:]
-            data_words = in_file_h5.root.raw_data[:]
-            if data_words.shape[0] == 0:
+        with M26RawDataView(self.run_filename) as reader:  # all files of the run
+            if reader.n_words == 0:
                 raise RuntimeError('No trigger words recorded')
-            readout_indices = _get_meta_data_index_at_scan_parameter(scan_parameter_values=scan_parameters)  # Readout indices where the scan parameter changed
+            scan_parameter_ranges = reader.get_scan_parameter_ranges(names=['TRIGGER_DATA_DELAY'])  # Readout ranges with constant scan parameter value
             with tb.open_file(self.run_filename + '_interpreted.h5', 'w') as out_file_h5:
                 with PdfPages(self.run_filename + '_interpreted.pdf', 'w') as output_pdf:
                     description = [('TRIGGER_DATA_DELAY', np.uint8), ('error_rate', np.float)]  # Output data table description
-                    data_array = np.zeros((len(readout_indices),), dtype=description)
+                    data_array = np.zeros((len(scan_parameter_ranges),), dtype=description)
                     data_table = out_file_h5.create_table(out_file_h5.root, name='error_rate', description=np.zeros((1,), dtype=description).dtype,
                                                           title='Trigger number error rate for different data delay values')
-                    for index, (index_low, index_high) in enumerate(_get_ranges_from_array(readout_indices)):  # Loop over the scan parameter data
-                        data_array['TRIGGER_DATA_DELAY'][index] = scan_parameters[index_low]
-                        word_index_start = meta_data[index_low]['index_start']
-                        word_index_stop = meta_data[index_high]['index_start'] if index_high is not None else meta_data[-1]['index_stop']
-                        actual_raw_data = data_words[word_index_start:word_index_stop]
+                    for index, (scan_parameters, index_low, index_high) in enumerate(scan_parameter_ranges):  # Loop over the scan parameter data
+                        data_array['TRIGGER_DATA_DELAY'][index] = scan_parameters['TRIGGER_DATA_DELAY']
+                        word_index_start = reader.meta_data[index_low]['index_start']
+                        word_index_stop = reader.meta_data[index_high - 1]['index_stop']
+                        actual_raw_data = reader.read(start=word_index_start, stop=word_index_stop)
                         selection = np.bitwise_and(actual_raw_data, 0x80000000) == 0x80000000
                         trigger_numbers = np.bitwise_and(actual_raw_data[selection], 0x7FFFFFFF)  # Get the trigger number
                         if selection.shape[0] != word_index_stop - word_index_start: